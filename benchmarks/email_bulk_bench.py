@@ -0,0 +1,97 @@
+"""
+Chronyx Community Edition - Bulk Email Benchmark
+Throughput of EmailService.send_bulk against a local SMTP sink, compared
+with the previous one-connection-per-message sequential sending.
+
+Requires aiosmtpd (pip install aiosmtpd).
+
+Usage: python -m benchmarks.email_bulk_bench [recipients]
+"""
+import asyncio
+import smtplib
+import sys
+import time
+from email.mime.text import MIMEText
+
+from aiosmtpd.controller import Controller
+
+from integrations.email import EmailService
+from integrations.email.smtp_pool import SMTPConnectionPool
+
+HOST = "127.0.0.1"
+PORT = 8025
+
+
+class Sink:
+    """Accept and count every message"""
+
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 Message accepted"
+
+
+def make_recipients(count: int):
+    return [
+        {"email": f"guest{i}@example.com", "name": f"Guest {i}", "time": "20:00", "party": 2 + i % 6}
+        for i in range(count)
+    ]
+
+
+def send_legacy(count: int) -> float:
+    """Previous behavior: a new SMTP connection per message, one at a time"""
+    started = time.perf_counter()
+    for recipient in make_recipients(count):
+        msg = MIMEText(f"Hi {recipient['name']}, see you at {recipient['time']}")
+        msg["From"] = "bot@example.com"
+        msg["To"] = recipient["email"]
+        msg["Subject"] = "Reservation reminder"
+        with smtplib.SMTP(HOST, PORT) as server:
+            server.send_message(msg)
+    return time.perf_counter() - started
+
+
+async def send_bulk(count: int, connections: int) -> float:
+    service = EmailService()
+    service.smtp_host, service.smtp_port = HOST, PORT
+    service.smtp_user = service.smtp_password = "bench"
+    service.smtp_from = "bot@example.com"
+    # The sink has no TLS or AUTH
+    service._pool = SMTPConnectionPool(HOST, PORT, use_tls=False, size=connections)
+
+    started = time.perf_counter()
+    results = await service.send_bulk(
+        make_recipients(count),
+        title="Reservation reminder for {{ name }}",
+        message="Hi {{ name }}, your table for {{ party }} is booked at {{ time }}.",
+        concurrency=connections
+    )
+    elapsed = time.perf_counter() - started
+    await service.close()
+
+    failed = [result for result in results if not result["success"]]
+    if failed:
+        print(f"  {len(failed)} failed, e.g. {failed[0]['error']}")
+    return elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    sink = Sink()
+    controller = Controller(sink, hostname=HOST, port=PORT)
+    controller.start()
+    try:
+        elapsed = send_legacy(count)
+        print(f"legacy (connection per message)  {count / elapsed:8.0f} msg/s")
+        for connections in (1, 4, 8):
+            elapsed = asyncio.run(send_bulk(count, connections))
+            print(f"send_bulk, {connections} connection(s)       {count / elapsed:8.0f} msg/s")
+    finally:
+        controller.stop()
+    print(f"sink received {sink.received:,} messages")
+
+
+if __name__ == "__main__":
+    main()
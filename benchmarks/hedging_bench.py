@@ -0,0 +1,70 @@
+"""
+Chronyx Community Edition - Hedged Request Benchmark
+Compares tail latency with and without hedging against a fake provider.
+
+Usage: python -m benchmarks.hedging_bench
+"""
+import asyncio
+import random
+import time
+
+from core.hedging import Hedger
+
+REQUESTS = 2000
+CONCURRENCY = 50
+
+
+async def fake_provider() -> str:
+    """Mostly ~200 ms, with a 5% tail of 2-4 s stalls"""
+    if random.random() < 0.05:
+        await asyncio.sleep(random.uniform(2.0, 4.0))
+    else:
+        await asyncio.sleep(random.uniform(0.15, 0.25))
+    return "ok"
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+async def run(hedger=None):
+    """Issue REQUESTS calls, CONCURRENCY at a time, and collect latencies"""
+    latencies = []
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one():
+        async with semaphore:
+            started = time.monotonic()
+            if hedger:
+                await hedger.run(fake_provider, fake_provider)
+            else:
+                await fake_provider()
+            latencies.append(time.monotonic() - started)
+
+    await asyncio.gather(*(one() for _ in range(REQUESTS)))
+    return latencies
+
+
+def report(label, latencies):
+    print(
+        f"{label:<12} p50={percentile(latencies, 0.50) * 1000:7.0f} ms  "
+        f"p95={percentile(latencies, 0.95) * 1000:7.0f} ms  "
+        f"p99={percentile(latencies, 0.99) * 1000:7.0f} ms"
+    )
+
+
+async def main():
+    print("\n" + "=" * 60)
+    print("⏱️  HEDGED REQUEST BENCHMARK")
+    print("=" * 60 + "\n")
+
+    report("baseline", await run())
+
+    hedger = Hedger(percentile=0.9, min_delay=0.3, max_hedge_rate=0.1)
+    report("hedged", await run(hedger))
+    print(f"\n{hedger.get_stats()}\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
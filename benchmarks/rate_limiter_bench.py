@@ -0,0 +1,144 @@
+"""
+Chronyx Community Edition - Rate Limiter Benchmark
+Compares the GCRA RateLimiter with the previous sliding-log implementation.
+
+Usage: python -m benchmarks.rate_limiter_bench [keys]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+
+from core.rate_limiter import RateLimiter, RateLimitExceeded
+from core.rate_limit_backends import SQLiteRateLimitBackend
+
+
+class SlidingLogLimiter:
+    """The previous implementation: a deque of timestamps per key, never evicted"""
+
+    def __init__(self, max_requests: int = 10, time_window: int = 60):
+        self.max_requests = max_requests
+        self.time_window = time_window
+        self.requests = {}
+
+    def check_rate_limit(self, user_id: str = "default") -> bool:
+        current_time = time.time()
+        if user_id not in self.requests:
+            self.requests[user_id] = deque()
+        while (
+            self.requests[user_id]
+            and current_time - self.requests[user_id][0] > self.time_window
+        ):
+            self.requests[user_id].popleft()
+        if len(self.requests[user_id]) >= self.max_requests:
+            oldest_request = self.requests[user_id][0]
+            wait_time = self.time_window - (current_time - oldest_request)
+            raise RateLimitExceeded(
+                f"Rate limit exceeded. Try again in {int(wait_time)} seconds"
+            )
+        self.requests[user_id].append(current_time)
+        return True
+
+
+def bench(label: str, limiter, keys: int, hot_rounds: int = 5):
+    """Measure memory after touching `keys` users, then per-check cost"""
+    user_ids = [f"55119{i:08d}@c.us" for i in range(keys)]
+
+    tracemalloc.start()
+    for user_id in user_ids:
+        limiter.check_rate_limit(user_id)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    live = len(limiter.requests) if isinstance(limiter, SlidingLogLimiter) else len(limiter)
+
+    # Repeated checks on a hot set of users (each one hits its limit)
+    hot = user_ids[:10000]
+    started = time.perf_counter()
+    checks = 0
+    for _ in range(hot_rounds * limiter.max_requests):
+        for user_id in hot:
+            try:
+                limiter.check_rate_limit(user_id)
+            except RateLimitExceeded:
+                pass
+            checks += 1
+    per_check = (time.perf_counter() - started) / checks
+
+    print(
+        f"{label:<12} keys={keys:>9,}  live={live:>9,}  "
+        f"memory={memory / 1024 / 1024:8.1f} MiB  check={per_check * 1e9:6.0f} ns"
+    )
+
+
+def _worker(path: str, checks: int, allowed):
+    """One worker process hammering the same users through the shared backend"""
+    limiter = RateLimiter(max_requests=60, time_window=3600, backend=SQLiteRateLimitBackend(path))
+    count = 0
+    for i in range(checks):
+        try:
+            limiter.check_rate_limit(f"user-{i % 10}")
+            count += 1
+        except RateLimitExceeded:
+            pass
+    allowed.put(count)
+
+
+def bench_shared(processes: int = 4, checks: int = 5000):
+    """Per-check latency and cross-process correctness of the SQLite backend"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ratelimit.db")
+
+        limiter = RateLimiter(max_requests=60, time_window=60, backend=SQLiteRateLimitBackend(path))
+        started = time.perf_counter()
+        for i in range(checks):
+            try:
+                limiter.check_rate_limit(f"55119{i:08d}@c.us")
+            except RateLimitExceeded:
+                pass
+        per_check = (time.perf_counter() - started) / checks
+        limiter.reset()
+
+        allowed = multiprocessing.Queue()
+        workers = [
+            multiprocessing.Process(target=_worker, args=(path, checks, allowed))
+            for _ in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        total = sum(allowed.get() for _ in workers)
+        for worker in workers:
+            worker.join()
+
+    print(f"sqlite       check={per_check * 1e6:6.1f} µs (single process)")
+    print(f"sqlite       {processes} processes allowed {total} requests for 10 users (limit 600)")
+
+
+def main():
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print("\n" + "=" * 60)
+    print("🚦 RATE LIMITER BENCHMARK")
+    print("=" * 60 + "\n")
+
+    bench("sliding-log", SlidingLogLimiter(max_requests=60), keys)
+    bench("gcra", RateLimiter(max_requests=60, time_window=60), keys)
+
+    # Idle keys disappear once their bucket has refilled
+    clock = [0.0]
+    limiter = RateLimiter(max_requests=60, time_window=60, clock=lambda: clock[0])
+    for i in range(keys):
+        limiter.check_rate_limit(str(i))
+    clock[0] += 2
+    started = time.perf_counter()
+    removed = limiter.sweep()
+    print(f"\nsweep: removed {removed:,} idle keys in {time.perf_counter() - started:.2f}s, {len(limiter)} left\n")
+
+    bench_shared()
+    print()
+
+
+if __name__ == "__main__":
+    main()
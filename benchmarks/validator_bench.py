@@ -0,0 +1,128 @@
+"""
+Chronyx Community Edition - Input Validator Benchmark
+Per-message validation overhead of InputValidator compared with the
+previous implementation, at realistic message and context sizes.
+
+Usage: python -m benchmarks.validator_bench
+"""
+import json
+import re
+import time
+
+from core.validators import InputValidator, ValidationError
+
+
+class LegacyValidator:
+    """The previous implementation: pattern strings and json.dumps per call"""
+
+    MAX_MESSAGE_LENGTH = 2000
+    MAX_CONTEXT_SIZE = 10000
+
+    @staticmethod
+    def validate_message(message: str) -> str:
+        message = message.strip()
+        if len(message) < 1:
+            raise ValidationError("Message cannot be empty")
+        if len(message) > LegacyValidator.MAX_MESSAGE_LENGTH:
+            raise ValidationError("Message too long")
+        return re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', message)
+
+    @staticmethod
+    def validate_context(context):
+        if len(json.dumps(context)) > LegacyValidator.MAX_CONTEXT_SIZE:
+            raise ValidationError("Context too large")
+        return context
+
+    @staticmethod
+    def sanitize_for_prompt(text: str) -> str:
+        for pattern in [
+            r'<\|im_start\|>',
+            r'<\|im_end\|>',
+            r'###\s*System:',
+            r'###\s*Assistant:',
+            r'###\s*User:',
+        ]:
+            text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+        return text
+
+
+def make_message(size: int) -> str:
+    """WhatsApp-like text of about `size` characters"""
+    base = "Olá! Gostaria de reservar uma mesa para 4 pessoas amanhã às 20h, é possível? "
+    return (base * (size // len(base) + 1))[:size]
+
+
+CONTEXTS = {
+    "small": {"customer_name": "Maria Silva", "phone": "+5511999999999", "channel": "whatsapp"},
+    "medium": {
+        "customer": {"name": "Maria Silva", "email": "maria@example.com", "tags": ["vip", "returning"]},
+        "orders": [{"id": i, "total": 129.9, "items": ["pizza", "refrigerante"]} for i in range(20)],
+    },
+    "oversized": {"notes": ["x" * 500 for _ in range(200)]},
+}
+
+
+def timed(fn, rounds: int) -> float:
+    """Seconds per call of fn()"""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - started) / rounds
+
+
+def bench_messages(rounds: int = 20000):
+    print("Message validation + sanitization (per message)")
+    for size in (40, 200, 2000):
+        message = make_message(size)
+
+        def legacy():
+            LegacyValidator.sanitize_for_prompt(LegacyValidator.validate_message(message))
+
+        def current():
+            InputValidator.sanitize_for_prompt(InputValidator.validate_message(message))
+
+        old, new = timed(legacy, rounds), timed(current, rounds)
+        print(f"  {size:>5} chars   legacy={old * 1e6:7.2f} us   new={new * 1e6:7.2f} us   {old / new:5.1f}x")
+
+
+def bench_contexts(rounds: int = 20000):
+    print("Context size check (per context)")
+    for name, context in CONTEXTS.items():
+        def legacy():
+            try:
+                LegacyValidator.validate_context(context)
+            except ValidationError:
+                pass
+
+        def current():
+            try:
+                InputValidator.validate_context(context)
+            except ValidationError:
+                pass
+
+        old, new = timed(legacy, rounds), timed(current, rounds)
+        print(f"  {name:>9}   legacy={old * 1e6:7.2f} us   new={new * 1e6:7.2f} us   {old / new:5.1f}x")
+
+
+def bench_batch(count: int = 100000):
+    messages = [make_message(40 + i % 400) for i in range(count)]
+    started = time.perf_counter()
+    for message in messages:
+        InputValidator.sanitize_for_prompt(InputValidator.validate_message(message))
+    single = time.perf_counter() - started
+
+    started = time.perf_counter()
+    InputValidator.validate_batch(messages)
+    batch = time.perf_counter() - started
+    print(
+        f"Batch of {count:,}   one-by-one={single * 1e3:7.1f} ms   "
+        f"validate_batch={batch * 1e3:7.1f} ms   ({batch / count * 1e6:.2f} us/message)"
+    )
+
+
+if __name__ == "__main__":
+    bench_messages()
+    print()
+    bench_contexts()
+    print()
+    bench_batch()
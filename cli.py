@@ -7,6 +7,7 @@ import asyncio
 import sys
 from rich.console import Console
 from rich.panel import Panel
+from rich.live import Live
 from rich.prompt import Prompt
 from rich.markdown import Markdown
 from rich import print as rprint
@@ -14,6 +15,8 @@ from rich import print as rprint
 from templates.restaurant import RestaurantTemplate
 from templates.consulting import ConsultingTemplate
 from config.settings import settings
+from core.client_pool import client_registry
+from integrations.email import EmailService
 
 console = Console()
 
@@ -24,6 +27,7 @@ class ChronyxCLI:
     def __init__(self):
         self.agent = None
         self.template_type = None
+        self.email = EmailService()
         
     def show_banner(self):
         """Display welcome banner"""
@@ -113,13 +117,17 @@ class ChronyxCLI:
                     self.show_history()
                     continue
                 
-                # Process message
-                console.print("\n[dim]Agent is thinking...[/dim]")
-                response = await self.agent.process_message(user_input)
-                
-                # Display response
+                # Process message, rendering the response as it streams in
                 console.print(f"\n[bold green]🤖 Agent[/bold green]\n")
-                console.print(Panel(response, border_style="green"))
+                response = ""
+                with Live(
+                    Panel("[dim]Agent is thinking...[/dim]", border_style="green"),
+                    console=console,
+                    refresh_per_second=12
+                ) as live:
+                    async for delta in self.agent.stream_message(user_input):
+                        response += delta
+                        live.update(Panel(response, border_style="green"))
                 
             except KeyboardInterrupt:
                 console.print("\n\n👋 Interrupted. Goodbye!\n", style="yellow")
@@ -176,8 +184,21 @@ class ChronyxCLI:
         # Select template
         await self.select_template()
         
+        # Open provider connections before the first message
+        if settings.http_prewarm:
+            await client_registry.warmup()
+
+        # Resume delivering emails queued before a restart
+        self.email.start()
+
         # Start chat
-        await self.chat_loop()
+        try:
+            await self.chat_loop()
+        finally:
+            # Flush persisted conversation history
+            await self.agent.close()
+            await self.email.close()
+            await client_registry.close()
 
 
 async def main():
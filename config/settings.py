@@ -6,7 +6,7 @@ import os
 import secrets
 from typing import Optional, List
 from pydantic_settings import BaseSettings
-from pydantic import Field, field_validator
+from pydantic import Field, field_validator, model_validator
 
 
 class Settings(BaseSettings):
@@ -43,6 +43,32 @@ class Settings(BaseSettings):
     temperature: float = 0.7
     max_retries: int = 3
     timeout: int = 30
+    retry_base_delay: float = 0.5  # seconds, doubled per retry (with jitter)
+    retry_max_delay: float = 8.0  # cap for computed backoff
+    retry_after_max: float = 30.0  # longer Retry-After hints fail over instead
+    circuit_failure_threshold: int = 5
+    circuit_reset_timeout: float = 30.0  # seconds
+
+    # Hedged Requests (duplicate slow calls to cut tail latency)
+    hedge_enabled: bool = False
+    hedge_percentile: float = 0.95  # hedge after this latency percentile
+    hedge_min_delay: float = 1.0  # seconds
+    hedge_max_rate: float = 0.1  # at most this fraction of calls hedged
+    hedge_use_alternate: bool = True  # hedge on the next provider/model
+
+    # Provider quotas, shared by all agents in the process (0 = unlimited)
+    openai_requests_per_minute: int = 0
+    openai_tokens_per_minute: int = 0
+    anthropic_requests_per_minute: int = 0
+    anthropic_tokens_per_minute: int = 0
+    provider_budget_timeout: float = 30.0  # seconds to wait for quota
+
+    # Provider HTTP connections (shared per endpoint across agents)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry: float = 60.0  # seconds
+    http_connect_timeout: float = 5.0  # seconds
+    http_prewarm: bool = True  # open connections at startup
 
     # Database
     database_url: str = Field(
@@ -56,6 +82,9 @@ class Settings(BaseSettings):
     rate_limit_enabled: bool = True
     rate_limit_requests: int = 60
     rate_limit_window: int = 60  # seconds
+    # "memory" (per process) or "sqlite" (shared by all workers on the host)
+    rate_limit_backend: str = "memory"
+    rate_limit_db_path: str = "./chronyx_ratelimit.db"
 
     # Email (SMTP)
     smtp_host: Optional[str] = None
@@ -64,6 +93,18 @@ class Settings(BaseSettings):
     smtp_password: Optional[str] = None
     smtp_from: Optional[str] = None
     smtp_use_tls: bool = True
+    smtp_pool_size: int = 3  # open connections reused across messages
+    smtp_health_check_interval: float = 30.0  # idle seconds before a NOOP check
+    smtp_timeout: float = 30.0  # seconds
+    smtp_max_per_second: float = 0  # messages per second to the server (0 = unlimited)
+    # Durable outbox: send_email returns once the message is queued on disk
+    email_outbox_enabled: bool = True
+    email_outbox_path: str = "./chronyx_outbox.db"
+    email_outbox_workers: int = 2
+    email_max_attempts: int = 8
+    email_retry_base_delay: float = 5.0  # seconds, doubled per retry (with jitter)
+    email_retry_max_delay: float = 600.0
+    email_claim_timeout: float = 300.0  # seconds a delivery may take before another worker retries it
 
     # Security
     secret_key: str = Field(
@@ -81,10 +122,34 @@ class Settings(BaseSettings):
     log_file: Optional[str] = None
 
     # Agent Configuration
-    max_conversation_history: int = 50
-    context_window_size: int = 10
+    max_conversation_history: int = 50  # messages kept per user
+    conversation_idle_ttl: int = 3600  # seconds before an idle user is evicted
+    max_active_conversations: int = 100000
+    context_window_size: int = 10  # most history messages sent per turn without summaries
+    max_input_tokens: int = 3000  # prompt budget; keep under the model's context minus max_tokens
     enable_memory_persistence: bool = True
 
+    # Conversation Summaries (older turns compacted in the background)
+    summary_enabled: bool = True
+    summary_model: str = "gpt-3.5-turbo"  # cheap model; Claude models on Anthropic
+    summary_trigger: int = 20  # unsummarized messages that start a compaction
+    summary_keep_recent: int = 10  # most recent messages kept verbatim
+    summary_max_tokens: int = 250
+
+    # Knowledge Base Retrieval
+    # Knowledge bases up to this size are sent whole in the cached prefix;
+    # larger ones are searched per message and trimmed to this budget.
+    knowledge_token_budget: int = 1500
+    knowledge_top_k: int = 8
+
+    # Response Cache (stateless FAQ-style replies)
+    response_cache_enabled: bool = False
+    response_cache_ttl: int = 3600  # seconds
+    response_cache_max_entries: int = 1000
+    response_cache_max_bytes: int = 10 * 1024 * 1024
+    # Share one provider call between identical stateless requests in flight
+    coalesce_requests: bool = True
+
     @field_validator("environment")
     @classmethod
     def validate_environment(cls, v: str) -> str:
@@ -103,6 +168,16 @@ class Settings(BaseSettings):
             raise ValueError(f"log_level must be one of: {allowed}")
         return v.upper()
 
+    @model_validator(mode="after")
+    def validate_summary_window(self) -> "Settings":
+        """Make sure compaction runs before history is trimmed."""
+        if self.summary_enabled:
+            if self.summary_keep_recent > self.summary_trigger:
+                raise ValueError("summary_keep_recent must not exceed summary_trigger")
+            if self.summary_trigger >= self.max_conversation_history:
+                raise ValueError("summary_trigger must be below max_conversation_history")
+        return self
+
     @property
     def is_production(self) -> bool:
         """Check if running in production."""
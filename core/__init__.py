@@ -3,5 +3,6 @@ Chronyx Community Edition - Core Module
 """
 from .agent_base import BaseAgent
 from .single_agent import SingleAgent
+from .client_pool import client_registry
 
-__all__ = ["BaseAgent", "SingleAgent"]
+__all__ = ["BaseAgent", "SingleAgent", "client_registry"]
@@ -2,10 +2,13 @@
 Chronyx Community Edition - Base Agent Class
 """
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional, Any
-from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Any
 import logging
 
+from .conversation_store import ConversationStore
+from .persistence import create_history_backend
+from config.settings import settings
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,7 +22,8 @@ class BaseAgent(ABC):
         system_prompt: str,
         model: str = "gpt-3.5-turbo",
         temperature: float = 0.7,
-        max_tokens: int = 500
+        max_tokens: int = 500,
+        memory: Optional[ConversationStore] = None
     ):
         self.name = name
         self.description = description
@@ -27,32 +31,48 @@ class BaseAgent(ABC):
         self.model = model
         self.temperature = temperature
         self.max_tokens = max_tokens
-        self.conversation_history: List[Dict[str, str]] = []
+        self.memory = memory if memory is not None else ConversationStore(
+            max_messages=settings.max_conversation_history,
+            idle_ttl=settings.conversation_idle_ttl,
+            max_users=settings.max_active_conversations,
+            backend=create_history_backend(name)
+        )
         
     @abstractmethod
-    async def process_message(self, message: str, context: Optional[Dict] = None) -> str:
+    async def process_message(
+        self,
+        message: str,
+        context: Optional[Dict] = None,
+        user_id: str = "default"
+    ) -> str:
         """Process incoming message and return response"""
         pass
+
+    async def stream_message(
+        self,
+        message: str,
+        context: Optional[Dict] = None,
+        user_id: str = "default"
+    ) -> AsyncIterator[str]:
+        """Yield the response incrementally (whole response by default)"""
+        yield await self.process_message(message, context, user_id)
     
-    def add_to_history(self, role: str, content: str):
-        """Add message to conversation history"""
-        self.conversation_history.append({
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat()
-        })
+    def add_to_history(self, role: str, content: str, user_id: str = "default"):
+        """Add message to a user's conversation history"""
+        self.memory.append(user_id, role, content)
         
-    def get_history(self, limit: Optional[int] = None) -> List[Dict]:
-        """Get conversation history"""
-        if limit:
-            return self.conversation_history[-limit:]
-        return self.conversation_history
+    def get_history(self, limit: Optional[int] = None, user_id: str = "default") -> List[Dict]:
+        """Get a user's conversation history"""
+        return self.memory.history(user_id, limit)
     
-    def clear_history(self):
-        """Clear conversation history"""
-        self.conversation_history = []
+    def clear_history(self, user_id: Optional[str] = None):
+        """Clear conversation history for one user, or for everyone"""
+        self.memory.clear(user_id)
         
-    def get_context_window(self, limit: int = 10) -> List[Dict[str, str]]:
+    def get_context_window(self, limit: int = 10, user_id: str = "default") -> List[Dict[str, str]]:
         """Get recent conversation context for LLM"""
-        recent = self.conversation_history[-limit:] if len(self.conversation_history) > limit else self.conversation_history
-        return [{"role": msg["role"], "content": msg["content"]} for msg in recent]
+        return self.memory.context_window(user_id, limit)
+
+    async def close(self):
+        """Flush pending history writes and release resources"""
+        await self.memory.close()
@@ -0,0 +1,117 @@
+"""
+Chronyx Community Edition - Provider Client Pool
+Process-wide shared LLM clients with tuned HTTP connection limits.
+"""
+import asyncio
+import logging
+from types import ModuleType
+from typing import Any, Dict, Optional, Tuple
+
+import anthropic
+import openai
+
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+ClientKey = Tuple[str, Optional[str], str]
+
+
+class ClientRegistry:
+    """
+    Share one provider client per (provider, base_url, api_key)
+
+    Every agent in the process that talks to the same endpoint with the
+    same key reuses one client, and therefore one HTTP connection pool,
+    instead of opening its own sockets and TLS sessions.
+    """
+
+    def __init__(self):
+        self._clients: Dict[ClientKey, Any] = {}
+        self._http_clients: Dict[ClientKey, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    @staticmethod
+    def _create_http_client(sdk: ModuleType) -> Any:
+        """The SDK's own HTTP client, with the configured pool limits and timeout"""
+        # SDKs only accept clients of the HTTP library they are built on,
+        # which need not be the httpx installed for us
+        limits = type(sdk.DEFAULT_CONNECTION_LIMITS)
+        return sdk.DefaultAsyncHttpxClient(
+            limits=limits(
+                max_connections=settings.http_max_connections,
+                max_keepalive_connections=settings.http_max_keepalive_connections,
+                keepalive_expiry=settings.http_keepalive_expiry
+            ),
+            timeout=sdk.Timeout(settings.timeout, connect=settings.http_connect_timeout)
+        )
+
+    def get(self, provider: str, api_key: str, base_url: Optional[str] = None) -> Any:
+        """
+        Get the shared client for a provider endpoint
+
+        Args:
+            provider: "openai" or "anthropic"
+            api_key: Provider API key
+            base_url: Optional API base URL (for proxies)
+
+        Returns:
+            AsyncOpenAI or AsyncAnthropic client
+        """
+        key = (provider, base_url, api_key)
+        client = self._clients.get(key)
+        if client is not None:
+            return client
+
+        if provider == "openai":
+            sdk, client_class = openai, openai.AsyncOpenAI
+        elif provider == "anthropic":
+            sdk, client_class = anthropic, anthropic.AsyncAnthropic
+        else:
+            raise ValueError(f"Unknown AI provider: {provider}")
+
+        http_client = self._create_http_client(sdk)
+        client_kwargs = {
+            "api_key": api_key,
+            "http_client": http_client,
+            "timeout": settings.timeout,
+            # Retries and failover are handled by SingleAgent
+            "max_retries": 0
+        }
+        if base_url:
+            client_kwargs["base_url"] = base_url
+
+        client = client_class(**client_kwargs)
+        self._clients[key] = client
+        self._http_clients[key] = http_client
+        return client
+
+    async def warmup(self):
+        """
+        Open connections to every registered endpoint ahead of traffic
+
+        Any HTTP response counts - the point is to have TCP and TLS set up
+        and parked in the keep-alive pool before the first customer message.
+        """
+        async def _warm(key: ClientKey):
+            url = str(self._clients[key].base_url)
+            try:
+                await self._http_clients[key].head(url)
+                logger.info(f"Warmed up {key[0]} connection to {url}")
+            except Exception as e:
+                logger.warning(f"Could not pre-warm {key[0]} connection: {e}")
+
+        await asyncio.gather(*(_warm(key) for key in list(self._clients)))
+
+    async def close(self):
+        """Close every shared client"""
+        for http_client in self._http_clients.values():
+            await http_client.aclose()
+        self._clients.clear()
+        self._http_clients.clear()
+
+
+# Process-wide registry
+client_registry = ClientRegistry()
@@ -0,0 +1,306 @@
+"""
+Chronyx Community Edition - Conversation Store
+Per-user, bounded conversation memory shared by a single agent.
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import TYPE_CHECKING, Deque, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .persistence import SQLHistoryBackend
+
+
+class Message:
+    """Compact conversation record"""
+
+    __slots__ = ("role", "content", "timestamp")
+
+    def __init__(self, role: str, content: str, timestamp: Optional[float] = None):
+        self.role = role
+        self.content = content
+        self.timestamp = timestamp if timestamp is not None else time.time()
+
+    def to_dict(self) -> Dict:
+        """Return the message as a plain dict"""
+        return {
+            "role": self.role,
+            "content": self.content,
+            "timestamp": self.timestamp
+        }
+
+
+class Conversation:
+    """Bounded message log, rolling summary and ordering lock for one user"""
+
+    __slots__ = ("messages", "lock", "last_active", "loaded", "total", "summary", "summarized")
+
+    def __init__(self, max_messages: int):
+        self.messages: Deque[Message] = deque(maxlen=max_messages)
+        self.lock = asyncio.Lock()
+        self.last_active = time.monotonic()
+        self.loaded = False
+        # Messages ever added, and how many of the oldest the summary covers
+        self.total = 0
+        self.summary = ""
+        self.summarized = 0
+
+    def unsummarized(self) -> int:
+        """Number of held messages not covered by the summary"""
+        return min(len(self.messages), self.total - self.summarized)
+
+    def tail(self, limit: int) -> Iterator[Message]:
+        """Iterate over the last `limit` messages without copying the log"""
+        start = max(0, len(self.messages) - limit)
+        return islice(self.messages, start, None)
+
+
+class ConversationStore:
+    """
+    Per-user conversation memory
+
+    Each user gets a fixed-size message log, so memory per user is capped by
+    `max_messages`. Users that have been idle for `idle_ttl` seconds, or the
+    least recently active ones once `max_users` is exceeded, are evicted.
+    Conversations whose lock is held (a turn is in progress) are never evicted.
+
+    With a `backend`, every write is also handed to it for write-behind
+    persistence, and an evicted or restarted user's recent history is read
+    back by `load()`.
+    """
+
+    def __init__(
+        self,
+        max_messages: int = 50,
+        idle_ttl: float = 3600,
+        max_users: int = 100000,
+        backend: Optional["SQLHistoryBackend"] = None
+    ):
+        """
+        Initialize conversation store
+
+        Args:
+            max_messages: Maximum messages kept per user
+            idle_ttl: Seconds of inactivity before a user is evicted
+            max_users: Maximum number of users kept in memory
+            backend: Optional persistent history backend
+        """
+        self.max_messages = max_messages
+        self.idle_ttl = idle_ttl
+        self.max_users = max_users
+        self.backend = backend
+        self._conversations: "OrderedDict[str, Conversation]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._conversations)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._conversations
+
+    def _get(self, user_id: str, create: bool = True) -> Optional[Conversation]:
+        """Get a user's conversation, marking it as recently active"""
+        conversation = self._conversations.get(user_id)
+        if conversation is None:
+            if not create:
+                return None
+            self.evict_idle(reserve=1)
+            conversation = Conversation(self.max_messages)
+            self._conversations[user_id] = conversation
+        else:
+            self._conversations.move_to_end(user_id)
+        conversation.last_active = time.monotonic()
+        return conversation
+
+    def lock(self, user_id: str) -> asyncio.Lock:
+        """
+        Get the ordering lock for a user
+
+        Hold it for the whole turn so concurrent messages from the same user
+        do not interleave in the history.
+        """
+        return self._get(user_id).lock
+
+    async def load(self, user_id: str):
+        """
+        Make sure a user's persisted history is in memory
+
+        Call it while holding the user's lock. It only reads from the backend
+        the first time a user is seen since startup or eviction.
+        """
+        conversation = self._get(user_id)
+        if conversation.loaded:
+            return
+        if self.backend is not None:
+            stored = await self.backend.load_recent(user_id, self.max_messages)
+            # Turns written before this load are already in memory, and
+            # come back from the backend too (pending or flushed)
+            current = list(conversation.messages)
+            held = {(msg.role, msg.content, msg.timestamp) for msg in current}
+            older = [msg for msg in stored if (msg.role, msg.content, msg.timestamp) not in held]
+            if older:
+                conversation.messages.clear()
+                conversation.messages.extend(older)
+                conversation.messages.extend(current)
+                conversation.total += len(older)
+        conversation.loaded = True
+
+    def append(self, user_id: str, role: str, content: str, timestamp: Optional[float] = None) -> Message:
+        """Append a message to a user's conversation"""
+        message = Message(role, content, timestamp)
+        conversation = self._get(user_id)
+        conversation.messages.append(message)
+        conversation.total += 1
+        if self.backend is not None:
+            self.backend.enqueue_message(user_id, message)
+        return message
+
+    def history(self, user_id: str, limit: Optional[int] = None) -> List[Dict]:
+        """Get a user's history as dicts"""
+        conversation = self._get(user_id, create=False)
+        if conversation is None:
+            return []
+        messages = conversation.tail(limit) if limit else conversation.messages
+        return [msg.to_dict() for msg in messages]
+
+    def context_window(
+        self,
+        user_id: str,
+        limit: int = 10,
+        unsummarized_only: bool = False
+    ) -> List[Dict[str, str]]:
+        """
+        Get the last `limit` messages in LLM message format
+
+        Args:
+            user_id: User identifier
+            limit: Maximum number of messages
+            unsummarized_only: Leave out messages covered by the summary
+        """
+        conversation = self._get(user_id, create=False)
+        if conversation is None:
+            return []
+        if unsummarized_only:
+            limit = min(limit, conversation.unsummarized())
+        return [
+            {"role": msg.role, "content": msg.content}
+            for msg in conversation.tail(limit)
+        ]
+
+    def message_count(self, user_id: str) -> int:
+        """Number of messages held for a user"""
+        conversation = self._conversations.get(user_id)
+        return len(conversation.messages) if conversation else 0
+
+    def summary(self, user_id: str) -> str:
+        """Rolling summary of a user's older messages ("" if none)"""
+        conversation = self._conversations.get(user_id)
+        return conversation.summary if conversation else ""
+
+    def unsummarized_count(self, user_id: str) -> int:
+        """Number of a user's held messages not covered by the summary"""
+        conversation = self._conversations.get(user_id)
+        return conversation.unsummarized() if conversation else 0
+
+    def summary_candidates(
+        self,
+        user_id: str,
+        keep_recent: int
+    ) -> Tuple[str, List[Dict[str, str]], int, int]:
+        """
+        Messages to fold into the summary
+
+        Args:
+            user_id: User identifier
+            keep_recent: Most recent messages to leave out of the summary
+
+        Returns:
+            Current summary, the unsummarized messages older than the last
+            `keep_recent`, and the (base, upto) positions to pass to
+            `set_summary()`
+        """
+        conversation = self._conversations.get(user_id)
+        if conversation is None:
+            return "", [], 0, 0
+        pending = conversation.unsummarized()
+        count = max(0, pending - keep_recent)
+        start = len(conversation.messages) - pending
+        messages = [
+            {"role": msg.role, "content": msg.content}
+            for msg in islice(conversation.messages, start, start + count)
+        ]
+        # Messages that dropped off the log unsummarized are skipped
+        upto = conversation.total - pending + count
+        return conversation.summary, messages, conversation.summarized, upto
+
+    def set_summary(self, user_id: str, summary: str, base: int, upto: int) -> bool:
+        """
+        Store a new summary covering messages up to position `upto`
+
+        Returns:
+            False if the conversation changed since `summary_candidates()`
+            returned `base` (cleared, evicted or summarized meanwhile)
+        """
+        conversation = self._conversations.get(user_id)
+        if conversation is None or conversation.summarized != base or upto > conversation.total:
+            return False
+        conversation.summary = summary
+        conversation.summarized = upto
+        return True
+
+    def clear(self, user_id: Optional[str] = None):
+        """
+        Clear conversation memory
+
+        Args:
+            user_id: Optional user ID to clear. If None, clear all.
+        """
+        if self.backend is not None:
+            self.backend.enqueue_clear(user_id)
+        if user_id is None:
+            self._conversations.clear()
+            return
+        conversation = self._conversations.get(user_id)
+        if conversation is not None:
+            conversation.messages.clear()
+            conversation.summary = ""
+            conversation.summarized = conversation.total
+
+    async def close(self):
+        """Flush pending writes to the backend"""
+        if self.backend is not None:
+            await self.backend.close()
+
+    def evict_idle(self, reserve: int = 0) -> int:
+        """
+        Evict idle and over-capacity conversations
+
+        Conversations are kept in least-recently-active order, so only the
+        front of the map has to be inspected.
+
+        Args:
+            reserve: Slots to free up for conversations about to be added
+
+        Returns:
+            Number of evicted users
+        """
+        cutoff = time.monotonic() - self.idle_ttl
+        evicted = 0
+        skipped = 0
+
+        while self._conversations:
+            user_id, conversation = next(iter(self._conversations.items()))
+            over_capacity = len(self._conversations) + reserve > self.max_users
+            if not over_capacity and conversation.last_active > cutoff:
+                break
+            if conversation.lock.locked():
+                # Turn in progress - keep it, look at the next one
+                self._conversations.move_to_end(user_id)
+                skipped += 1
+                if skipped >= len(self._conversations):
+                    break
+                continue
+            del self._conversations[user_id]
+            evicted += 1
+
+        return evicted
@@ -0,0 +1,133 @@
+"""
+Chronyx Community Edition - Request Hedging
+Fire a backup LLM request when the first one is slower than usual.
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies"""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def record(self, latency: float):
+        """Record one latency in seconds"""
+        self.samples.append(latency)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Latency at percentile `p` (0-1), or None without samples"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(p * len(ordered)))
+        return ordered[index]
+
+
+class Hedger:
+    """
+    Hedged requests
+
+    The primary call runs alone until it has taken longer than the
+    `percentile` of recently observed latencies (never less than
+    `min_delay`). Then a second call is started, the first one to succeed
+    wins and the other is cancelled. Each call earns `max_hedge_rate`
+    hedge credits (capped at `burst`), and each hedge spends one, so at
+    most that fraction of calls is duplicated over time.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_delay: float = 1.0,
+        max_hedge_rate: float = 0.1,
+        burst: float = 5.0,
+        window: int = 200,
+        min_samples: int = 20
+    ):
+        """
+        Initialize hedger
+
+        Args:
+            percentile: Latency percentile after which to hedge (0-1)
+            min_delay: Minimum seconds to wait before hedging
+            max_hedge_rate: Long-run fraction of calls that may be hedged
+            burst: Maximum hedge credits saved up
+            window: Number of recent latencies tracked
+            min_samples: Samples needed before hedging starts
+        """
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_hedge_rate = max_hedge_rate
+        self.burst = burst
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker(window)
+        self._credits = 0.0
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None if hedging is off for now"""
+        if len(self.latencies) < self.min_samples:
+            return None
+        return max(self.min_delay, self.latencies.percentile(self.percentile))
+
+    async def run(
+        self,
+        primary: Callable[[], Awaitable[Any]],
+        hedge: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Run `primary`, hedging with `hedge` if it is slow
+
+        Raises:
+            The primary call's exception if both calls fail
+        """
+        self.requests += 1
+        self._credits = min(self.burst, self._credits + self.max_hedge_rate)
+        started = time.monotonic()
+
+        primary_task = asyncio.ensure_future(primary())
+        tasks = {primary_task}
+        try:
+            delay = self.hedge_delay()
+            if delay is not None and self._credits >= 1:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    self._credits -= 1
+                    self.hedged += 1
+                    tasks.add(asyncio.ensure_future(hedge()))
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.latencies.record(time.monotonic() - started)
+                        if task is not primary_task:
+                            self.hedge_wins += 1
+                        return task.result()
+
+            return primary_task.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hedging counters"""
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": self.hedged / self.requests if self.requests else 0.0,
+            "hedge_delay": self.hedge_delay()
+        }
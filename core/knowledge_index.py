@@ -0,0 +1,112 @@
+"""
+Chronyx Community Edition - Knowledge Base Index
+In-process BM25 retrieval over knowledge base entries.
+"""
+import heapq
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from .tokens import estimate_tokens
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-folded word tokens ("Horário" -> "horario")"""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = folded.encode("ascii", "ignore").decode("ascii")
+    return _TOKEN.findall(folded)
+
+
+class KnowledgeIndex:
+    """
+    BM25 inverted index over knowledge base entries
+
+    Each entry is indexed on its key and value. The index is built once per
+    knowledge base and queried per message, so the cost of a lookup depends
+    on the query terms' posting lists rather than on the size of the KB.
+    """
+
+    def __init__(self, entries: Optional[Dict] = None, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize knowledge index
+
+        Args:
+            entries: Knowledge base entries to index
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+        self._keys: List[str] = []
+        self._values: List[str] = []
+        self._tokens: List[int] = []
+        self._postings: Dict[str, List[Tuple[int, float]]] = {}
+        self.total_tokens = 0
+        self.build(entries or {})
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def build(self, entries: Dict):
+        """(Re)build the index for a knowledge base"""
+        self._keys = [str(key) for key in entries]
+        self._values = [str(value) for value in entries.values()]
+        self._tokens = []
+        self._postings = {}
+
+        doc_terms = []
+        for key, value in zip(self._keys, self._values):
+            terms = Counter(tokenize(f"{key} {value}"))
+            doc_terms.append((terms, sum(terms.values())))
+            self._tokens.append(estimate_tokens(f"{key}: {value}"))
+        self.total_tokens = sum(self._tokens)
+
+        count = len(doc_terms)
+        if not count:
+            return
+        avg_length = sum(length for _, length in doc_terms) / count or 1
+
+        # Store the precomputed BM25 weight of each (term, entry) pair
+        document_freq = Counter(term for terms, _ in doc_terms for term in terms)
+        for doc_id, (terms, length) in enumerate(doc_terms):
+            norm = self.k1 * (1 - self.b + self.b * length / avg_length)
+            for term, freq in terms.items():
+                df = document_freq[term]
+                idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+                weight = idf * freq * (self.k1 + 1) / (freq + norm)
+                self._postings.setdefault(term, []).append((doc_id, weight))
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 8,
+        token_budget: Optional[int] = None
+    ) -> Dict[str, str]:
+        """
+        Find the entries most relevant to a query
+
+        Args:
+            query: User message
+            top_k: Maximum entries returned
+            token_budget: Optional cap on the estimated tokens of the result
+
+        Returns:
+            Matching entries, best first
+        """
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            for doc_id, weight in self._postings.get(term, ()):
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight
+
+        results: Dict[str, str] = {}
+        used = 0
+        for doc_id in heapq.nlargest(top_k, scores, key=scores.__getitem__):
+            if token_budget is not None and used + self._tokens[doc_id] > token_budget:
+                continue
+            used += self._tokens[doc_id]
+            results[self._keys[doc_id]] = self._values[doc_id]
+        return results
@@ -0,0 +1,257 @@
+"""
+Chronyx Community Edition - Conversation Persistence
+Async SQLAlchemy history backend with write-behind batching.
+"""
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Column, Float, Index, Integer, String, Text, delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+from .conversation_store import Message
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+Base = declarative_base()
+
+
+class MessageRecord(Base):
+    """Persisted conversation message"""
+
+    __tablename__ = "conversation_messages"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    agent = Column(String(100), nullable=False)
+    user_id = Column(String(255), nullable=False)
+    role = Column(String(20), nullable=False)
+    content = Column(Text, nullable=False)
+    timestamp = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index("ix_conversation_messages_user_ts", "agent", "user_id", "timestamp"),
+    )
+
+
+def normalize_database_url(url: str) -> str:
+    """Map sync SQLite URLs (as in older .env files) to the async driver"""
+    if url.startswith("sqlite:///"):
+        return "sqlite+aiosqlite:///" + url[len("sqlite:///"):]
+    return url
+
+
+class SQLHistoryBackend:
+    """
+    Durable conversation history
+
+    Writes never touch the database on the caller's path: `enqueue_*` only
+    appends to an in-memory buffer, and a background flusher commits the
+    buffer in batches every `flush_interval` seconds, or sooner once
+    `batch_size` operations are pending. Reads go through the
+    (agent, user_id, timestamp) index and happen once per user, when the
+    conversation is first loaded into memory.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        database_url: Optional[str] = None,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        max_pending: int = 10000
+    ):
+        """
+        Initialize history backend
+
+        Args:
+            namespace: Agent name the stored conversations belong to
+            database_url: SQLAlchemy async URL (defaults to settings.database_url)
+            batch_size: Pending operations that trigger an early flush
+            flush_interval: Maximum seconds between flushes
+            max_pending: Buffer size above which the oldest writes are dropped
+        """
+        self.namespace = namespace
+        self.database_url = normalize_database_url(database_url or settings.database_url)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        # ("add", user_id, Message) or ("clear", user_id | None, None)
+        self._pending: List[Tuple[str, Optional[str], Optional[Message]]] = []
+        self._engine: Optional[AsyncEngine] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._starter: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._closing = False
+
+    def _create_engine(self) -> AsyncEngine:
+        """Create the async engine using the configured pool settings"""
+        engine_kwargs = {}
+        if not self.database_url.startswith("sqlite"):
+            engine_kwargs["pool_size"] = settings.database_pool_size
+            engine_kwargs["max_overflow"] = settings.database_pool_overflow
+            engine_kwargs["pool_pre_ping"] = True
+        return create_async_engine(self.database_url, **engine_kwargs)
+
+    async def _ensure_engine(self):
+        """Create the engine and tables on first use"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._engine is not None:
+                return
+            engine = self._create_engine()
+            try:
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+            except Exception:
+                await engine.dispose()
+                raise
+            self._engine = engine
+
+    async def start(self):
+        """Create tables and start the background flusher (idempotent)"""
+        if self._flusher is not None:
+            return
+        await self._ensure_engine()
+        if self._flusher is None and not self._closing:
+            self._wakeup = asyncio.Event()
+            self._flusher = asyncio.create_task(self._flush_loop())
+            logger.info(f"Conversation persistence enabled ({self.database_url.split('://')[0]})")
+
+    def _enqueue(self, op: Tuple[str, Optional[str], Optional[Message]]):
+        """Buffer an operation for the flusher"""
+        self._pending.append(op)
+        if len(self._pending) > self.max_pending:
+            dropped = len(self._pending) - self.max_pending
+            del self._pending[:dropped]
+            logger.warning(f"History write buffer full, dropped {dropped} oldest writes")
+        if self._wakeup is not None and len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+        elif self._flusher is None and self._starter is None and not self._closing:
+            # Written before any load - start flushing without waiting for one
+            try:
+                self._starter = asyncio.get_running_loop().create_task(self._start_flusher())
+            except RuntimeError:
+                pass  # No event loop yet; flush() and close() still write it
+
+    async def _start_flusher(self):
+        """Start the backend from a write, logging instead of raising"""
+        try:
+            await self.start()
+        except Exception as e:
+            logger.error(f"Failed to start conversation persistence: {e}")
+        finally:
+            self._starter = None
+
+    def enqueue_message(self, user_id: str, message: Message):
+        """Schedule a message to be persisted"""
+        self._enqueue(("add", user_id, message))
+
+    def enqueue_clear(self, user_id: Optional[str] = None):
+        """Schedule deletion of a user's history (or all of this agent's)"""
+        self._enqueue(("clear", user_id, None))
+
+    async def load_recent(self, user_id: str, limit: int) -> List[Message]:
+        """
+        Load a user's most recent messages, oldest first
+
+        Writes still waiting in the buffer are included so nothing is lost
+        between a write and the next flush.
+        """
+        await self.start()
+        messages: List[Message] = []
+        try:
+            stmt = (
+                select(MessageRecord.role, MessageRecord.content, MessageRecord.timestamp)
+                .where(MessageRecord.agent == self.namespace)
+                .where(MessageRecord.user_id == user_id)
+                .order_by(MessageRecord.timestamp.desc(), MessageRecord.id.desc())
+                .limit(limit)
+            )
+            async with self._engine.connect() as conn:
+                rows = (await conn.execute(stmt)).all()
+            messages = [Message(role, content, ts) for role, content, ts in reversed(rows)]
+        except Exception as e:
+            logger.error(f"Failed to load history for {user_id}: {e}")
+
+        for op, op_user, message in self._pending:
+            if op_user != user_id and op_user is not None:
+                continue
+            if op == "clear":
+                messages = []
+            else:
+                messages.append(message)
+
+        return messages[-limit:]
+
+    async def _flush_loop(self):
+        """Commit buffered writes in batches"""
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """Write all buffered operations in one transaction"""
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        try:
+            await self._ensure_engine()
+            async with self._engine.begin() as conn:
+                rows = []
+                for op, user_id, message in batch:
+                    if op == "add":
+                        rows.append({
+                            "agent": self.namespace,
+                            "user_id": user_id,
+                            "role": message.role,
+                            "content": message.content,
+                            "timestamp": message.timestamp
+                        })
+                        continue
+                    # Keep ordering: write adds queued before the clear first
+                    if rows:
+                        await conn.execute(insert(MessageRecord), rows)
+                        rows = []
+                    stmt = delete(MessageRecord).where(MessageRecord.agent == self.namespace)
+                    if user_id is not None:
+                        stmt = stmt.where(MessageRecord.user_id == user_id)
+                    await conn.execute(stmt)
+                if rows:
+                    await conn.execute(insert(MessageRecord), rows)
+        except Exception as e:
+            logger.error(f"Failed to persist {len(batch)} history writes: {e}")
+            # Retry on the next flush, ahead of anything queued meanwhile
+            self._pending = batch + self._pending
+            if len(self._pending) > self.max_pending:
+                del self._pending[:len(self._pending) - self.max_pending]
+
+    async def close(self):
+        """Flush remaining writes and release the connection pool"""
+        self._closing = True
+        if self._starter is not None:
+            await asyncio.gather(self._starter, return_exceptions=True)
+        if self._flusher is not None:
+            self._wakeup.set()
+            await self._flusher
+            self._flusher = None
+        await self.flush()
+        if self._engine is not None:
+            await self._engine.dispose()
+            self._engine = None
+
+
+def create_history_backend(namespace: str) -> Optional[SQLHistoryBackend]:
+    """Build the configured history backend, or None if persistence is off"""
+    if not settings.enable_memory_persistence:
+        return None
+    return SQLHistoryBackend(namespace=namespace)
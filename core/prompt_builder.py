@@ -0,0 +1,163 @@
+"""
+Chronyx Community Edition - Prompt Builder
+Builds provider messages with a stable, cacheable prefix.
+"""
+from typing import Dict, List, Optional
+
+from .tokens import (
+    MESSAGE_OVERHEAD,
+    estimate_message_tokens,
+    estimate_messages_tokens,
+    estimate_tokens,
+)
+
+
+class Prompt:
+    """System prefix plus role-tagged conversation messages"""
+
+    __slots__ = ("system", "messages")
+
+    def __init__(self, system: str, messages: List[Dict[str, str]]):
+        self.system = system
+        self.messages = messages
+
+    def estimate_tokens(self) -> int:
+        """Estimated input token count"""
+        return (
+            estimate_tokens(self.system) + MESSAGE_OVERHEAD
+            + estimate_messages_tokens(self.messages)
+        )
+
+    def to_openai(self) -> List[Dict]:
+        """Messages for the OpenAI chat completions API"""
+        return [{"role": "system", "content": self.system}] + self.messages
+
+    def to_anthropic_system(self) -> List[Dict]:
+        """System blocks for the Anthropic messages API, marked cacheable"""
+        return [{
+            "type": "text",
+            "text": self.system,
+            "cache_control": {"type": "ephemeral"}
+        }]
+
+
+class PromptBuilder:
+    """
+    Build prompts whose prefix is byte-identical across turns
+
+    The system prompt and knowledge base are rendered once into `prefix` and
+    reused until the knowledge base changes, so provider-side prompt caching
+    (automatic on OpenAI, `cache_control` on Anthropic) can hit on every turn
+    after the first. Everything that changes per turn - history, context and
+    the current message - comes after the prefix as role-tagged messages.
+    """
+
+    def __init__(self, system_prompt: str, knowledge_base: Optional[Dict] = None):
+        self.system_prompt = system_prompt
+        self.prefix = ""
+        self.prefix_tokens = 0
+        self.set_knowledge_base(knowledge_base or {})
+
+    def set_knowledge_base(self, knowledge_base: Dict):
+        """Re-render the cached prefix for a new knowledge base"""
+        parts = [self.system_prompt]
+        if knowledge_base:
+            parts.append(self.render_knowledge(knowledge_base))
+        self.prefix = "\n\n".join(parts)
+        self.prefix_tokens = estimate_tokens(self.prefix) + MESSAGE_OVERHEAD
+
+    @staticmethod
+    def render_knowledge(entries: Dict) -> str:
+        """Render knowledge base entries as a prompt section"""
+        lines = ["=== KNOWLEDGE BASE ==="]
+        lines.extend(f"{key}: {value}" for key, value in entries.items())
+        return "\n".join(lines)
+
+    @staticmethod
+    def render_context(context: Dict) -> str:
+        """Render per-turn context as a prompt section"""
+        lines = ["=== CONTEXT ==="]
+        lines.extend(f"{key}: {value}" for key, value in context.items())
+        return "\n".join(lines)
+
+    def build(
+        self,
+        message: str,
+        history: Optional[List[Dict[str, str]]] = None,
+        context: Optional[Dict] = None,
+        knowledge: Optional[Dict] = None,
+        token_budget: Optional[int] = None,
+        summary: Optional[str] = None
+    ) -> Prompt:
+        """
+        Build the prompt for one turn
+
+        Args:
+            message: Current (sanitized) user message
+            history: Previous turns, oldest first, excluding `message`
+            context: Optional per-turn context
+            knowledge: Knowledge entries retrieved for this turn (used when
+                the knowledge base is too large for the cached prefix)
+            token_budget: Optional cap on the prompt's estimated input
+                tokens; the oldest history turns are dropped to fit it
+            summary: Optional summary of turns older than `history`
+
+        Returns:
+            Prompt with the cached prefix and conversation messages
+        """
+        sections = []
+        if summary:
+            sections.append(f"=== CONVERSATION SUMMARY ===\n{summary}")
+        if knowledge:
+            sections.append(self.render_knowledge(knowledge))
+        if context:
+            sections.append(self.render_context(context))
+        sections.append(message)
+        content = "\n\n".join(sections)
+
+        history = history or []
+        if token_budget is not None:
+            fixed = self.prefix_tokens + estimate_tokens(content) + MESSAGE_OVERHEAD
+            history = self.fit_history(history, token_budget - fixed)
+        messages = self._normalize(history)
+
+        if messages and messages[-1]["role"] == "user":
+            # An earlier turn got no reply - fold it into this one
+            messages[-1] = {"role": "user", "content": f"{messages[-1]['content']}\n\n{content}"}
+        else:
+            messages.append({"role": "user", "content": content})
+
+        return Prompt(self.prefix, messages)
+
+    @staticmethod
+    def fit_history(history: List[Dict[str, str]], token_budget: int) -> List[Dict[str, str]]:
+        """Most recent turns whose estimated tokens fit the budget, oldest first"""
+        used = 0
+        start = len(history)
+        while start > 0:
+            cost = estimate_message_tokens(history[start - 1])
+            if used + cost > token_budget:
+                break
+            used += cost
+            start -= 1
+        return history[start:]
+
+    @staticmethod
+    def _normalize(history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Make history valid for both providers
+
+        Anthropic requires the conversation to start with a user turn and
+        to alternate roles, so leading assistant turns are dropped and
+        consecutive turns with the same role are merged.
+        """
+        messages: List[Dict[str, str]] = []
+        for msg in history:
+            if not messages and msg["role"] != "user":
+                continue
+            if messages and messages[-1]["role"] == msg["role"]:
+                merged = f"{messages[-1]['content']}\n\n{msg['content']}"
+                messages[-1] = {"role": msg["role"], "content": merged}
+            else:
+                messages.append(msg)
+        return messages
@@ -0,0 +1,173 @@
+"""
+Chronyx Community Edition - Provider Budget
+Process-wide requests/tokens-per-minute limiter for LLM providers.
+"""
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+
+
+class BudgetTimeout(Exception):
+    """Provider capacity did not free up before the deadline"""
+    pass
+
+
+class Reservation:
+    """Capacity taken for one provider call"""
+
+    __slots__ = ("tokens", "actual_tokens")
+
+    def __init__(self, tokens: int):
+        self.tokens = tokens
+        self.actual_tokens: Optional[int] = None
+
+
+class ProviderBudget:
+    """
+    Keep a provider's request and token rates under its quota
+
+    Two continuously refilling buckets hold a minute's worth of requests
+    and tokens. A call reserves one request and its estimated tokens up
+    front, and the estimate is corrected with the provider's reported
+    usage afterwards (the token bucket may go into debt). Callers that
+    don't fit wait instead of failing, in FIFO order, up to a deadline.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize provider budget
+
+        Args:
+            requests_per_minute: Request quota (0 = unlimited)
+            tokens_per_minute: Token quota (0 = unlimited)
+            clock: Monotonic clock in seconds
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.clock = clock
+
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = clock()
+        self._lock: Optional[asyncio.Lock] = None
+
+        self.waits = 0
+        self.timeouts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.requests_per_minute or self.tokens_per_minute)
+
+    def _refill(self):
+        now = self.clock()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(
+                self.requests_per_minute,
+                self._requests + elapsed * self.requests_per_minute / 60
+            )
+        if self.tokens_per_minute:
+            self._tokens = min(
+                self.tokens_per_minute,
+                self._tokens + elapsed * self.tokens_per_minute / 60
+            )
+
+    def _wait_time(self, tokens: int) -> float:
+        """Seconds until one request and `tokens` tokens are available"""
+        wait = 0.0
+        if self.requests_per_minute and self._requests < 1:
+            wait = (1 - self._requests) * 60 / self.requests_per_minute
+        if self.tokens_per_minute and self._tokens < tokens:
+            wait = max(wait, (tokens - self._tokens) * 60 / self.tokens_per_minute)
+        return wait
+
+    async def acquire(self, estimated_tokens: int, timeout: Optional[float] = None) -> Reservation:
+        """
+        Wait for capacity and reserve it
+
+        Args:
+            estimated_tokens: Expected prompt plus completion tokens
+            timeout: Maximum seconds to wait (None = no deadline)
+
+        Returns:
+            Reservation to pass to `settle()` once usage is known
+
+        Raises:
+            BudgetTimeout: If capacity won't be available before the deadline
+        """
+        if self.tokens_per_minute:
+            # A single call can never need more than a full bucket
+            estimated_tokens = min(estimated_tokens, self.tokens_per_minute)
+        reservation = Reservation(estimated_tokens)
+        if not self.enabled:
+            return reservation
+
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        deadline = None if timeout is None else self.clock() + timeout
+
+        # asyncio.Lock wakes waiters in FIFO order, so callers are served fairly
+        try:
+            await asyncio.wait_for(self._lock.acquire(), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise BudgetTimeout("Provider budget exhausted - timed out waiting in queue")
+
+        try:
+            while True:
+                self._refill()
+                wait = self._wait_time(estimated_tokens)
+                if wait <= 0:
+                    break
+                if deadline is not None and self.clock() + wait > deadline:
+                    self.timeouts += 1
+                    raise BudgetTimeout(f"Provider budget exhausted - capacity in {wait:.1f}s")
+                self.waits += 1
+                await asyncio.sleep(wait)
+
+            if self.requests_per_minute:
+                self._requests -= 1
+            if self.tokens_per_minute:
+                self._tokens -= estimated_tokens
+        finally:
+            self._lock.release()
+
+        return reservation
+
+    def settle(self, reservation: Reservation):
+        """Correct the token bucket with the actual usage, when known"""
+        if not self.tokens_per_minute or reservation.actual_tokens is None:
+            return
+        self._refill()
+        self._tokens = min(
+            self.tokens_per_minute,
+            self._tokens + reservation.tokens - reservation.actual_tokens
+        )
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get budget levels and counters"""
+        self._refill()
+        return {
+            "requests_available": self._requests,
+            "tokens_available": self._tokens,
+            "waits": self.waits,
+            "timeouts": self.timeouts
+        }
+
+
+_budgets: Dict[str, ProviderBudget] = {}
+
+
+def get_provider_budget(provider: str, requests_per_minute: int = 0, tokens_per_minute: int = 0) -> ProviderBudget:
+    """Process-wide budget for a provider, shared by all agents"""
+    budget = _budgets.get(provider)
+    if budget is None:
+        budget = ProviderBudget(requests_per_minute, tokens_per_minute)
+        _budgets[provider] = budget
+    return budget
@@ -0,0 +1,244 @@
+"""
+Rate limit state backends
+"""
+import asyncio
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from config.settings import settings
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage for GCRA state (one theoretical arrival time per key)
+
+    `consume` must check and update a key atomically, so that concurrent
+    callers sharing the backend can never both take the last token.
+    """
+
+    # Clock the stored times are based on
+    clock: Callable[[], float]
+
+    @abstractmethod
+    def consume(self, key: str, now: float, emission_interval: float, tolerance: float) -> float:
+        """
+        Atomically take one request for a key
+
+        Args:
+            key: Rate limited identity
+            now: Current time from `clock`
+            emission_interval: Seconds between requests at the sustained rate
+            tolerance: How far the arrival time may run ahead of now
+
+        Returns:
+            0.0 if allowed, otherwise seconds until the next request is allowed
+        """
+
+    async def aconsume(self, key: str, now: float, emission_interval: float, tolerance: float) -> float:
+        """`consume` for callers on the event loop (in-memory backends run it inline)"""
+        return self.consume(key, now, emission_interval, tolerance)
+
+    @abstractmethod
+    def get_tat(self, key: str) -> Optional[float]:
+        """Stored theoretical arrival time for a key"""
+
+    @abstractmethod
+    def sweep(self, now: float) -> int:
+        """Remove idle keys (arrival time in the past) and return the count"""
+
+    @abstractmethod
+    def reset(self, key: Optional[str] = None):
+        """Forget one key, or every key"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of stored keys"""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Per-process in-memory state
+
+    Keys are kept in least-recently-updated order and expired ones are
+    swept from the front in small batches as requests come in.
+    """
+
+    # Every SWEEP_EVERY checks, up to SWEEP_BATCH expired keys are removed.
+    # A key is added at most once per check, so sweeping outpaces growth.
+    SWEEP_EVERY = 64
+    SWEEP_BATCH = 128
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._tat: "OrderedDict[str, float]" = OrderedDict()
+        self._checks = 0
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+    def consume(self, key: str, now: float, emission_interval: float, tolerance: float) -> float:
+        self._checks += 1
+        if self._checks % self.SWEEP_EVERY == 0:
+            self._sweep_front(now, self.SWEEP_BATCH)
+
+        tat = self._tat.get(key)
+        known = tat is not None
+        if not known or tat < now:
+            tat = now
+        new_tat = tat + emission_interval
+
+        if new_tat - now > tolerance:
+            return new_tat - tolerance - now
+
+        self._tat[key] = new_tat
+        if known:
+            self._tat.move_to_end(key)
+        return 0.0
+
+    def get_tat(self, key: str) -> Optional[float]:
+        return self._tat.get(key)
+
+    def _sweep_front(self, now: float, limit: Optional[int] = None) -> int:
+        """Drop up to `limit` least recently updated keys whose bucket is full"""
+        removed = 0
+        while self._tat and (limit is None or removed < limit):
+            key, tat = next(iter(self._tat.items()))
+            if tat > now:
+                break
+            del self._tat[key]
+            removed += 1
+        return removed
+
+    def sweep(self, now: float) -> int:
+        removed = self._sweep_front(now)
+        # Keys behind a still-active front key may also be idle
+        for key in [key for key, tat in self._tat.items() if tat <= now]:
+            del self._tat[key]
+            removed += 1
+        return removed
+
+    def reset(self, key: Optional[str] = None):
+        if key:
+            self._tat.pop(key, None)
+        else:
+            self._tat.clear()
+
+
+class SQLiteRateLimitBackend(RateLimitBackend):
+    """
+    State shared by every process on the host through a SQLite file
+
+    The database runs in WAL mode with synchronous=NORMAL, so a check is a
+    single local UPSERT without an fsync. The UPSERT only updates the row
+    when the request fits, which makes check-and-consume atomic across
+    processes. Times are wall-clock so state survives reboots.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        namespace: str = "",
+        sweep_interval: float = 60,
+        clock: Callable[[], float] = time.time
+    ):
+        """
+        Initialize SQLite backend
+
+        Args:
+            path: Database file (defaults to settings.rate_limit_db_path)
+            namespace: Prefix separating limiters that share the file
+            sweep_interval: Seconds between idle-key sweeps
+            clock: Wall clock in seconds
+        """
+        self.path = path or settings.rate_limit_db_path
+        self.prefix = f"{namespace}:" if namespace else ""
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(
+            self.path,
+            timeout=5,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_limits_tat ON rate_limits(tat)")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+    def consume(self, key: str, now: float, emission_interval: float, tolerance: float) -> float:
+        key = self.prefix + key
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            self.sweep(now)
+
+        with self._lock:
+            row = self._conn.execute(
+                "INSERT INTO rate_limits (key, tat) VALUES (?1, ?2 + ?3) "
+                "ON CONFLICT(key) DO UPDATE SET tat = max(tat, ?2) + ?3 "
+                "WHERE max(tat, ?2) + ?3 - ?2 <= ?4 "
+                "RETURNING tat",
+                (key, now, emission_interval, tolerance)
+            ).fetchone()
+            if row is not None:
+                return 0.0
+
+            row = self._conn.execute(
+                "SELECT tat FROM rate_limits WHERE key = ?", (key,)
+            ).fetchone()
+
+        tat = max(row[0], now) if row else now
+        return max(0.0, tat + emission_interval - tolerance - now)
+
+    async def aconsume(self, key: str, now: float, emission_interval: float, tolerance: float) -> float:
+        # Another process may hold the write lock, so keep the wait off the event loop
+        return await asyncio.to_thread(self.consume, key, now, emission_interval, tolerance)
+
+    def get_tat(self, key: str) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT tat FROM rate_limits WHERE key = ?", (self.prefix + key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def sweep(self, now: float) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM rate_limits WHERE tat <= ?", (now,)
+            ).rowcount
+
+    def reset(self, key: Optional[str] = None):
+        with self._lock:
+            if key:
+                self._conn.execute("DELETE FROM rate_limits WHERE key = ?", (self.prefix + key,))
+            elif self.prefix:
+                self._conn.execute(
+                    "DELETE FROM rate_limits WHERE substr(key, 1, ?) = ?",
+                    (len(self.prefix), self.prefix)
+                )
+            else:
+                self._conn.execute("DELETE FROM rate_limits")
+
+    def close(self):
+        """Close the database connection"""
+        self._conn.close()
+
+
+def create_rate_limit_backend(namespace: str = "") -> RateLimitBackend:
+    """Build the backend selected by settings.rate_limit_backend"""
+    if settings.rate_limit_backend == "sqlite":
+        return SQLiteRateLimitBackend(namespace=namespace)
+    return MemoryRateLimitBackend()
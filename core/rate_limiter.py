@@ -1,9 +1,9 @@
 """
 Rate limiting for API calls
 """
-import time
-from collections import deque
-from typing import Dict, Optional
+from typing import Callable, Optional
+
+from .rate_limit_backends import MemoryRateLimitBackend, RateLimitBackend
 
 
 class RateLimitExceeded(Exception):
@@ -12,13 +12,28 @@ class RateLimitExceeded(Exception):
 
 
 class RateLimiter:
-    """Simple token bucket rate limiter"""
+    """
+    Token bucket rate limiter (GCRA)
+
+    Implemented as the Generic Cell Rate Algorithm: each key stores a single
+    float, its theoretical arrival time (TAT). A request is allowed when
+    the TAT is no more than `burst_size` emission intervals ahead of now,
+    which is equivalent to a token bucket that refills one token every
+    `time_window / max_requests` seconds and holds `burst_size` tokens.
+
+    A key whose TAT is in the past has a full bucket, so dropping it loses
+    nothing; backends sweep such idle keys. State lives in a pluggable
+    backend - in process memory by default, or shared between worker
+    processes (see `core.rate_limit_backends`).
+    """
 
     def __init__(
         self,
         max_requests: int = 10,
         time_window: int = 60,
-        burst_size: Optional[int] = None
+        burst_size: Optional[int] = None,
+        clock: Optional[Callable[[], float]] = None,
+        backend: Optional[RateLimitBackend] = None
     ):
         """
         Initialize rate limiter
@@ -27,11 +42,22 @@ class RateLimiter:
             max_requests: Maximum requests allowed in time window
             time_window: Time window in seconds
             burst_size: Optional burst size (defaults to max_requests)
+            clock: Optional clock in seconds (defaults to the backend's)
+            backend: Optional state backend (defaults to in-memory)
         """
         self.max_requests = max_requests
         self.time_window = time_window
         self.burst_size = burst_size or max_requests
-        self.requests: Dict[str, deque] = {}
+        self.backend = backend if backend is not None else MemoryRateLimitBackend()
+        self.clock = clock or self.backend.clock
+
+        # Seconds between requests at the sustained rate
+        self.emission_interval = time_window / max_requests
+        # How far the TAT may run ahead of now
+        self.tolerance = self.emission_interval * self.burst_size
+
+    def __len__(self) -> int:
+        return len(self.backend)
 
     def check_rate_limit(self, user_id: str = "default") -> bool:
         """
@@ -46,31 +72,36 @@ class RateLimiter:
         Raises:
             RateLimitExceeded: If rate limit is exceeded
         """
-        current_time = time.time()
-
-        # Initialize if first request
-        if user_id not in self.requests:
-            self.requests[user_id] = deque()
-
-        # Remove old requests outside time window
-        while (
-            self.requests[user_id]
-            and current_time - self.requests[user_id][0] > self.time_window
-        ):
-            self.requests[user_id].popleft()
-
-        # Check if limit exceeded
-        if len(self.requests[user_id]) >= self.max_requests:
-            oldest_request = self.requests[user_id][0]
-            wait_time = self.time_window - (current_time - oldest_request)
-            raise RateLimitExceeded(
-                f"Rate limit exceeded. Try again in {int(wait_time)} seconds"
-            )
+        wait_time = self.backend.consume(
+            user_id, self.clock(), self.emission_interval, self.tolerance
+        )
+        self._raise_if_limited(wait_time)
+        return True
+
+    async def check_rate_limit_async(self, user_id: str = "default") -> bool:
+        """
+        Check if request is allowed, without blocking the event loop
+
+        Same as `check_rate_limit`, but backends that do I/O (SQLite) run
+        the check in a worker thread.
 
-        # Add current request
-        self.requests[user_id].append(current_time)
+        Raises:
+            RateLimitExceeded: If rate limit is exceeded
+        """
+        wait_time = await self.backend.aconsume(
+            user_id, self.clock(), self.emission_interval, self.tolerance
+        )
+        self._raise_if_limited(wait_time)
         return True
 
+    @staticmethod
+    def _raise_if_limited(wait_time: float):
+        """Raise RateLimitExceeded when the backend asked the caller to wait"""
+        if wait_time > 0:
+            raise RateLimitExceeded(
+                f"Rate limit exceeded. Try again in {max(1, int(wait_time + 0.999))} seconds"
+            )
+
     def get_remaining_requests(self, user_id: str = "default") -> int:
         """
         Get remaining requests for user
@@ -81,19 +112,18 @@ class RateLimiter:
         Returns:
             Number of remaining requests
         """
-        if user_id not in self.requests:
-            return self.max_requests
-
-        current_time = time.time()
+        now = self.clock()
+        tat = max(self.backend.get_tat(user_id) or now, now)
+        return max(0, int((self.tolerance - (tat - now)) / self.emission_interval + 1e-9))
 
-        # Clean old requests
-        while (
-            self.requests[user_id]
-            and current_time - self.requests[user_id][0] > self.time_window
-        ):
-            self.requests[user_id].popleft()
+    def sweep(self) -> int:
+        """
+        Remove all idle keys
 
-        return max(0, self.max_requests - len(self.requests[user_id]))
+        Returns:
+            Number of removed keys
+        """
+        return self.backend.sweep(self.clock())
 
     def reset(self, user_id: Optional[str] = None):
         """
@@ -102,8 +132,4 @@ class RateLimiter:
         Args:
             user_id: Optional user ID to reset. If None, reset all.
         """
-        if user_id:
-            if user_id in self.requests:
-                del self.requests[user_id]
-        else:
-            self.requests.clear()
+        self.backend.reset(user_id)
@@ -0,0 +1,141 @@
+"""
+Chronyx Community Edition - Provider Resilience
+Retry classification, backoff and per-provider circuit breaking.
+"""
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+import openai
+import anthropic
+
+# Transient HTTP statuses worth retrying (529 = Anthropic "overloaded")
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+
+class ProviderUnavailable(Exception):
+    """All configured providers failed or are circuit-broken"""
+    pass
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a provider error is transient"""
+    if isinstance(error, (openai.APIConnectionError, anthropic.APIConnectionError, asyncio.TimeoutError)):
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """
+    Seconds the provider asked us to wait, from Retry-After headers
+
+    Args:
+        error: Provider API error
+
+    Returns:
+        Delay in seconds, or None if the error carries no hint
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 8.0) -> float:
+    """Exponential backoff with full jitter for a 0-based retry attempt"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Stop calling a provider that keeps failing
+
+    After `failure_threshold` consecutive transient failures the circuit
+    opens and calls are skipped for `reset_timeout` seconds. Then a single
+    trial call is let through (half-open): success closes the circuit,
+    failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        """
+        Initialize circuit breaker
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds before a trial call is allowed
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+
+    def allow(self) -> bool:
+        """Whether a call may be made now"""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        # A trial that never reported back (e.g. cancelled) expires
+        now = time.monotonic()
+        if self._trial_in_flight and now - self._trial_started < self.reset_timeout:
+            return False
+        self._trial_in_flight = True
+        self._trial_started = now
+        return True
+
+    def record_success(self):
+        """Record a successful call"""
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        """Record a transient failure"""
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(provider: str, failure_threshold: int = 5, reset_timeout: float = 30) -> CircuitBreaker:
+    """Process-wide circuit breaker for a provider, shared by all agents"""
+    breaker = _breakers.get(provider)
+    if breaker is None:
+        breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        _breakers[provider] = breaker
+    return breaker
@@ -0,0 +1,128 @@
+"""
+Chronyx Community Edition - Response Cache
+LRU + TTL cache for stateless, FAQ-style agent replies.
+"""
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = " ?!.,;:…"
+
+CacheKey = Tuple[str, int, bool, str]
+
+
+def normalize_message(message: str) -> str:
+    """Normalize case, whitespace and trailing punctuation"""
+    return _WHITESPACE.sub(" ", message.casefold()).strip(_TRAILING_PUNCTUATION)
+
+
+class ResponseCache:
+    """
+    Cache agent responses by normalized question
+
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted once `max_entries` or `max_bytes` is exceeded. One cache can be
+    shared by several agents - the agent identity is part of the key.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl: float = 3600,
+        max_bytes: int = 10 * 1024 * 1024
+    ):
+        """
+        Initialize response cache
+
+        Args:
+            max_entries: Maximum cached responses
+            ttl: Seconds a response stays valid
+            max_bytes: Approximate memory cap for keys and responses
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, Tuple[str, float, int]]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(
+        message: str,
+        agent_id: str,
+        knowledge_version: int,
+        with_history: bool = False
+    ) -> CacheKey:
+        """
+        Build a cache key
+
+        Args:
+            message: User message
+            agent_id: Identity of the answering agent (name, model, prompt)
+            knowledge_version: Knowledge base version the answer is based on
+            with_history: Whether the answer depended on conversation history
+        """
+        return (agent_id, knowledge_version, with_history, normalize_message(message))
+
+    def get(self, key: CacheKey) -> Optional[str]:
+        """Get a cached response, or None on miss or expiry"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        response, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return response
+
+    def set(self, key: CacheKey, response: str):
+        """Cache a response"""
+        if key in self._entries:
+            self._remove(key)
+
+        size = len(key[0]) + len(key[3]) + len(response)
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = (response, time.monotonic() + self.ttl, size)
+        self._bytes += size
+
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: CacheKey):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        """Remove all cached responses"""
+        self._entries.clear()
+        self._bytes = 0
+
+    def get_stats(self) -> Dict[str, float]:
+        """Get cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -1,18 +1,39 @@
 """
 Chronyx Community Edition - Single Agent Implementation
 """
-from typing import Dict, Optional
+from contextlib import aclosing
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional, Tuple
+import asyncio
 import logging
-from openai import AsyncOpenAI
-from anthropic import AsyncAnthropic
 
 from .agent_base import BaseAgent
 from .validators import InputValidator, ValidationError
 from .rate_limiter import RateLimiter, RateLimitExceeded
+from .rate_limit_backends import create_rate_limit_backend
+from .prompt_builder import Prompt, PromptBuilder
+from .knowledge_index import KnowledgeIndex
+from .tokens import estimate_tokens
+from .response_cache import CacheKey, ResponseCache
+from .client_pool import client_registry
+from .hedging import Hedger
+from .single_flight import FlightAborted, SingleFlight
+from .summarizer import ConversationSummarizer
+from .provider_budget import BudgetTimeout, ProviderBudget, Reservation, get_provider_budget
+from .resilience import (
+    ProviderUnavailable,
+    backoff_delay,
+    get_circuit_breaker,
+    is_retryable,
+    retry_after,
+)
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+ERROR_RESPONSE = "I apologize, but I encountered an error processing your message. Please try again."
+ANTHROPIC_DEFAULT_MODEL = "claude-3-haiku-20240307"
+
 
 class SingleAgent(BaseAgent):
     """Single agent implementation for Community Edition"""
@@ -24,31 +45,163 @@ class SingleAgent(BaseAgent):
         system_prompt: str,
         knowledge_base: Optional[Dict] = None,
         max_requests_per_minute: int = 10,
+        response_cache: Optional[ResponseCache] = None,
         **kwargs
     ):
         super().__init__(name, description, system_prompt, **kwargs)
+        self.prompt_builder = PromptBuilder(system_prompt)
+        self.knowledge_index = KnowledgeIndex()
+        self.knowledge_version = 0
         self.knowledge_base = knowledge_base or {}
 
+        # Optional cache for stateless (first-message, no context) replies
+        if response_cache is None and settings.response_cache_enabled:
+            response_cache = ResponseCache(
+                max_entries=settings.response_cache_max_entries,
+                ttl=settings.response_cache_ttl,
+                max_bytes=settings.response_cache_max_bytes
+            )
+        self.response_cache = response_cache
+        # Identical stateless requests in flight share one provider call
+        self.single_flight = SingleFlight() if settings.coalesce_requests else None
+        self.agent_id = f"{name}:{self.model}:{hash(system_prompt):x}"
+
         # Initialize validators and rate limiter
         self.validator = InputValidator()
         self.rate_limiter = RateLimiter(
             max_requests=max_requests_per_minute,
-            time_window=60
+            time_window=60,
+            backend=create_rate_limit_backend(namespace=name)
         )
 
-        # Initialize AI client
+        # Get shared AI clients; the first configured provider is primary
+        self.clients: Dict[str, Any] = {}
         if settings.openai_api_key:
-            client_kwargs = {"api_key": settings.openai_api_key}
-            if settings.openai_base_url:
-                client_kwargs["base_url"] = settings.openai_base_url
-            self.client = AsyncOpenAI(**client_kwargs)
-            self.provider = "openai"
-        elif settings.anthropic_api_key:
-            self.client = AsyncAnthropic(api_key=settings.anthropic_api_key)
-            self.provider = "anthropic"
-        else:
+            self.clients["openai"] = client_registry.get(
+                "openai", settings.openai_api_key, settings.openai_base_url
+            )
+        if settings.anthropic_api_key:
+            self.clients["anthropic"] = client_registry.get("anthropic", settings.anthropic_api_key)
+        if not self.clients:
             raise ValueError("No AI provider API key configured")
-    
+
+        self.provider = next(iter(self.clients))
+        self.client = self.clients[self.provider]
+        self.targets = self._build_targets()
+
+        # Optional hedging of slow calls to cut tail latency
+        self.hedger = (
+            Hedger(
+                percentile=settings.hedge_percentile,
+                min_delay=settings.hedge_min_delay,
+                max_hedge_rate=settings.hedge_max_rate
+            )
+            if settings.hedge_enabled else None
+        )
+
+        # Older turns of long conversations are compacted in the background
+        self.summarizer = (
+            ConversationSummarizer(
+                self.memory,
+                self._summarize,
+                trigger=settings.summary_trigger,
+                keep_recent=settings.summary_keep_recent
+            )
+            if settings.summary_enabled else None
+        )
+
+    @property
+    def knowledge_base(self) -> Mapping:
+        """
+        Knowledge base entries, read-only
+
+        Assign a new dict or call update_knowledge_base() to change them, so
+        the search index and cached prompt prefix are rebuilt.
+        """
+        return MappingProxyType(self._knowledge_base)
+
+    @knowledge_base.setter
+    def knowledge_base(self, value: Mapping):
+        # Our own copy, so changes to the caller's dict can't bypass the rebuild
+        value = dict(value)
+        self._knowledge_base = value
+        self.knowledge_version += 1
+        self.knowledge_index.build(value)
+
+        # Small knowledge bases stay in the cached prefix; large ones are
+        # retrieved per message instead
+        self._retrieve_knowledge = (
+            self.knowledge_index.total_tokens > settings.knowledge_token_budget
+        )
+        self.prompt_builder.set_knowledge_base({} if self._retrieve_knowledge else value)
+
+    def update_knowledge_base(self, entries: Dict):
+        """Add or replace knowledge base entries"""
+        self.knowledge_base = {**self._knowledge_base, **entries}
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Get counters of the agent's caching and latency components"""
+        stats = {}
+        if self.response_cache is not None:
+            stats["response_cache"] = self.response_cache.get_stats()
+        if self.single_flight is not None:
+            stats["single_flight"] = self.single_flight.get_stats()
+        if self.hedger is not None:
+            stats["hedging"] = self.hedger.get_stats()
+        if self.summarizer is not None:
+            stats["summarizer"] = self.summarizer.get_stats()
+        for provider in self.clients:
+            budget = self._budget(provider)
+            if budget.enabled:
+                stats[f"{provider}_budget"] = budget.get_stats()
+        return stats
+
+    async def _prepare_message(
+        self,
+        message: str,
+        context: Optional[Dict],
+        user_id: str
+    ) -> Tuple[str, Optional[Dict]]:
+        """Validate, rate limit and sanitize an incoming message"""
+        # Validate input
+        message = self.validator.validate_message(message)
+        context = self.validator.validate_context(context)
+
+        # Check rate limit
+        await self.rate_limiter.check_rate_limit_async(user_id)
+
+        # Sanitize message to prevent prompt injection
+        return self.validator.sanitize_for_prompt(message), context
+
+    def _shared_key(
+        self,
+        message: str,
+        context: Optional[Dict],
+        user_id: str
+    ) -> Optional[CacheKey]:
+        """
+        Key under which this turn's reply can be shared, or None
+
+        Only stateless turns qualify: no per-turn context and no earlier
+        messages from this user. Their replies may be cached and identical
+        ones in flight are coalesced. Call before the message is added to
+        history.
+        """
+        if (self.response_cache is None and self.single_flight is None) or context:
+            return None
+        with_history = self.memory.message_count(user_id) > 0
+        if with_history:
+            return None
+        return ResponseCache.make_key(
+            message, self.agent_id, self.knowledge_version, with_history
+        )
+
+    def _cached_response(self, key: Optional[CacheKey]) -> Optional[str]:
+        """Look up a shared key in the response cache"""
+        if key is None or self.response_cache is None:
+            return None
+        return self.response_cache.get(key)
+
     async def process_message(
         self,
         message: str,
@@ -57,27 +210,38 @@ class SingleAgent(BaseAgent):
     ) -> str:
         """Process message and generate response"""
         try:
-            # Validate input
-            message = self.validator.validate_message(message)
-            context = self.validator.validate_context(context)
+            safe_message, context = await self._prepare_message(message, context, user_id)
+
+            # Serialize turns per user so concurrent messages don't interleave
+            async with self.memory.lock(user_id):
+                # Restore persisted history after a restart or eviction
+                await self.memory.load(user_id)
 
-            # Check rate limit
-            self.rate_limiter.check_rate_limit(user_id)
+                shared_key = self._shared_key(safe_message, context, user_id)
+                response = self._cached_response(shared_key)
 
-            # Sanitize message to prevent prompt injection
-            safe_message = self.validator.sanitize_for_prompt(message)
+                # Add user message to history
+                self.add_to_history("user", safe_message, user_id)
 
-            # Add user message to history
-            self.add_to_history("user", safe_message)
+                if response is None:
+                    # Build prompt
+                    prompt = self._build_prompt(safe_message, context, user_id)
 
-            # Build context
-            enhanced_prompt = self._build_enhanced_prompt(safe_message, context)
+                    # Get response from AI, sharing identical calls in flight
+                    if shared_key and self.single_flight is not None:
+                        response = await self.single_flight.do(
+                            shared_key, lambda: self._get_ai_response(prompt)
+                        )
+                    else:
+                        response = await self._get_ai_response(prompt)
 
-            # Get response from AI
-            response = await self._get_ai_response(enhanced_prompt)
+                    if shared_key and self.response_cache is not None:
+                        self.response_cache.set(shared_key, response)
 
-            # Add assistant response to history
-            self.add_to_history("assistant", response)
+                # Add assistant response to history
+                self.add_to_history("assistant", response, user_id)
+                if self.summarizer is not None:
+                    self.summarizer.schedule(user_id)
 
             return response
 
@@ -91,61 +255,419 @@ class SingleAgent(BaseAgent):
 
         except Exception as e:
             logger.error(f"Error processing message: {e}")
-            return f"I apologize, but I encountered an error processing your message. Please try again."
-    
-    def _build_enhanced_prompt(self, message: str, context: Optional[Dict] = None) -> str:
-        """Build enhanced prompt with knowledge base and context"""
-        prompt_parts = [self.system_prompt]
-        
-        # Add knowledge base context
-        if self.knowledge_base:
-            kb_context = "\n\n=== KNOWLEDGE BASE ===\n"
-            for key, value in self.knowledge_base.items():
-                kb_context += f"\n{key}: {value}"
-            prompt_parts.append(kb_context)
-        
-        # Add additional context
-        if context:
-            ctx_str = "\n\n=== CONTEXT ===\n"
-            for key, value in context.items():
-                ctx_str += f"\n{key}: {value}"
-            prompt_parts.append(ctx_str)
-        
-        # Add conversation history
-        history = self.get_context_window(limit=5)
-        if history:
-            hist_str = "\n\n=== RECENT CONVERSATION ===\n"
-            for msg in history[:-1]:  # Exclude current message
-                hist_str += f"\n{msg['role'].upper()}: {msg['content']}"
-            prompt_parts.append(hist_str)
-        
-        prompt_parts.append(f"\n\n=== CURRENT MESSAGE ===\nUSER: {message}")
-        
-        return "\n".join(prompt_parts)
-    
-    async def _get_ai_response(self, prompt: str) -> str:
+            return ERROR_RESPONSE
+
+    async def stream_message(
+        self,
+        message: str,
+        context: Optional[Dict] = None,
+        user_id: str = "default"
+    ) -> AsyncIterator[str]:
+        """
+        Process message and yield the response as text deltas
+
+        The full response is recorded in history once the stream ends.
+        """
+        try:
+            safe_message, context = await self._prepare_message(message, context, user_id)
+        except ValidationError as e:
+            logger.warning(f"Validation error: {e}")
+            yield f"Invalid input: {str(e)}"
+            return
+        except RateLimitExceeded as e:
+            logger.warning(f"Rate limit exceeded for user {user_id}")
+            yield str(e)
+            return
+
+        async with self.memory.lock(user_id):
+            parts: List[str] = []
+            try:
+                await self.memory.load(user_id)
+                shared_key = self._shared_key(safe_message, context, user_id)
+                cached = self._cached_response(shared_key)
+                coalesce = shared_key is not None and self.single_flight is not None
+                if cached is None and coalesce:
+                    cached = await self.single_flight.wait(shared_key)
+                self.add_to_history("user", safe_message, user_id)
+
+                if cached is not None:
+                    parts.append(cached)
+                    yield cached
+                else:
+                    prompt = self._build_prompt(safe_message, context, user_id)
+                    if coalesce:
+                        self.single_flight.lead(shared_key)
+
+                    completed = False
+                    try:
+                        # Closed right away if our consumer stops early
+                        async with aclosing(self._stream_ai_response(prompt)) as deltas:
+                            async for delta in deltas:
+                                parts.append(delta)
+                                yield delta
+                        completed = True
+                    finally:
+                        if coalesce:
+                            if completed:
+                                self.single_flight.finish(shared_key, result="".join(parts).strip())
+                            else:
+                                # Waiters fall back to their own call
+                                self.single_flight.finish(shared_key, error=FlightAborted())
+
+                    if shared_key and self.response_cache is not None:
+                        self.response_cache.set(shared_key, "".join(parts).strip())
+
+            except Exception as e:
+                logger.error(f"Error streaming message: {e}")
+                if not parts:
+                    yield ERROR_RESPONSE
+                    return
+
+            # Keep whatever was delivered, even if the stream broke off
+            response = "".join(parts).strip()
+            if response:
+                self.add_to_history("assistant", response, user_id)
+                if self.summarizer is not None:
+                    self.summarizer.schedule(user_id)
+
+    async def close(self):
+        """Finish background summaries, then flush history"""
+        if self.summarizer is not None:
+            await self.summarizer.close()
+        await super().close()
+
+    def _build_prompt(
+        self,
+        message: str,
+        context: Optional[Dict] = None,
+        user_id: str = "default"
+    ) -> Prompt:
+        """
+        Build prompt with knowledge base, context and recent history
+
+        The prompt is filled up to settings.max_input_tokens by priority:
+        system prompt, current message and context, relevant knowledge
+        base entries, then history from the most recent turn backwards.
+        Turns already folded into the conversation summary are replaced by
+        the summary; every other turn is offered, so none falls between the
+        summary and the window. Without summaries, at most
+        settings.context_window_size messages are sent.
+        """
+        budget = settings.max_input_tokens
+        summary = self.memory.summary(user_id)
+        limit = (
+            settings.max_conversation_history if self.summarizer is not None
+            else settings.context_window_size
+        )
+        history = self.memory.context_window(
+            user_id,
+            limit=limit + 1,
+            unsummarized_only=True
+        )[:-1]  # Exclude current message
+
+        knowledge = None
+        if self._retrieve_knowledge:
+            available = (
+                budget - self.prompt_builder.prefix_tokens
+                - estimate_tokens(message) - estimate_tokens(summary)
+            )
+            knowledge = self.knowledge_index.search(
+                message,
+                top_k=settings.knowledge_top_k,
+                token_budget=max(0, min(settings.knowledge_token_budget, available))
+            )
+
+        return self.prompt_builder.build(
+            message,
+            history=history,
+            context=context,
+            knowledge=knowledge,
+            token_budget=budget,
+            summary=summary
+        )
+
+    @staticmethod
+    def _resolve_model(provider: str, model: str) -> Optional[str]:
+        """Model name to use on a provider (None if it can't serve it)"""
+        if provider == "anthropic":
+            return model if "claude" in model else ANTHROPIC_DEFAULT_MODEL
+        return None if "claude" in model else model
+
+    def _build_targets(self) -> List[Tuple[str, str]]:
+        """
+        Provider/model pairs to try, in order
+
+        Primary model, then settings.fallback_model on the same provider,
+        then the other provider when both API keys are configured.
+        """
+        candidates = [(self.provider, self.model), (self.provider, settings.fallback_model)]
+        for provider in self.clients:
+            if provider != self.provider:
+                candidates.append((provider, self.model))
+                candidates.append((provider, settings.fallback_model))
+
+        targets: List[Tuple[str, str]] = []
+        for provider, model in candidates:
+            model = self._resolve_model(provider, model)
+            if model and (provider, model) not in targets:
+                targets.append((provider, model))
+        return targets
+
+    async def _call_with_failover(
+        self,
+        call: Callable[[str, str], Awaitable[Any]],
+        targets: Optional[List[Tuple[str, str]]] = None
+    ) -> Any:
+        """
+        Run a provider call with retries, failover and circuit breaking
+
+        Transient errors (429/5xx, timeouts, connection errors) are retried
+        up to settings.max_retries times per target, waiting for Retry-After
+        when the provider sends it and exponential backoff with jitter
+        otherwise. When a target is exhausted, or its circuit is open, the
+        next target is tried.
+
+        Args:
+            call: Async callable taking (provider, model)
+            targets: Provider/model pairs to try (defaults to self.targets)
+
+        Raises:
+            ProviderUnavailable: If every target failed
+        """
+        last_error: Optional[Exception] = None
+        targets = targets or self.targets
+
+        for provider, model in targets:
+            breaker = get_circuit_breaker(
+                provider,
+                settings.circuit_failure_threshold,
+                settings.circuit_reset_timeout
+            )
+
+            for attempt in range(settings.max_retries + 1):
+                if not breaker.allow():
+                    logger.warning(f"Circuit open for {provider}, skipping {model}")
+                    break
+
+                try:
+                    result = await call(provider, model)
+                except BudgetTimeout as e:
+                    # Our own quota is used up - another target may have room
+                    last_error = e
+                    logger.warning(f"{provider}/{model} skipped: {e}")
+                    break
+                except Exception as e:
+                    last_error = e
+                    if not is_retryable(e):
+                        # The provider answered - the request itself was rejected
+                        breaker.record_success()
+                        logger.error(f"{provider}/{model} rejected request: {e}")
+                        break
+
+                    breaker.record_failure()
+                    delay = retry_after(e)
+                    if delay is None:
+                        delay = backoff_delay(
+                            attempt, settings.retry_base_delay, settings.retry_max_delay
+                        )
+                    if attempt == settings.max_retries or delay > settings.retry_after_max:
+                        logger.warning(f"{provider}/{model} failed: {e}")
+                        break
+
+                    logger.warning(f"{provider}/{model} failed ({e}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+
+                breaker.record_success()
+                if (provider, model) != targets[0]:
+                    logger.info(f"Response served by fallback {provider}/{model}")
+                return result
+
+        raise ProviderUnavailable("All AI providers failed") from last_error
+
+    @staticmethod
+    def _budget(provider: str) -> ProviderBudget:
+        """Process-wide request/token budget for a provider"""
+        if provider == "openai":
+            return get_provider_budget(
+                provider,
+                settings.openai_requests_per_minute,
+                settings.openai_tokens_per_minute
+            )
+        return get_provider_budget(
+            provider,
+            settings.anthropic_requests_per_minute,
+            settings.anthropic_tokens_per_minute
+        )
+
+    async def _reserve(self, provider: str, prompt: Prompt, max_tokens: Optional[int] = None) -> Reservation:
+        """Wait until the provider's quota has room for this prompt"""
+        return await self._budget(provider).acquire(
+            prompt.estimate_tokens() + (max_tokens or self.max_tokens),
+            timeout=settings.provider_budget_timeout
+        )
+
+    async def _request(
+        self,
+        provider: str,
+        model: str,
+        prompt: Prompt,
+        max_tokens: Optional[int] = None
+    ) -> str:
+        """Get a full response from one provider/model"""
+        max_tokens = max_tokens or self.max_tokens
+        reservation = await self._reserve(provider, prompt, max_tokens)
+        try:
+            if provider == "openai":
+                return await self._get_openai_response(prompt, model, reservation, max_tokens)
+            return await self._get_anthropic_response(prompt, model, reservation, max_tokens)
+        finally:
+            self._budget(provider).settle(reservation)
+
+    async def _stream_request(self, provider: str, model: str, prompt: Prompt) -> AsyncIterator[str]:
+        """Stream a response from one provider/model"""
+        reservation = await self._reserve(provider, prompt)
+        try:
+            if provider == "openai":
+                stream = self._stream_openai_response(prompt, model, reservation)
+            else:
+                stream = self._stream_anthropic_response(prompt, model, reservation)
+            async for delta in stream:
+                yield delta
+        finally:
+            self._budget(provider).settle(reservation)
+
+    async def _get_ai_response(self, prompt: Prompt) -> str:
         """Get response from AI provider"""
-        if self.provider == "openai":
-            return await self._get_openai_response(prompt)
-        elif self.provider == "anthropic":
-            return await self._get_anthropic_response(prompt)
-    
-    async def _get_openai_response(self, prompt: str) -> str:
+        def call(provider: str, model: str) -> Awaitable[str]:
+            return self._request(provider, model, prompt)
+
+        if self.hedger is None:
+            return await self._call_with_failover(call)
+
+        # The hedge goes to the next target when one exists
+        hedge_targets = self.targets
+        if settings.hedge_use_alternate and len(self.targets) > 1:
+            hedge_targets = self.targets[1:] + self.targets[:1]
+
+        return await self.hedger.run(
+            lambda: self._call_with_failover(call),
+            lambda: self._call_with_failover(call, hedge_targets)
+        )
+
+    async def _summarize(self, prompt: Prompt) -> str:
+        """Run a summary prompt on settings.summary_model"""
+        targets = []
+        for provider in self.clients:
+            model = self._resolve_model(provider, settings.summary_model)
+            if model:
+                targets.append((provider, model))
+
+        return await self._call_with_failover(
+            lambda provider, model: self._request(
+                provider, model, prompt, max_tokens=settings.summary_max_tokens
+            ),
+            targets
+        )
+
+    async def _stream_ai_response(self, prompt: Prompt) -> AsyncIterator[str]:
+        """
+        Stream response text deltas from AI provider
+
+        Retries and failover apply until the first delta arrives; after
+        that, errors end the stream.
+        """
+        async def start(provider: str, model: str) -> Tuple[str, AsyncIterator[str]]:
+            stream = self._stream_request(provider, model, prompt)
+            try:
+                first = await stream.__anext__()
+            except StopAsyncIteration:
+                first = ""
+            return first, stream
+
+        first, stream = await self._call_with_failover(start)
+        # Settles the budget reservation even if the consumer stops early
+        async with aclosing(stream):
+            if first:
+                yield first
+            async for delta in stream:
+                yield delta
+
+    async def _get_openai_response(
+        self,
+        prompt: Prompt,
+        model: str,
+        reservation: Optional[Reservation] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
         """Get response from OpenAI"""
-        response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
+        response = await self.clients["openai"].chat.completions.create(
+            model=model,
+            messages=prompt.to_openai(),
             temperature=self.temperature,
-            max_tokens=self.max_tokens
+            max_tokens=max_tokens or self.max_tokens
         )
+        if reservation is not None and response.usage:
+            reservation.actual_tokens = response.usage.total_tokens
         return response.choices[0].message.content.strip()
-    
-    async def _get_anthropic_response(self, prompt: str) -> str:
+
+    async def _get_anthropic_response(
+        self,
+        prompt: Prompt,
+        model: str,
+        reservation: Optional[Reservation] = None,
+        max_tokens: Optional[int] = None
+    ) -> str:
         """Get response from Anthropic Claude"""
-        response = await self.client.messages.create(
-            model=self.model if "claude" in self.model else "claude-3-haiku-20240307",
-            max_tokens=self.max_tokens,
+        response = await self.clients["anthropic"].messages.create(
+            model=model,
+            max_tokens=max_tokens or self.max_tokens,
             temperature=self.temperature,
-            messages=[{"role": "user", "content": prompt}]
+            system=prompt.to_anthropic_system(),
+            messages=prompt.messages
         )
+        if reservation is not None:
+            reservation.actual_tokens = response.usage.input_tokens + response.usage.output_tokens
         return response.content[0].text.strip()
+
+    async def _stream_openai_response(
+        self,
+        prompt: Prompt,
+        model: str,
+        reservation: Optional[Reservation] = None
+    ) -> AsyncIterator[str]:
+        """Stream response from OpenAI"""
+        stream = await self.clients["openai"].chat.completions.create(
+            model=model,
+            messages=prompt.to_openai(),
+            temperature=self.temperature,
+            max_tokens=self.max_tokens,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            # Usage arrives on a final chunk without choices
+            if reservation is not None and chunk.usage:
+                reservation.actual_tokens = chunk.usage.total_tokens
+
+    async def _stream_anthropic_response(
+        self,
+        prompt: Prompt,
+        model: str,
+        reservation: Optional[Reservation] = None
+    ) -> AsyncIterator[str]:
+        """Stream response from Anthropic Claude"""
+        async with self.clients["anthropic"].messages.stream(
+            model=model,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature,
+            system=prompt.to_anthropic_system(),
+            messages=prompt.messages
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+            if reservation is not None:
+                usage = (await stream.get_final_message()).usage
+                reservation.actual_tokens = usage.input_tokens + usage.output_tokens
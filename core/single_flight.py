@@ -0,0 +1,102 @@
+"""
+Chronyx Community Edition - Single-Flight Request Coalescing
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class FlightAborted(Exception):
+    """The leading call was cancelled before producing a result"""
+    pass
+
+
+def _consume(future: asyncio.Future):
+    # Mark the outcome as retrieved even if nobody was waiting for it
+    if not future.cancelled():
+        future.exception()
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls
+
+    The first caller for a key (the leader) makes the real call; callers
+    that arrive with the same key while it is in flight wait for the
+    leader's result instead of issuing a duplicate. If the leader is
+    cancelled, waiters get None and should make their own call.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._flights
+
+    def lead(self, key: Hashable):
+        """Register the caller as leader for `key`"""
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_consume)
+        self._flights[key] = future
+        self.leaders += 1
+
+    def finish(self, key: Hashable, result: Any = None, error: Optional[BaseException] = None):
+        """Publish the leader's result (or error) to waiters"""
+        future = self._flights.pop(key, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    async def wait(self, key: Hashable) -> Optional[Any]:
+        """
+        Wait for an in-flight call with the same key
+
+        Returns:
+            The leader's result, or None if there is no call in flight (or
+            the leader was aborted) - the caller should then `lead()`
+            without awaiting anything in between
+
+        Raises:
+            The leader's exception if its call failed
+        """
+        counted = False
+        while key in self._flights:
+            if not counted:
+                self.coalesced += 1
+                counted = True
+            try:
+                return await asyncio.shield(self._flights[key])
+            except FlightAborted:
+                # Another waiter may already have taken over as leader
+                continue
+        return None
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `fn`, or share the result of an identical call in flight"""
+        result = await self.wait(key)
+        if result is not None:
+            return result
+
+        self.lead(key)
+        try:
+            result = await fn()
+        except Exception as e:
+            self.finish(key, error=e)
+            raise
+        except BaseException:
+            self.finish(key, error=FlightAborted())
+            raise
+        self.finish(key, result=result)
+        return result
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get coalescing counters"""
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced
+        }
@@ -0,0 +1,52 @@
+"""
+Chronyx Community Edition - Streaming helpers
+"""
+import re
+from typing import AsyncIterator
+
+# End of a sentence (followed by whitespace) or a line break
+_BOUNDARY = re.compile(r'(?<=[.!?…:;])\s+|\n+')
+
+
+async def chunk_sentences(
+    deltas: AsyncIterator[str],
+    min_chars: int = 40,
+    max_chars: int = 600
+) -> AsyncIterator[str]:
+    """
+    Regroup streamed text deltas into sentence-sized chunks
+
+    A chunk is emitted as soon as the buffered text ends in a sentence or
+    line boundary and is at least `min_chars` long. Text without any
+    boundary is split at the last space once it exceeds `max_chars`.
+
+    Args:
+        deltas: Async iterator of text fragments
+        min_chars: Minimum chunk length (avoids one-word messages)
+        max_chars: Maximum chunk length
+
+    Yields:
+        Stripped, non-empty text chunks
+    """
+    buffer = ""
+    async for delta in deltas:
+        buffer += delta
+
+        while True:
+            cut = 0
+            for match in _BOUNDARY.finditer(buffer):
+                if match.start() >= min_chars:
+                    cut = match.end()
+                    break
+            if not cut and len(buffer) > max_chars:
+                cut = buffer.rfind(" ", 0, max_chars) + 1 or max_chars
+            if not cut:
+                break
+
+            chunk, buffer = buffer[:cut].strip(), buffer[cut:]
+            if chunk:
+                yield chunk
+
+    tail = buffer.strip()
+    if tail:
+        yield tail
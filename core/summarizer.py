@@ -0,0 +1,110 @@
+"""
+Chronyx Community Edition - Conversation Summarizer
+Compacts older turns of long conversations into a rolling summary.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List
+
+from .conversation_store import ConversationStore
+from .prompt_builder import Prompt
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a customer conversation for the "
+    "assistant handling it. Merge the previous summary with the new messages "
+    "into one short summary. Keep every fact the assistant will need later: "
+    "the customer's name, contact details, requests, dates, times, quantities "
+    "(e.g. party size), preferences and decisions made. Drop greetings and "
+    "small talk. Write plain sentences, no more than 120 words."
+)
+
+
+def build_summary_prompt(summary: str, messages: List[Dict[str, str]]) -> Prompt:
+    """Prompt asking to fold `messages` into `summary`"""
+    transcript = "\n".join(f"{msg['role']}: {msg['content']}" for msg in messages)
+    content = (
+        f"Previous summary:\n{summary or '(none)'}\n\n"
+        f"New messages:\n{transcript}"
+    )
+    return Prompt(SUMMARY_INSTRUCTIONS, [{"role": "user", "content": content}])
+
+
+class ConversationSummarizer:
+    """
+    Rolling per-user conversation summaries
+
+    Once a user has more than `trigger` messages that aren't covered by
+    their summary, everything but the last `keep_recent` is folded into the
+    summary by `complete` (normally a cheap model). This runs in a
+    background task, so the reply that triggered it isn't delayed; turns
+    that arrive meanwhile simply use the previous summary.
+    """
+
+    def __init__(
+        self,
+        store: ConversationStore,
+        complete: Callable[[Prompt], Awaitable[str]],
+        trigger: int = 20,
+        keep_recent: int = 10
+    ):
+        """
+        Initialize summarizer
+
+        Args:
+            store: Conversation store holding messages and summaries
+            complete: Async callable returning the model's text for a prompt
+            trigger: Unsummarized messages that start a compaction
+            keep_recent: Most recent messages kept verbatim
+        """
+        self.store = store
+        self.complete = complete
+        self.trigger = trigger
+        self.keep_recent = keep_recent
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+        self.runs = 0
+        self.failures = 0
+
+    def schedule(self, user_id: str) -> bool:
+        """
+        Start compacting a user's history in the background if it is due
+
+        Returns:
+            True if a compaction was started
+        """
+        if user_id in self._tasks or self.store.unsummarized_count(user_id) <= self.trigger:
+            return False
+        task = asyncio.ensure_future(self._summarize(user_id))
+        self._tasks[user_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(user_id, None))
+        return True
+
+    async def _summarize(self, user_id: str):
+        summary, messages, base, upto = self.store.summary_candidates(user_id, self.keep_recent)
+        if not messages:
+            return
+        self.runs += 1
+        try:
+            new_summary = await self.complete(build_summary_prompt(summary, messages))
+        except Exception as e:
+            # The turns stay in history and are retried on a later message
+            self.failures += 1
+            logger.warning(f"Summarizing conversation for {user_id} failed: {e}")
+            return
+        if not self.store.set_summary(user_id, new_summary.strip(), base, upto):
+            logger.debug(f"Conversation for {user_id} changed while summarizing, discarded")
+
+    async def close(self):
+        """Wait for running compactions to finish"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get summarization counters"""
+        return {
+            "running": len(self._tasks),
+            "runs": self.runs,
+            "failures": self.failures
+        }
@@ -0,0 +1,29 @@
+"""
+Chronyx Community Edition - Token Estimation
+Fast local token counts for prompt budgeting.
+"""
+from typing import Dict, Iterable
+
+# Tokens a chat API adds around each message (role, separators)
+MESSAGE_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough LLM token count
+
+    BPE tokenizers average about 4 bytes of UTF-8 per token. Counting
+    bytes rather than characters makes accented and non-Latin text count
+    as more expensive, which matches how they tokenize.
+    """
+    return (len(text.encode("utf-8")) + 3) // 4
+
+
+def estimate_message_tokens(message: Dict[str, str]) -> int:
+    """Token count of one chat message, including its overhead"""
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD
+
+
+def estimate_messages_tokens(messages: Iterable[Dict[str, str]]) -> int:
+    """Token count of a list of chat messages"""
+    return sum(estimate_message_tokens(message) for message in messages)
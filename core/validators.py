@@ -1,7 +1,9 @@
 """
 Input validation for Chronyx agents
 """
-from typing import Dict, Optional
+from json.encoder import encode_basestring_ascii
+from typing import Any, Dict, Iterable, List, Optional, Union
+import json
 import re
 
 
@@ -10,6 +12,91 @@ class ValidationError(Exception):
     pass
 
 
+# Control characters removed from messages (keeps \t, \n and \r)
+_CONTROL_PATTERN = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]')
+
+# Prompt injection markers, compiled once and removed in this order
+_INJECTION_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r'<\|im_start\|>',
+        r'<\|im_end\|>',
+        r'###\s*System:',
+        r'###\s*Assistant:',
+        r'###\s*User:',
+    )
+]
+
+# Containers with more items than this are measured item by item, so an
+# oversized context is rejected part way through; smaller ones are
+# serialized in a single (C-accelerated) call
+_CHUNK_ITEMS = 64
+
+
+class _ContextTooLarge(Exception):
+    pass
+
+
+def _looks_small(context: Dict, budget: int) -> bool:
+    """
+    Cheap guess whether a context serializes to well under `budget`
+
+    Looks at the top level only: strings count their length, containers
+    their length times the size of their first item.
+    """
+    if len(context) > _CHUNK_ITEMS:
+        return False
+    size = 0
+    for value in context.values():
+        if type(value) is str:
+            size += len(value)
+        elif isinstance(value, (dict, list, tuple)) and value:
+            first = next(iter(value.values())) if isinstance(value, dict) else value[0]
+            size += len(value) * (len(first) if type(first) is str else 64)
+        if size > budget:
+            return False
+    return True
+
+
+def _json_size(value: Any, budget: int, walk: bool = False) -> int:
+    """
+    Length of `json.dumps(value)`
+
+    Raises _ContextTooLarge as soon as the running size exceeds `budget`.
+    With `walk`, a dict is measured item by item whatever its size.
+    """
+    if isinstance(value, dict) and (walk or len(value) > _CHUNK_ITEMS):
+        size = max(2, 2 * len(value))  # braces and ", " separators
+        for key, item in value.items():
+            if not isinstance(key, str):
+                # json.dumps writes int/float/bool/None keys as strings
+                if not (key is None or isinstance(key, (int, float))):
+                    raise TypeError(f"keys must be str, int, float, bool or None, not {type(key).__name__}")
+                key = json.dumps(key)
+            size += len(encode_basestring_ascii(key)) + 2  # ": "
+            size += _json_size(item, budget - size)
+            if size > budget:
+                raise _ContextTooLarge
+        return size
+
+    if isinstance(value, (list, tuple)) and len(value) > _CHUNK_ITEMS:
+        size = 2 * len(value)  # brackets and ", " separators
+        for item in value:
+            size += _json_size(item, budget - size)
+            if size > budget:
+                raise _ContextTooLarge
+        return size
+
+    if isinstance(value, str):
+        # Same escaping as json.dumps, without its per-call overhead
+        size = len(encode_basestring_ascii(value))
+    else:
+        size = len(json.dumps(value))
+    if size > budget:
+        raise _ContextTooLarge
+    return size
+
+
 class InputValidator:
     """Validate user inputs"""
 
@@ -47,9 +134,10 @@ class InputValidator:
                 f"Message too long. Maximum {InputValidator.MAX_MESSAGE_LENGTH} characters"
             )
 
-        # Basic sanitization - remove control characters
-        message = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', message)
-
+        # Basic sanitization - remove control characters (isprintable() is a
+        # quick check that there are none)
+        if not message.isprintable():
+            message = _CONTROL_PATTERN.sub('', message)
         return message
 
     @staticmethod
@@ -72,10 +160,17 @@ class InputValidator:
         if not isinstance(context, dict):
             raise ValidationError("Context must be a dictionary")
 
-        # Check total size
-        import json
-        context_str = json.dumps(context)
-        if len(context_str) > InputValidator.MAX_CONTEXT_SIZE:
+        # Check total (serialized) size. Contexts that look well under the
+        # limit are serialized in one call; others are measured item by
+        # item, stopping as soon as they're too big
+        limit = InputValidator.MAX_CONTEXT_SIZE
+        try:
+            if _looks_small(context, limit // 2):
+                if len(json.dumps(context)) > limit:
+                    raise _ContextTooLarge
+            else:
+                _json_size(context, limit, walk=True)
+        except _ContextTooLarge:
             raise ValidationError(
                 f"Context too large. Maximum {InputValidator.MAX_CONTEXT_SIZE} characters"
             )
@@ -93,16 +188,54 @@ class InputValidator:
         Returns:
             Sanitized text
         """
+        # Nothing to remove unless a marker could be present
+        if "<|" not in text and "###" not in text:
+            return text
+
         # Remove potential prompt injection attempts
-        dangerous_patterns = [
-            r'<\|im_start\|>',
-            r'<\|im_end\|>',
-            r'###\s*System:',
-            r'###\s*Assistant:',
-            r'###\s*User:',
-        ]
+        for pattern in _INJECTION_PATTERNS:
+            text = pattern.sub('', text)
+        return text
 
-        for pattern in dangerous_patterns:
-            text = re.sub(pattern, '', text, flags=re.IGNORECASE)
+    @staticmethod
+    def validate_batch(
+        messages: Iterable[str],
+        sanitize: bool = True
+    ) -> List[Union[str, ValidationError]]:
+        """
+        Validate many messages at once (bulk ingestion)
 
-        return text
+        Args:
+            messages: User input messages
+            sanitize: Also apply `sanitize_for_prompt` to valid messages
+
+        Returns:
+            For each message, in order, the sanitized message or the
+            ValidationError it failed with
+        """
+        results: List[Union[str, ValidationError]] = []
+        append = results.append
+        validate = InputValidator.validate_message
+        clean = InputValidator.sanitize_for_prompt
+        min_length = InputValidator.MIN_MESSAGE_LENGTH
+        max_length = InputValidator.MAX_MESSAGE_LENGTH
+        for message in messages:
+            # Valid messages are handled inline, without two calls per message
+            if type(message) is str:
+                text = message.strip()
+                if min_length <= len(text) <= max_length:
+                    if not text.isprintable():
+                        text = _CONTROL_PATTERN.sub('', text)
+                    if sanitize and ("<|" in text or "###" in text):
+                        text = clean(text)
+                    append(text)
+                    continue
+
+            # Anything else gets validate_message's verdict and error
+            try:
+                message = validate(message)
+            except ValidationError as e:
+                append(e)
+                continue
+            append(clean(message) if sanitize else message)
+        return results
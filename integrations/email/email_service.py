@@ -2,19 +2,50 @@
 Chronyx Community Edition - Email Service
 Basic email sending functionality
 """
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional, List
+from typing import Any, Dict, Iterable, Optional, List, Tuple
+import asyncio
 import logging
 
+import aiosmtplib
+from jinja2 import Environment, StrictUndefined
+
 from config.settings import settings
+from .outbox import EmailOutbox, PermanentFailure
+from .smtp_pool import SMTPConnectionPool
 
 logger = logging.getLogger(__name__)
 
+# Per-recipient fields in bulk campaigns; a missing field is an error
+_text_templates = Environment(undefined=StrictUndefined, keep_trailing_newline=True)
+
+# Compiled once; title and message are inserted as given (they may hold HTML)
+NOTIFICATION_HTML = Environment().from_string("""
+        <html>
+            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
+                <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+                    <h2 style="color: #2563eb;">{{ title }}</h2>
+                    <p>{{ message }}</p>
+                    {% if action_url %}<p><a href="{{ action_url }}" style="display: inline-block; padding: 10px 20px; background-color: #2563eb; color: white; text-decoration: none; border-radius: 5px;">Take Action</a></p>{% endif %}
+                    <hr style="margin: 30px 0; border: none; border-top: 1px solid #ddd;">
+                    <p style="font-size: 12px; color: #666;">
+                        This is an automated message from Chronyx Community Edition.
+                    </p>
+                </div>
+            </body>
+        </html>
+        """)
+
 
 class EmailService:
-    """Basic email service for Community Edition"""
+    """
+    Basic email service for Community Edition
+
+    With settings.email_outbox_enabled, `send_email` only writes the
+    message to a durable outbox and background workers deliver it, with
+    retries, over pooled SMTP connections.
+    """
     
     def __init__(self):
         self.smtp_host = settings.smtp_host
@@ -22,6 +53,8 @@ class EmailService:
         self.smtp_user = settings.smtp_user
         self.smtp_password = settings.smtp_password
         self.smtp_from = settings.smtp_from or settings.smtp_user
+        self._pool: Optional[SMTPConnectionPool] = None
+        self._outbox: Optional[EmailOutbox] = None
         
     def is_configured(self) -> bool:
         """Check if email is configured"""
@@ -30,7 +63,105 @@ class EmailService:
             self.smtp_user,
             self.smtp_password
         ])
+
+    @property
+    def pool(self) -> SMTPConnectionPool:
+        """Shared SMTP connections (opened on first send)"""
+        if self._pool is None:
+            self._pool = SMTPConnectionPool(
+                hostname=self.smtp_host,
+                port=self.smtp_port,
+                username=self.smtp_user,
+                password=self.smtp_password,
+                use_tls=settings.smtp_use_tls,
+                size=settings.smtp_pool_size,
+                health_check_interval=settings.smtp_health_check_interval,
+                timeout=settings.smtp_timeout,
+                max_per_second=settings.smtp_max_per_second
+            )
+        return self._pool
+
+    @property
+    def outbox(self) -> EmailOutbox:
+        """Durable queue of messages waiting for delivery"""
+        if self._outbox is None:
+            self._outbox = EmailOutbox(
+                self._deliver,
+                path=settings.email_outbox_path,
+                workers=settings.email_outbox_workers,
+                max_attempts=settings.email_max_attempts,
+                base_delay=settings.email_retry_base_delay,
+                max_delay=settings.email_retry_max_delay,
+                claim_timeout=settings.email_claim_timeout
+            )
+        return self._outbox
+
+    def start(self):
+        """Resume delivering messages queued before a restart"""
+        if settings.email_outbox_enabled and self.is_configured():
+            self.outbox.start()
+
+    async def close(self):
+        """Stop outbox workers and close pooled SMTP connections"""
+        if self._outbox is not None:
+            await self._outbox.close()
+            self._outbox = None
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
     
+    def _build_message(
+        self,
+        to: str,
+        subject: str,
+        body: str,
+        html: Optional[str] = None,
+        cc: Optional[List[str]] = None,
+        bcc: Optional[List[str]] = None
+    ) -> Tuple[MIMEMultipart, List[str]]:
+        """Create a message and its envelope recipients"""
+        msg = MIMEMultipart('alternative')
+        msg['From'] = self.smtp_from
+        msg['To'] = to
+        msg['Subject'] = subject
+
+        if cc:
+            msg['Cc'] = ', '.join(cc)
+        if bcc:
+            msg['Bcc'] = ', '.join(bcc)
+
+        # Add body
+        msg.attach(MIMEText(body, 'plain'))
+        if html:
+            msg.attach(MIMEText(html, 'html'))
+
+        recipients = [to]
+        if cc:
+            recipients.extend(cc)
+        if bcc:
+            recipients.extend(bcc)
+        return msg, recipients
+
+    async def _deliver(self, payload: Dict[str, Any]):
+        """
+        Send one outbox message over a pooled connection
+
+        Raises:
+            PermanentFailure: If the server rejected the message for good
+        """
+        msg, recipients = self._build_message(**payload)
+        try:
+            refused = await self.pool.send(msg, self.smtp_from, recipients)
+        except aiosmtplib.SMTPRecipientsRefused as e:
+            raise PermanentFailure(f"All recipients refused: {e}") from e
+        except aiosmtplib.SMTPResponseException as e:
+            if e.code >= 500:
+                raise PermanentFailure(f"Rejected by server: {e}") from e
+            raise
+        if refused:
+            logger.warning(f"Email to {payload['to']} refused for {', '.join(refused)}")
+        logger.info(f"Email sent successfully to {payload['to']}")
+
     async def send_email(
         self,
         to: str,
@@ -40,47 +171,47 @@ class EmailService:
         cc: Optional[List[str]] = None,
         bcc: Optional[List[str]] = None
     ) -> bool:
-        """Send an email"""
+        """
+        Send an email
+
+        With the outbox enabled, returns True as soon as the message is
+        safely queued; delivery and retries happen in the background.
+        """
         if not self.is_configured():
             logger.warning("Email not configured - skipping send")
             return False
         
+        payload = {
+            "to": to,
+            "subject": subject,
+            "body": body,
+            "html": html,
+            "cc": cc,
+            "bcc": bcc
+        }
         try:
-            # Create message
-            msg = MIMEMultipart('alternative')
-            msg['From'] = self.smtp_from
-            msg['To'] = to
-            msg['Subject'] = subject
-            
-            if cc:
-                msg['Cc'] = ', '.join(cc)
-            if bcc:
-                msg['Bcc'] = ', '.join(bcc)
-            
-            # Add body
-            msg.attach(MIMEText(body, 'plain'))
-            if html:
-                msg.attach(MIMEText(html, 'html'))
-            
-            # Send email
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_user, self.smtp_password)
-                
-                recipients = [to]
-                if cc:
-                    recipients.extend(cc)
-                if bcc:
-                    recipients.extend(bcc)
-                
-                server.send_message(msg, self.smtp_from, recipients)
-            
-            logger.info(f"Email sent successfully to {to}")
+            if settings.email_outbox_enabled:
+                await self.outbox.enqueue(payload)
+            else:
+                await self._deliver(payload)
             return True
             
         except Exception as e:
             logger.error(f"Failed to send email: {e}")
             return False
+
+    @staticmethod
+    def render_notification(
+        title: str,
+        message: str,
+        action_url: Optional[str] = None
+    ) -> Tuple[str, str]:
+        """Render the notification template as (text, html)"""
+        text_body = f"{title}\n\n{message}"
+        if action_url:
+            text_body += f"\n\nAction URL: {action_url}"
+        html_body = NOTIFICATION_HTML.render(title=title, message=message, action_url=action_url)
+        return text_body, html_body
     
     async def send_notification(
         self,
@@ -90,26 +221,7 @@ class EmailService:
         action_url: Optional[str] = None
     ) -> bool:
         """Send a notification email with basic template"""
-        
-        html_body = f"""
-        <html>
-            <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
-                <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
-                    <h2 style="color: #2563eb;">{title}</h2>
-                    <p>{message}</p>
-                    {f'<p><a href="{action_url}" style="display: inline-block; padding: 10px 20px; background-color: #2563eb; color: white; text-decoration: none; border-radius: 5px;">Take Action</a></p>' if action_url else ''}
-                    <hr style="margin: 30px 0; border: none; border-top: 1px solid #ddd;">
-                    <p style="font-size: 12px; color: #666;">
-                        This is an automated message from Chronyx Community Edition.
-                    </p>
-                </div>
-            </body>
-        </html>
-        """
-        
-        text_body = f"{title}\n\n{message}"
-        if action_url:
-            text_body += f"\n\nAction URL: {action_url}"
+        text_body, html_body = self.render_notification(title, message, action_url)
         
         return await self.send_email(
             to=to,
@@ -117,3 +229,74 @@ class EmailService:
             body=text_body,
             html=html_body
         )
+
+    async def send_bulk(
+        self,
+        recipients: Iterable[Dict[str, Any]],
+        title: str,
+        message: str,
+        action_url: Optional[str] = None,
+        concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Send a notification to many recipients (e.g. reservation reminders)
+
+        `title`, `message` and `action_url` are Jinja2 templates, compiled
+        once and rendered for each recipient with that recipient's fields,
+        e.g. "Hi {{ name }}, see you at {{ time }}". Messages go out over
+        up to `concurrency` pooled connections, throttled per server by
+        settings.smtp_max_per_second.
+
+        Args:
+            recipients: Dicts with an "email" key plus template variables
+            title: Subject/heading template
+            message: Body template
+            action_url: Optional link template
+            concurrency: Parallel sends (defaults to settings.smtp_pool_size)
+
+        Returns:
+            One {"email", "success", "error"} dict per recipient, in order
+        """
+        recipients = list(recipients)
+        if not self.is_configured():
+            logger.warning("Email not configured - skipping bulk send")
+            return [
+                {"email": r.get("email"), "success": False, "error": "Email not configured"}
+                for r in recipients
+            ]
+
+        title_template = _text_templates.from_string(title)
+        message_template = _text_templates.from_string(message)
+        url_template = _text_templates.from_string(action_url) if action_url else None
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(recipients)
+        positions = iter(range(len(recipients)))
+
+        async def worker():
+            # Workers share one iterator, so each recipient is sent once
+            for index in positions:
+                recipient = recipients[index]
+                to = recipient.get("email")
+                try:
+                    if not to:
+                        raise ValueError("Recipient has no email address")
+                    subject = title_template.render(recipient)
+                    text_body, html_body = self.render_notification(
+                        subject,
+                        message_template.render(recipient),
+                        url_template.render(recipient) if url_template else None
+                    )
+                    msg, envelope = self._build_message(to, subject, text_body, html_body)
+                    refused = await self.pool.send(msg, self.smtp_from, envelope)
+                    if refused:
+                        raise ValueError(f"Recipient refused: {refused}")
+                    results[index] = {"email": to, "success": True, "error": None}
+                except Exception as e:
+                    results[index] = {"email": to, "success": False, "error": str(e)}
+
+        workers = min(concurrency or settings.smtp_pool_size, len(recipients))
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+        sent = sum(1 for result in results if result["success"])
+        logger.info(f"Bulk email: {sent}/{len(results)} sent")
+        return results
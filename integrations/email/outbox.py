@@ -0,0 +1,285 @@
+"""
+Chronyx Community Edition - Email Outbox
+Durable SQLite queue of outgoing emails, drained by background workers.
+"""
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class PermanentFailure(Exception):
+    """Delivery failed in a way retrying won't fix (e.g. 5xx rejection)"""
+    pass
+
+
+class EmailOutbox:
+    """
+    Persistent outbox for emails
+
+    `enqueue()` commits the message to a SQLite file (WAL,
+    synchronous=FULL) and returns; delivery happens in background workers.
+    A failed delivery is retried with jittered exponential backoff up to
+    `max_attempts` times, after which the message is kept as "failed".
+
+    Several processes may share one outbox file. A claimed message is
+    leased to its worker for `claim_timeout` seconds, and a delivery may
+    not take longer than that. Messages whose lease ran out (their process
+    died mid-send) are picked up again by any worker, so delivery is
+    at-least-once.
+    """
+
+    def __init__(
+        self,
+        deliver: Callable[[Dict[str, Any]], Awaitable[None]],
+        path: str = "./chronyx_outbox.db",
+        workers: int = 2,
+        max_attempts: int = 8,
+        base_delay: float = 5.0,
+        max_delay: float = 600.0,
+        claim_timeout: float = 300.0
+    ):
+        """
+        Initialize outbox
+
+        Args:
+            deliver: Async callable sending one payload; raises on failure
+                (PermanentFailure to skip further retries)
+            path: SQLite database file
+            workers: Concurrent deliveries
+            max_attempts: Deliveries tried before giving up on a message
+            base_delay: Seconds before the first retry, doubled per retry
+            max_delay: Cap on the retry delay in seconds
+            claim_timeout: Seconds a claimed message is reserved for its
+                worker; longer deliveries are abandoned and retried
+        """
+        self.deliver = deliver
+        self.path = path
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.claim_timeout = claim_timeout
+        # Identifies this outbox's claims among processes sharing the file
+        self.owner = uuid.uuid4().hex
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS email_outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "payload TEXT NOT NULL, "
+            "status TEXT NOT NULL DEFAULT 'pending', "
+            "attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt REAL NOT NULL, "
+            "last_error TEXT, "
+            "created_at REAL NOT NULL)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(email_outbox)")}
+        if "claimed_by" not in columns:
+            # Outboxes created before claims had leases
+            self._conn.execute("ALTER TABLE email_outbox ADD COLUMN claimed_by TEXT")
+            self._conn.execute("ALTER TABLE email_outbox ADD COLUMN claimed_until REAL")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_email_outbox_due ON email_outbox(status, next_attempt)"
+        )
+
+        self._tasks: List[asyncio.Task] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._stopping = False
+
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    def _execute(self, sql: str, params: Tuple = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._conn.execute(sql, params)
+
+    def _fetch(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        # Rows are read while holding the lock (the statement only
+        # completes, and commits, once they have been consumed)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _insert(self, payload: Dict[str, Any]) -> int:
+        now = time.time()
+        return self._execute(
+            "INSERT INTO email_outbox (payload, next_attempt, created_at) VALUES (?, ?, ?)",
+            (json.dumps(payload), now, now)
+        ).lastrowid
+
+    async def enqueue(self, payload: Dict[str, Any]) -> int:
+        """
+        Durably queue a message for delivery
+
+        Returns:
+            Outbox id of the message
+        """
+        # The commit waits for an fsync, so keep it off the event loop
+        message_id = await asyncio.to_thread(self._insert, payload)
+        self.start()
+        self._wake.set()
+        return message_id
+
+    def start(self):
+        """Start the delivery workers (picks up messages left by a previous run)"""
+        if self._tasks:
+            return
+        self._requeue_expired(time.time())
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    def _requeue_expired(self, now: float) -> int:
+        """Release messages whose sender died mid-delivery; returns how many"""
+        # Claims without a lease were made before leases existed
+        return self._execute(
+            "UPDATE email_outbox SET status = 'pending', claimed_by = NULL, claimed_until = NULL "
+            "WHERE status = 'sending' AND (claimed_until IS NULL OR claimed_until < ?)",
+            (now,)
+        ).rowcount
+
+    def _claim(self, now: float) -> Optional[Tuple[int, str, int]]:
+        """Atomically take the next due message, leased to this outbox"""
+        rows = self._fetch(
+            "UPDATE email_outbox SET status = 'sending', claimed_by = ?, claimed_until = ? WHERE id = ("
+            "SELECT id FROM email_outbox WHERE status = 'pending' AND next_attempt <= ? "
+            "ORDER BY next_attempt LIMIT 1) "
+            "RETURNING id, payload, attempts",
+            (self.owner, now + self.claim_timeout, now)
+        )
+        return rows[0] if rows else None
+
+    def _next_due(self) -> Optional[float]:
+        rows = self._fetch("SELECT MIN(next_attempt) FROM email_outbox WHERE status = 'pending'")
+        return rows[0][0] if rows else None
+
+    def _retry_delay(self, attempts: int) -> float:
+        """Exponential backoff, jittered between half and the full delay"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return random.uniform(delay / 2, delay)
+
+    async def _worker(self):
+        failures = 0
+        while not self._stopping:
+            try:
+                await self._work_once()
+                failures = 0
+            except Exception as e:
+                # e.g. "database is locked" - the outbox is still there, try again
+                failures += 1
+                delay = min(60.0, 2 ** failures)
+                logger.error(f"Email outbox worker error ({e}), retrying in {delay:.0f}s")
+                # close() sets _wake, so it doesn't wait out the delay
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _work_once(self):
+        """Deliver the next due message, or wait until one may be due"""
+        # Cleared before looking, so an enqueue from now on is never missed
+        self._wake.clear()
+        # Commits wait for an fsync, so database calls run in a thread
+        claimed = await asyncio.to_thread(self._claim, time.time())
+        if claimed is None:
+            # Take over messages from processes that died while sending
+            if await asyncio.to_thread(self._requeue_expired, time.time()):
+                return
+            # Sleep until the next retry is due or a message is enqueued
+            due = await asyncio.to_thread(self._next_due)
+            timeout = 60.0 if due is None else max(0.0, min(60.0, due - time.time()))
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            return
+
+        message_id, payload, attempts = claimed
+        attempts += 1
+        try:
+            # Past its lease the message may be taken by another worker
+            await asyncio.wait_for(self.deliver(json.loads(payload)), self.claim_timeout)
+        except Exception as e:
+            permanent = isinstance(e, PermanentFailure)
+            if permanent or attempts >= self.max_attempts:
+                self.failed += 1
+                logger.error(f"Email {message_id} failed after {attempts} attempt(s): {e}")
+                await asyncio.to_thread(
+                    self._execute,
+                    "UPDATE email_outbox SET status = 'failed', attempts = ?, last_error = ?, "
+                    "claimed_by = NULL, claimed_until = NULL WHERE id = ? AND claimed_by = ?",
+                    (attempts, str(e), message_id, self.owner)
+                )
+            else:
+                self.retried += 1
+                delay = self._retry_delay(attempts)
+                logger.warning(f"Email {message_id} failed ({e}), retrying in {delay:.0f}s")
+                await asyncio.to_thread(
+                    self._execute,
+                    "UPDATE email_outbox SET status = 'pending', attempts = ?, next_attempt = ?, "
+                    "last_error = ?, claimed_by = NULL, claimed_until = NULL "
+                    "WHERE id = ? AND claimed_by = ?",
+                    (attempts, time.time() + delay, str(e), message_id, self.owner)
+                )
+            return
+
+        self.sent += 1
+        await asyncio.to_thread(self._execute, "DELETE FROM email_outbox WHERE id = ?", (message_id,))
+
+    def failed_messages(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Messages that gave up, newest first"""
+        rows = self._fetch(
+            "SELECT id, payload, attempts, last_error FROM email_outbox "
+            "WHERE status = 'failed' ORDER BY id DESC LIMIT ?",
+            (limit,)
+        )
+        return [
+            {"id": row[0], "payload": json.loads(row[1]), "attempts": row[2], "error": row[3]}
+            for row in rows
+        ]
+
+    async def close(self, timeout: float = 10.0):
+        """
+        Stop the workers
+
+        In-flight deliveries get `timeout` seconds to finish; anything not
+        delivered stays in the outbox for the next start.
+        """
+        self._stopping = True
+        if self._tasks:
+            self._wake.set()
+            _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            self._tasks = []
+        # Hand back deliveries cut off here without waiting out their lease
+        self._execute(
+            "UPDATE email_outbox SET status = 'pending', claimed_by = NULL, claimed_until = NULL "
+            "WHERE status = 'sending' AND claimed_by = ?",
+            (self.owner,)
+        )
+        with self._lock:
+            self._conn.close()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get queue sizes and delivery counters"""
+        counts = dict(self._fetch("SELECT status, COUNT(*) FROM email_outbox GROUP BY status"))
+        return {
+            "pending": counts.get("pending", 0) + counts.get("sending", 0),
+            "failed_stored": counts.get("failed", 0),
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed
+        }
@@ -0,0 +1,220 @@
+"""
+Chronyx Community Edition - SMTP Connection Pool
+Reusable, authenticated async SMTP connections.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from email.message import Message
+from typing import Deque, Dict, List, Optional, Tuple
+
+import aiosmtplib
+
+logger = logging.getLogger(__name__)
+
+# Errors after which a connection can't be trusted and is replaced
+CONNECTION_ERRORS = (
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPTimeoutError,
+    ConnectionError,
+    asyncio.TimeoutError,
+)
+
+
+class SMTPConnectionPool:
+    """
+    Pool of logged-in SMTP connections
+
+    Connecting, STARTTLS and AUTH happen once per connection instead of
+    once per message. At most `size` connections exist; senders beyond
+    that wait for one to be returned. A connection that has been idle for
+    `health_check_interval` seconds is checked with NOOP before reuse, and
+    a connection that fails mid-send is replaced and the send retried once.
+    With `max_per_second`, sends to the server are spaced out evenly so
+    bulk mailings stay under the provider's sending limit.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int = 587,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = True,
+        size: int = 3,
+        health_check_interval: float = 30.0,
+        timeout: float = 30.0,
+        max_per_second: float = 0
+    ):
+        """
+        Initialize connection pool
+
+        Args:
+            hostname: SMTP server host
+            port: SMTP server port (465 means implicit TLS)
+            username: Login user (None to skip AUTH)
+            password: Login password
+            use_tls: Upgrade plain connections with STARTTLS
+            size: Maximum open connections
+            health_check_interval: Idle seconds before a NOOP check on reuse
+            timeout: Socket timeout in seconds
+            max_per_second: Maximum messages per second (0 = unlimited)
+        """
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+        self.max_per_second = max_per_second
+
+        # Idle connections with the time they were last used, newest last
+        self._idle: Deque[Tuple[aiosmtplib.SMTP, float]] = deque()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._closed = False
+        self._next_send = 0.0
+
+        self.connects = 0
+        self.reconnects = 0
+        self.sent = 0
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        """Open and log in a new connection"""
+        implicit_tls = self.port == 465
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            use_tls=implicit_tls,
+            start_tls=self.use_tls and not implicit_tls,
+            timeout=self.timeout
+        )
+        await client.connect()
+        self.connects += 1
+        return client
+
+    @staticmethod
+    async def _discard(client: aiosmtplib.SMTP):
+        """Close a connection without caring whether the server answers"""
+        try:
+            if client.is_connected:
+                await client.quit()
+        except Exception:
+            client.close()
+
+    async def _checkout(self) -> aiosmtplib.SMTP:
+        """Get a healthy idle connection, or open a new one"""
+        while self._idle:
+            client, last_used = self._idle.pop()
+            if not client.is_connected:
+                continue
+            if time.monotonic() - last_used >= self.health_check_interval:
+                try:
+                    await client.noop()
+                except asyncio.CancelledError:
+                    client.close()
+                    raise
+                except Exception:
+                    # Server dropped the idle connection - open a fresh one
+                    await self._discard(client)
+                    continue
+            return client
+        return await self._connect()
+
+    async def _throttle(self):
+        """Wait for this send's slot under max_per_second"""
+        if not self.max_per_second:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_send)
+        self._next_send = slot + 1 / self.max_per_second
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def _checkin(self, client: aiosmtplib.SMTP):
+        """Return a connection to the pool"""
+        self._idle.append((client, time.monotonic()))
+
+    async def send(
+        self,
+        message: Message,
+        sender: Optional[str] = None,
+        recipients: Optional[List[str]] = None
+    ) -> Dict[str, aiosmtplib.SMTPResponse]:
+        """
+        Send a message over a pooled connection
+
+        Args:
+            message: Email message
+            sender: Envelope sender (defaults to the From header)
+            recipients: Envelope recipients (defaults to To/Cc/Bcc headers)
+
+        Returns:
+            Server responses for refused recipients (empty if all accepted)
+
+        Raises:
+            aiosmtplib.SMTPException: If the server rejects the message
+            ConnectionError: If the server can't be reached
+        """
+        if self._closed:
+            raise RuntimeError("SMTP pool is closed")
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+
+        await self._throttle()
+        async with self._slots:
+            for attempt in range(2):
+                client = await self._checkout()
+                # Set to None once the connection is back in the pool or closed
+                try:
+                    errors, _ = await client.send_message(
+                        message, sender=sender, recipients=recipients
+                    )
+                    self._checkin(client)
+                    client = None
+                except CONNECTION_ERRORS as e:
+                    await self._discard(client)
+                    client = None
+                    if attempt:
+                        raise
+                    self.reconnects += 1
+                    logger.warning(f"SMTP connection lost ({e}), reconnecting")
+                    continue
+                except Exception:
+                    # Rejected by the server - reset the session before reuse
+                    try:
+                        await client.rset()
+                    except Exception:
+                        await self._discard(client)
+                    else:
+                        self._checkin(client)
+                    client = None
+                    raise
+                finally:
+                    # Cancelled mid-conversation: the session state is unknown
+                    if client is not None:
+                        client.close()
+
+                self.sent += 1
+                return errors
+
+    async def close(self):
+        """Log out and close all idle connections"""
+        self._closed = True
+        while self._idle:
+            client, _ = self._idle.pop()
+            await self._discard(client)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get connection counters"""
+        return {
+            "idle": len(self._idle),
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "sent": self.sent
+        }
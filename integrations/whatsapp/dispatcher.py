@@ -0,0 +1,146 @@
+"""
+Message Dispatcher - Concurrent, per-sender ordered message handling
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MessageDispatcher:
+    """
+    Run a message handler on a bounded worker pool
+
+    Messages from the same sender are handled one at a time, in arrival
+    order; messages from different senders run in parallel on up to
+    `max_workers` workers. At most `max_pending` messages may be queued or
+    in progress - beyond that `submit()` waits, pushing backpressure to
+    the caller.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Dict], Awaitable[Any]],
+        max_workers: int = 16,
+        max_pending: int = 1000,
+        key_func: Optional[Callable[[Dict], str]] = None
+    ):
+        """
+        Initialize dispatcher
+
+        Args:
+            handler: Async callback for one message
+            max_workers: Maximum messages handled concurrently
+            max_pending: Maximum messages queued or in progress
+            key_func: Returns the ordering key of a message (defaults to sender)
+        """
+        self.handler = handler
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.key_func = key_func or (lambda message: message.get("from", ""))
+
+        # A key is in _queues exactly while it is waiting in _ready or
+        # being handled by a worker, so a sender is never run twice at once.
+        self._queues: Dict[str, Deque[Dict]] = {}
+        self._ready: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._workers: List[asyncio.Task] = []
+        self._pending = 0
+        self._idle: Optional[asyncio.Event] = None
+
+        self.processed = 0
+        self.failed = 0
+
+    def start(self):
+        """Start the worker pool"""
+        if self._workers:
+            return
+        self._ready = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.max_pending)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.max_workers)
+        ]
+
+    async def submit(self, message: Dict):
+        """
+        Queue a message for handling
+
+        Waits while the dispatcher is at `max_pending`.
+        """
+        if not self._workers:
+            self.start()
+
+        await self._slots.acquire()
+        self._pending += 1
+        self._idle.clear()
+
+        key = self.key_func(message)
+        queue = self._queues.get(key)
+        if queue is None:
+            self._queues[key] = deque([message])
+            self._ready.put_nowait(key)
+        else:
+            queue.append(message)
+
+    async def _worker(self):
+        """Handle one message at a time, round-robin across senders"""
+        while True:
+            key = await self._ready.get()
+            queue = self._queues[key]
+            message = queue.popleft()
+            try:
+                await self.handler(message)
+                self.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Error handling message from {key}: {e}")
+            finally:
+                if queue:
+                    # Requeue at the back so busy senders don't starve others
+                    self._ready.put_nowait(key)
+                else:
+                    del self._queues[key]
+                self._pending -= 1
+                self._slots.release()
+                if self._pending == 0:
+                    self._idle.set()
+
+    async def join(self):
+        """Wait until every submitted message has been handled"""
+        if self._idle is not None:
+            await self._idle.wait()
+
+    async def stop(self, drain: bool = True, timeout: Optional[float] = 30):
+        """
+        Stop the worker pool
+
+        Args:
+            drain: Wait for queued messages before stopping
+            timeout: Maximum seconds to wait for the drain
+        """
+        if drain and self._workers:
+            try:
+                await asyncio.wait_for(self.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Dispatcher stopped with {self._pending} messages pending")
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get dispatcher counters"""
+        return {
+            "pending": self._pending,
+            "active_senders": len(self._queues),
+            "processed": self.processed,
+            "failed": self.failed
+        }
@@ -0,0 +1,330 @@
+"""
+Send Queue - Paced, prioritized outbound WhatsApp messages
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lower values are sent first
+PRIORITY_REPLY = 0
+PRIORITY_PROACTIVE = 10
+
+OVERFLOW_POLICIES = ("wait", "reject")
+
+
+class SendQueueFull(Exception):
+    """The send queue is full and its overflow policy is to reject"""
+    pass
+
+
+class _Outgoing:
+    """One queued message and the future its sender waits on"""
+
+    __slots__ = ("to", "message", "priority", "seq", "queued_at", "future")
+
+    def __init__(self, to: str, message: str, priority: int, seq: int, future: asyncio.Future):
+        self.to = to
+        self.message = message
+        self.priority = priority
+        self.seq = seq
+        self.queued_at = time.monotonic()
+        self.future = future
+
+
+class SendQueue:
+    """
+    Schedule outbound messages under WhatsApp-safe pacing
+
+    Messages go out at most `max_per_second` overall, and messages to the
+    same chat are sent one at a time, in order, at least
+    `per_chat_interval` seconds apart. Among chats that may send, the one
+    whose next message has the best priority (then the oldest) goes first,
+    so replies overtake proactive messages. At most `max_size` messages
+    are queued or in flight; beyond that `submit()` either waits for room
+    (overflow="wait", pushing backpressure to the caller) or raises
+    SendQueueFull (overflow="reject").
+
+    While paused (e.g. the bridge is restarting) messages are kept. A send
+    that fails with one of `retry_errors` goes back to the front of its
+    chat's queue and is sent again once possible.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, str], Awaitable[Dict[str, Any]]],
+        max_per_second: float = 5.0,
+        per_chat_interval: float = 1.0,
+        max_size: int = 1000,
+        overflow: str = "wait",
+        max_in_flight: int = 64,
+        retry_errors: Tuple[type, ...] = ()
+    ):
+        """
+        Initialize send queue
+
+        Args:
+            send: Async callable delivering one message, returns its confirmation
+            max_per_second: Messages per second across all chats (0 = unlimited)
+            per_chat_interval: Minimum seconds between messages to one chat
+            max_size: Maximum messages waiting to be sent
+            overflow: "wait" for room or "reject" with SendQueueFull when full
+            max_in_flight: Maximum sends awaiting confirmation at once
+            retry_errors: Exceptions after which a send is queued again
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of: {OVERFLOW_POLICIES}")
+
+        self.send = send
+        self.max_per_second = max_per_second
+        self.per_chat_interval = per_chat_interval
+        self.max_size = max_size
+        self.overflow = overflow
+        self.max_in_flight = max_in_flight
+        self.retry_errors = retry_errors
+
+        # A chat is in _chats while it has queued messages or one in flight;
+        # it is in exactly one of _ready / _cooling / in flight at a time.
+        self._chats: Dict[str, Deque[_Outgoing]] = {}
+        self._ready: List[Tuple[int, int, str]] = []  # (priority, seq, chat)
+        self._cooling: List[Tuple[float, int, str]] = []  # (eligible_at, seq, chat)
+        self._last_sent: Dict[str, float] = {}
+        self._seq = itertools.count()
+        self._next_send = 0.0
+        self._queued = 0
+        self._in_flight = 0
+        self._paused = False
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._scheduler: Optional[asyncio.Task] = None
+        self._sends: set = set()
+
+        self.sent = 0
+        self.failed = 0
+        self.rejected = 0
+        self.requeued = 0
+        self.peak_queued = 0
+        self._dispatched = 0
+        self._delay_total = 0.0
+
+    def start(self):
+        """Start the scheduler"""
+        if self._scheduler:
+            return
+        self._slots = asyncio.Semaphore(self.max_size)
+        self._wake = asyncio.Event()
+        self._scheduler = asyncio.create_task(self._run())
+
+    def pause(self):
+        """Hold messages in the queue until resume()"""
+        self._paused = True
+
+    def resume(self):
+        """Start sending queued messages again"""
+        self._paused = False
+        if self._wake:
+            self._wake.set()
+
+    async def submit(self, to: str, message: str, priority: int = PRIORITY_REPLY) -> asyncio.Future:
+        """
+        Queue a message
+
+        Returns:
+            Future resolving to the send confirmation (cancel it to withdraw
+            a message that hasn't been sent yet)
+
+        Raises:
+            SendQueueFull: If the queue is full and overflow is "reject"
+        """
+        if not self._scheduler:
+            self.start()
+
+        if self.overflow == "reject" and self._slots.locked():
+            self.rejected += 1
+            raise SendQueueFull(f"WhatsApp send queue is full ({self.max_size} messages)")
+        await self._slots.acquire()
+
+        item = _Outgoing(to, message, priority, next(self._seq), asyncio.get_running_loop().create_future())
+        self._queued += 1
+        self.peak_queued = max(self.peak_queued, self._queued)
+
+        queue = self._chats.get(to)
+        if queue is None:
+            self._chats[to] = deque([item])
+            self._schedule(to, self._last_sent.get(to, 0.0) + self.per_chat_interval)
+        else:
+            # Busy or already scheduled - it runs when the chat's turn comes
+            queue.append(item)
+        self._wake.set()
+        return item.future
+
+    def _schedule(self, chat: str, eligible_at: float):
+        """Make a chat with queued messages eligible at the given time"""
+        if eligible_at > time.monotonic():
+            heapq.heappush(self._cooling, (eligible_at, next(self._seq), chat))
+        else:
+            head = self._chats[chat][0]
+            heapq.heappush(self._ready, (head.priority, head.seq, chat))
+
+    def _promote(self, now: float):
+        """Move chats whose interval has passed to the ready heap"""
+        while self._cooling and self._cooling[0][0] <= now:
+            _, _, chat = heapq.heappop(self._cooling)
+            head = self._chats[chat][0]
+            heapq.heappush(self._ready, (head.priority, head.seq, chat))
+
+    def _take(self, chat: str) -> Optional[_Outgoing]:
+        """Pop a chat's next message, skipping ones whose sender gave up"""
+        queue = self._chats[chat]
+        while queue:
+            item = queue.popleft()
+            self._queued -= 1
+            if not item.future.done():
+                return item
+            self._slots.release()
+        del self._chats[chat]
+        return None
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            now = time.monotonic()
+            self._promote(now)
+
+            if self._ready and self._in_flight < self.max_in_flight and not self._paused:
+                if self._next_send > now:
+                    # Wait for the global rate slot; a better message that
+                    # arrives meanwhile is picked instead
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), self._next_send - now)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                _, _, chat = heapq.heappop(self._ready)
+                item = self._take(chat)
+                if item is None:
+                    continue
+                if self.max_per_second:
+                    self._next_send = max(now, self._next_send) + 1 / self.max_per_second
+                self._dispatched += 1
+                self._delay_total += now - item.queued_at
+                self._in_flight += 1
+                task = asyncio.create_task(self._send(chat, item))
+                self._sends.add(task)
+                task.add_done_callback(self._sends.discard)
+                continue
+
+            timeout = None
+            if self._cooling and self._in_flight < self.max_in_flight and not self._paused:
+                timeout = max(0.0, self._cooling[0][0] - now)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _send(self, chat: str, item: _Outgoing):
+        sent_at = time.monotonic()
+        requeue = False
+        try:
+            result = await self.send(item.to, item.message)
+        except self.retry_errors as e:
+            # Send it again, ahead of the chat's later messages
+            requeue = not item.future.done()
+            if requeue:
+                self.requeued += 1
+                logger.info(f"Requeueing message to {item.to}: {e}")
+        except Exception as e:
+            self.failed += 1
+            if not item.future.done():
+                item.future.set_exception(e)
+        else:
+            self.sent += 1
+            if not item.future.done():
+                item.future.set_result(result)
+        finally:
+            self._in_flight -= 1
+            if requeue:
+                self._chats[chat].appendleft(item)
+                self._queued += 1
+            else:
+                self._slots.release()
+            self._release(chat, sent_at)
+            self._wake.set()
+
+    def _release(self, chat: str, sent_at: float):
+        """Schedule a chat's next message once its send has finished"""
+        eligible_at = sent_at + self.per_chat_interval
+        if self._chats[chat]:
+            self._schedule(chat, eligible_at)
+            return
+        del self._chats[chat]
+        if self.per_chat_interval:
+            self._last_sent[chat] = sent_at
+            if len(self._last_sent) > 10000:
+                cutoff = time.monotonic() - self.per_chat_interval
+                self._last_sent = {c: t for c, t in self._last_sent.items() if t > cutoff}
+
+    async def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued message has been sent
+
+        Returns:
+            False if messages were still queued or in flight after timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queued or self._in_flight:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.05)
+        return True
+
+    async def stop(self, drain: bool = True, timeout: Optional[float] = 30):
+        """
+        Stop the scheduler
+
+        Args:
+            drain: Send queued messages before stopping
+            timeout: Maximum seconds to wait for the drain
+        """
+        if not self._scheduler:
+            return
+        if drain and not await self.join(timeout):
+            logger.warning(f"Send queue stopped with {self._queued} messages unsent")
+
+        self._scheduler.cancel()
+        for task in self._sends:
+            task.cancel()
+        await asyncio.gather(self._scheduler, *self._sends, return_exceptions=True)
+        self._scheduler = None
+
+        # Anyone still waiting on a message hears it won't be sent
+        for queue in self._chats.values():
+            for item in queue:
+                if not item.future.done():
+                    item.future.set_exception(ConnectionError("WhatsApp send queue stopped"))
+        self._chats.clear()
+        self._ready.clear()
+        self._cooling.clear()
+        self._queued = 0
+        self._in_flight = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and send counters"""
+        return {
+            "queued": self._queued,
+            "in_flight": self._in_flight,
+            "chats": len(self._chats),
+            "peak_queued": self.peak_queued,
+            "sent": self.sent,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "requeued": self.requeued,
+            "paused": self._paused,
+            "avg_queue_delay_ms": round(self._delay_total / self._dispatched * 1000, 1) if self._dispatched else 0.0
+        }
@@ -0,0 +1,167 @@
+"""
+WhatsApp Supervisor - Several WhatsApp sessions (numbers) behind one interface
+"""
+import asyncio
+import logging
+import zlib
+from typing import Any, Callable, Dict, List, Optional
+
+from .dispatcher import MessageDispatcher
+from .send_queue import PRIORITY_REPLY
+from .whatsapp_service import WhatsAppService
+
+logger = logging.getLogger(__name__)
+
+
+class WhatsAppSupervisor:
+    """
+    Run one bridge process per WhatsApp session
+
+    Each session is a separate WhatsApp number with its own Node bridge,
+    browser, LocalAuth directory and outbound queue, so capacity grows with
+    the number of sessions. Incoming messages from every session go to one
+    dispatcher; each message carries the "session" that received it.
+    Replies are routed back to the session the chat last wrote to, unless
+    a session is given explicitly; chats with no history are spread over
+    ready sessions by a stable hash.
+
+    Has the same start / send_message / stop interface as WhatsAppService.
+    """
+
+    def __init__(
+        self,
+        sessions: List[str],
+        message_handler: Optional[Callable] = None,
+        max_concurrent_messages: int = 16,
+        max_pending_messages: int = 1000,
+        max_routes: int = 100000,
+        **session_options: Any
+    ):
+        """
+        Initialize supervisor
+
+        Args:
+            sessions: Session names, one bridge each
+            message_handler: Async callback for messages from any session
+            max_concurrent_messages: Messages handled in parallel (all sessions)
+            max_pending_messages: Incoming backlog before reading pauses
+            max_routes: Chats whose session is remembered for replies
+            **session_options: Passed to each WhatsAppService (rates, timeouts, ...)
+        """
+        if not sessions:
+            raise ValueError("At least one session is required")
+        if len(set(sessions)) != len(sessions):
+            raise ValueError("Session names must be unique")
+
+        self.message_handler = message_handler
+        self.max_routes = max_routes
+        self.dispatcher = (
+            MessageDispatcher(
+                self._handle_message,
+                max_workers=max_concurrent_messages,
+                max_pending=max_pending_messages,
+                # The same customer may write to two numbers at once
+                key_func=lambda message: f"{message.get('session')}:{message.get('from', '')}"
+            )
+            if message_handler else None
+        )
+        self.shards: Dict[str, WhatsAppService] = {
+            name: WhatsAppService(session_name=name, dispatcher=self.dispatcher, **session_options)
+            for name in sessions
+        }
+        client_ids = [shard.client_id for shard in self.shards.values()]
+        if len(set(client_ids)) != len(client_ids):
+            raise ValueError("Sessions must not share a LocalAuth client id")
+
+        # chat -> session it last wrote to, oldest first
+        self._routes: Dict[str, str] = {}
+
+    @property
+    def is_ready(self) -> bool:
+        """True when at least one session can send"""
+        return any(shard.is_ready for shard in self.shards.values())
+
+    async def start(self):
+        """Start every session's bridge"""
+        if self.dispatcher:
+            self.dispatcher.start()
+        # Sessions share one toolchain check, then launch in parallel
+        await asyncio.gather(*(shard.start() for shard in self.shards.values()))
+        logger.info(f"WhatsApp supervisor started {len(self.shards)} session(s)")
+
+    async def _handle_message(self, message: Dict):
+        """Remember which session a chat uses, then run the handler"""
+        chat, session = message.get("from"), message.get("session")
+        if chat and session:
+            self._routes.pop(chat, None)
+            self._routes[chat] = session
+            if len(self._routes) > self.max_routes:
+                del self._routes[next(iter(self._routes))]
+        await self.message_handler(message)
+
+    def shard_for(self, to: str, session: Optional[str] = None) -> WhatsAppService:
+        """
+        Pick the session that sends to a chat
+
+        Raises:
+            ValueError: If an unknown session is requested
+        """
+        if session is not None:
+            if session not in self.shards:
+                raise ValueError(f"Unknown WhatsApp session: {session}")
+            return self.shards[session]
+
+        routed = self._routes.get(to)
+        if routed is not None:
+            return self.shards[routed]
+
+        candidates = [shard for shard in self.shards.values() if shard.is_ready]
+        candidates = candidates or list(self.shards.values())
+        return candidates[zlib.crc32(to.encode()) % len(candidates)]
+
+    async def send_message(
+        self,
+        to: str,
+        message: str,
+        timeout: Optional[float] = None,
+        priority: int = PRIORITY_REPLY,
+        session: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Send message from the session that serves the chat
+
+        Args:
+            to: Phone number (format: 5511999999999@c.us)
+            message: Message text
+            timeout: Seconds to wait for the confirmation
+            priority: PRIORITY_REPLY or PRIORITY_PROACTIVE
+            session: Send from this session instead of the routed one
+
+        Returns:
+            Confirmation from the bridge: {"to", "messageId"}
+        """
+        shard = self.shard_for(to, session)
+        return await shard.send_message(to, message, timeout=timeout, priority=priority)
+
+    async def stop(self):
+        """Stop all sessions"""
+        # Let in-flight replies finish while the bridges can still send them
+        await asyncio.gather(*(shard.stop_inbound() for shard in self.shards.values()))
+        if self.dispatcher:
+            await self.dispatcher.stop()
+        await asyncio.gather(*(shard.stop() for shard in self.shards.values()))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-session health and totals"""
+        shards = {name: shard.get_stats() for name, shard in self.shards.items()}
+        stats = {
+            "sessions": len(shards),
+            "ready_sessions": sum(1 for shard in shards.values() if shard["ready"]),
+            "running_sessions": sum(1 for shard in shards.values() if shard["running"]),
+            "restarts": sum(shard["restarts"] for shard in shards.values()),
+            "routes": len(self._routes),
+            "shards": shards
+        }
+        if self.dispatcher:
+            stats["dispatcher"] = self.dispatcher.get_stats()
+        return stats
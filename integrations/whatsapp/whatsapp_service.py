@@ -3,139 +3,79 @@ WhatsApp Service - Integration with WhatsApp Web
 Uses whatsapp-web.js via subprocess bridge
 """
 import asyncio
+import hashlib
+import itertools
 import json
 import logging
-from typing import Optional, Dict, Callable
+import re
+import time
+from collections import deque
+from typing import Any, Deque, Optional, Dict, Callable, Tuple
 from pathlib import Path
-import subprocess
 
-logger = logging.getLogger(__name__)
-
-
-class WhatsAppService:
-    """WhatsApp integration service"""
-
-    def __init__(
-        self,
-        session_name: str = "chronyx-whatsapp",
-        message_handler: Optional[Callable] = None
-    ):
-        """
-        Initialize WhatsApp service
-
-        Args:
-            session_name: Session name for WhatsApp auth
-            message_handler: Async callback for processing messages
-        """
-        self.session_name = session_name
-        self.message_handler = message_handler
-        self.is_ready = False
-        self.qr_code = None
-        self.client_info = None
-        self.process = None
+from .dispatcher import MessageDispatcher
+from .send_queue import PRIORITY_REPLY, SendQueue
 
-    async def start(self):
-        """Start WhatsApp client"""
-        logger.info("Starting WhatsApp service...")
-
-        # Check if Node.js is installed
-        try:
-            result = subprocess.run(
-                ["node", "--version"],
-                capture_output=True,
-                text=True
-            )
-            logger.info(f"Node.js version: {result.stdout.strip()}")
-        except FileNotFoundError:
-            raise RuntimeError(
-                "Node.js is not installed. Please install Node.js first:\n"
-                "  curl -fsSL https://deb.nodesource.com/setup_18.x | sudo -E bash -\n"
-                "  sudo apt-get install -y nodejs"
-            )
-
-        # Check if whatsapp-web.js is installed
-        node_modules = Path("integrations/whatsapp/node_modules")
-        if not node_modules.exists():
-            logger.info("Installing whatsapp-web.js dependencies...")
-            await self._install_dependencies()
-
-        # Start the WhatsApp bridge
-        await self._start_bridge()
-
-    async def _install_dependencies(self):
-        """Install Node.js dependencies"""
-        package_json = Path("integrations/whatsapp/package.json")
-
-        if not package_json.exists():
-            # Create package.json
-            package_data = {
-                "name": "chronyx-whatsapp",
-                "version": "1.0.0",
-                "description": "WhatsApp integration for Chronyx",
-                "dependencies": {
-                    "whatsapp-web.js": "^1.23.0",
-                    "qrcode-terminal": "^0.12.0"
-                }
-            }
-
-            with open(package_json, "w") as f:
-                json.dump(package_data, f, indent=2)
-
-        # Run npm install
-        process = await asyncio.create_subprocess_exec(
-            "npm", "install",
-            cwd="integrations/whatsapp",
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
-
-        stdout, stderr = await process.communicate()
-
-        if process.returncode != 0:
-            raise RuntimeError(f"Failed to install dependencies: {stderr.decode()}")
-
-        logger.info("Dependencies installed successfully")
-
-    async def _start_bridge(self):
-        """Start Node.js bridge process"""
-        bridge_script = Path("integrations/whatsapp/bridge.js")
-
-        if not bridge_script.exists():
-            # Create bridge script
-            self._create_bridge_script()
-
-        # Start Node.js process
-        self.process = await asyncio.create_subprocess_exec(
-            "node", str(bridge_script),
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-            cwd="integrations/whatsapp"
-        )
+logger = logging.getLogger(__name__)
 
-        # Start reading output
-        asyncio.create_task(self._read_output())
+# LocalAuth only accepts these characters in a client id
+_SESSION_NAME = re.compile(r"[\w-]+")
+
+# Before sessions had names, the bot ("chronyx-bot") and the service
+# ("chronyx-whatsapp") kept their login under this LocalAuth client id;
+# those sessions still use it, so existing deployments stay paired
+LEGACY_CLIENT_ID = "chronyx-session"
+LEGACY_SESSIONS = ("chronyx-bot", "chronyx-whatsapp")
+DEFAULT_AUTH_DIR = ".wwebjs_auth"
+
+WHATSAPP_DIR = Path("integrations/whatsapp")
+MIN_NODE_VERSION = 18
+
+PACKAGE_DATA = {
+    "name": "chronyx-whatsapp",
+    "version": "1.0.0",
+    "description": "WhatsApp integration for Chronyx",
+    "dependencies": {
+        "whatsapp-web.js": "^1.23.0",
+        "qrcode-terminal": "^0.12.0"
+    }
+}
 
-        logger.info("WhatsApp bridge started")
+# Hash of the package.json whose dependencies are installed, kept in node_modules
+_DEPS_STAMP = ".chronyx-deps"
 
-    def _create_bridge_script(self):
-        """Create Node.js bridge script"""
-        script_content = """
+# Protocol: one JSON object per line in both directions. Commands carry an
+# "id" and are answered by a {"type": "response", "id": ...} line; other
+# lines from the bridge are events ({"type", "data"}).
+BRIDGE_SCRIPT = """
 const { Client, LocalAuth } = require('whatsapp-web.js');
 const qrcode = require('qrcode-terminal');
+const readline = require('readline');
+
+// Usage: node bridge.js <client id> <auth dir>
+const [clientId = 'chronyx-session', authDir = '.wwebjs_auth'] = process.argv.slice(2);
 
 const client = new Client({
     authStrategy: new LocalAuth({
-        clientId: 'chronyx-session'
+        clientId,
+        dataPath: authDir
     }),
     puppeteer: {
         args: ['--no-sandbox', '--disable-setuid-sandbox']
     }
 });
 
-// Send events to Python via stdout
+// Send frames to Python via stdout, one JSON object per line
+function writeFrame(frame) {
+    process.stdout.write(JSON.stringify(frame) + '\\n');
+}
+
 function sendEvent(type, data) {
-    console.log(JSON.stringify({ type, data }));
+    writeFrame({ type, data });
+}
+
+function sendResponse(id, data, error) {
+    writeFrame({ type: 'response', id, ok: !error, data: data || null, error: error || null });
 }
 
 client.on('qr', (qr) => {
@@ -159,128 +99,715 @@ client.on('disconnected', (reason) => {
     sendEvent('disconnected', { reason });
 });
 
+// While Python's inbox is full, incoming messages wait here
+let inboundPaused = false;
+const held = [];
+
 client.on('message', async (message) => {
-    sendEvent('message', {
+    const data = {
         from: message.from,
         body: message.body,
         timestamp: message.timestamp,
         isGroup: message.from.includes('@g.us')
-    });
+    };
+    if (inboundPaused) {
+        held.push(data);
+    } else {
+        sendEvent('message', data);
+    }
 });
 
-// Handle commands from Python via stdin
-process.stdin.on('data', async (data) => {
-    try {
-        const command = JSON.parse(data.toString());
-
-        if (command.type === 'send_message') {
-            await client.sendMessage(command.to, command.message);
-            sendEvent('message_sent', { to: command.to, success: true });
+const commands = {
+    send_message: async (command) => {
+        const sent = await client.sendMessage(command.to, command.message);
+        return { to: command.to, messageId: sent && sent.id ? sent.id._serialized : null };
+    },
+    pause_inbound: async () => {
+        inboundPaused = true;
+        return { held: held.length };
+    },
+    resume_inbound: async () => {
+        inboundPaused = false;
+        while (held.length && !inboundPaused) {
+            sendEvent('message', held.shift());
         }
+        return { held: held.length };
+    }
+};
+
+// Handle commands from Python via stdin, one per line. Commands are not
+// awaited here, so many can be in flight; each is answered by its id.
+readline.createInterface({ input: process.stdin, crlfDelay: Infinity }).on('line', (line) => {
+    if (!line.trim()) {
+        return;
+    }
+    let command;
+    try {
+        command = JSON.parse(line);
     } catch (error) {
-        sendEvent('error', { error: error.message });
+        sendEvent('error', { error: 'Invalid command: ' + error.message });
+        return;
     }
+    const handler = commands[command.type];
+    if (!handler) {
+        sendResponse(command.id, null, 'Unknown command: ' + command.type);
+        return;
+    }
+    handler(command).then(
+        (data) => sendResponse(command.id, data),
+        (error) => sendResponse(command.id, null, error.message || String(error))
+    );
 });
 
 client.initialize();
 
-process.on('SIGTERM', () => {
-    client.destroy();
-    process.exit(0);
-});
+// Close the browser cleanly so the saved session stays valid for the restart
+async function shutdown() {
+    try {
+        await client.destroy();
+    } finally {
+        process.exit(0);
+    }
+}
+
+process.on('SIGTERM', shutdown);
+// Python went away - don't linger holding the session
+process.stdin.on('end', shutdown);
 """
 
-        with open("integrations/whatsapp/bridge.js", "w") as f:
-            f.write(script_content)
 
-        logger.info("Bridge script created")
+class BridgeError(Exception):
+    """The bridge could not carry out a command"""
+    pass
+
+
+async def _run_command(*args: str, cwd: Optional[str] = None) -> Tuple[int, str, str]:
+    """Run a command without blocking the event loop; returns (code, stdout, stderr)"""
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        cwd=cwd,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate()
+    return process.returncode, stdout.decode().strip(), stderr.decode().strip()
+
+
+async def _check_node() -> str:
+    """Return the Node.js version, or raise if Node.js is missing or too old"""
+    try:
+        _, version, _ = await _run_command("node", "--version")
+    except FileNotFoundError:
+        raise RuntimeError(
+            "Node.js is not installed. Please install Node.js first:\n"
+            "  curl -fsSL https://deb.nodesource.com/setup_18.x | sudo -E bash -\n"
+            "  sudo apt-get install -y nodejs"
+        )
+    major = version.lstrip("v").split(".")[0]
+    if not major.isdigit() or int(major) < MIN_NODE_VERSION:
+        raise RuntimeError(f"Node.js {MIN_NODE_VERSION}+ is required (found {version or 'unknown'})")
+    return version
+
+
+async def _ensure_dependencies():
+    """
+    Install the bridge's Node.js dependencies unless already installed
+
+    A successful install records the package.json hash in node_modules,
+    so later starts skip npm entirely until package.json changes.
+    """
+    package_json = WHATSAPP_DIR / "package.json"
+    if not package_json.exists():
+        package_json.write_text(json.dumps(PACKAGE_DATA, indent=2))
+
+    digest = hashlib.sha256(package_json.read_bytes()).hexdigest()
+    node_modules = WHATSAPP_DIR / "node_modules"
+    stamp = node_modules / _DEPS_STAMP
+    if stamp.exists():
+        if stamp.read_text() == digest:
+            return
+    elif node_modules.exists():
+        # Installed before stamps were written - trust it if every package is there
+        dependencies = json.loads(package_json.read_text()).get("dependencies", {})
+        if all((node_modules / name / "package.json").exists() for name in dependencies):
+            stamp.write_text(digest)
+            return
 
-    async def _read_output(self):
-        """Read output from Node.js process"""
-        if not self.process or not self.process.stdout:
+    logger.info("Installing whatsapp-web.js dependencies...")
+    code, _, stderr = await _run_command("npm", "install", cwd=str(WHATSAPP_DIR))
+    if code != 0:
+        raise RuntimeError(f"Failed to install dependencies: {stderr}")
+    stamp.write_text(digest)
+    logger.info("Dependencies installed successfully")
+
+
+# Every session in the process shares one toolchain check
+_toolchain_lock = asyncio.Lock()
+_toolchain_ready = False
+
+
+async def ensure_toolchain():
+    """Check Node.js, install dependencies and write bridge.js (once per process)"""
+    global _toolchain_ready
+    async with _toolchain_lock:
+        if _toolchain_ready:
+            return
+        version = await _check_node()
+        logger.info(f"Node.js version: {version}")
+        await _ensure_dependencies()
+
+        # Rewritten when outdated, so the bridge always speaks our protocol
+        bridge_script = WHATSAPP_DIR / "bridge.js"
+        if not bridge_script.exists() or bridge_script.read_text() != BRIDGE_SCRIPT:
+            bridge_script.write_text(BRIDGE_SCRIPT)
+            logger.info("Bridge script created")
+        _toolchain_ready = True
+
+
+class WhatsAppService:
+    """WhatsApp integration service"""
+
+    def __init__(
+        self,
+        session_name: str = "chronyx-whatsapp",
+        message_handler: Optional[Callable] = None,
+        max_concurrent_messages: int = 16,
+        max_pending_messages: int = 1000,
+        send_timeout: float = 60.0,
+        max_messages_per_second: float = 5.0,
+        per_chat_interval: float = 1.0,
+        max_queued_messages: int = 1000,
+        queue_overflow: str = "wait",
+        auth_dir: str = DEFAULT_AUTH_DIR,
+        client_id: Optional[str] = None,
+        dispatcher: Optional[MessageDispatcher] = None,
+        restart_delay: float = 1.0,
+        max_restart_delay: float = 60.0,
+        read_buffer_limit: int = 1024 * 1024,
+        max_frame_size: int = 16 * 1024 * 1024,
+        max_inbox_size: int = 100
+    ):
+        """
+        Initialize WhatsApp service
+
+        Args:
+            session_name: Session name for WhatsApp auth (letters, digits, _ and -)
+            message_handler: Async callback for processing messages
+            max_concurrent_messages: Messages handled in parallel (across senders)
+            max_pending_messages: Incoming backlog before reading pauses
+            send_timeout: Default seconds to wait for a send to be confirmed
+            max_messages_per_second: Outbound rate across all chats (0 = unlimited)
+            per_chat_interval: Minimum seconds between messages to one chat
+            max_queued_messages: Outbound messages queued or in flight before overflow
+            queue_overflow: "wait" (block the sender) or "reject" (raise
+                SendQueueFull) when the outbound queue is full
+            auth_dir: LocalAuth data directory, relative to integrations/whatsapp
+            client_id: LocalAuth client id; the login is kept in
+                <auth_dir>/session-<client_id> (defaults to session_name,
+                or "chronyx-session" for the default session names)
+            dispatcher: Dispatcher shared with other sessions; incoming
+                messages are submitted to it instead of message_handler
+            restart_delay: Seconds before restarting a crashed bridge, doubled
+                per consecutive crash
+            max_restart_delay: Cap on the restart delay in seconds
+            read_buffer_limit: Bytes buffered per read from the bridge; longer
+                lines are read in chunks of this size
+            max_frame_size: Lines from the bridge longer than this are dropped
+            max_inbox_size: Incoming messages read but not yet accepted by the
+                dispatcher before the bridge is asked to hold new ones
+        """
+        if not _SESSION_NAME.fullmatch(session_name):
+            raise ValueError(f"Invalid session name: {session_name!r}")
+        if client_id is None:
+            client_id = LEGACY_CLIENT_ID if session_name in LEGACY_SESSIONS else session_name
+        if not _SESSION_NAME.fullmatch(client_id):
+            raise ValueError(f"Invalid client id: {client_id!r}")
+
+        self.session_name = session_name
+        self.auth_dir = auth_dir
+        self.client_id = client_id
+        self.message_handler = message_handler
+        self._owns_dispatcher = dispatcher is None
+        self.dispatcher = dispatcher or (
+            MessageDispatcher(
+                message_handler,
+                max_workers=max_concurrent_messages,
+                max_pending=max_pending_messages
+            )
+            if message_handler else None
+        )
+        self.is_ready = False
+        self.qr_code = None
+        self.client_info = None
+        self.process = None
+        self.send_timeout = send_timeout
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.read_buffer_limit = read_buffer_limit
+        self.max_frame_size = max_frame_size
+        self.max_inbox_size = max_inbox_size
+        # Sends cut off by a bridge crash are sent again after the restart
+        self.send_queue = SendQueue(
+            self._send_now,
+            max_per_second=max_messages_per_second,
+            per_chat_interval=per_chat_interval,
+            max_size=max_queued_messages,
+            overflow=queue_overflow,
+            retry_errors=(ConnectionError,)
+        )
+
+        # Commands written to the bridge and not yet answered, by request id
+        self._request_ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+
+        self._bridge_task: Optional[asyncio.Task] = None
+        self._stderr_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        # Last lines the bridge wrote to stderr, logged if it crashes
+        self._stderr_tail: Deque[str] = deque(maxlen=20)
+
+        # Incoming messages between the reader and the dispatcher. The reader
+        # never waits on the dispatcher: responses to our sends arrive on the
+        # same stream, and handlers waiting for them hold dispatcher slots.
+        self._inbox: Deque[Dict] = deque()
+        self._inbox_ready = asyncio.Event()
+        self._inbound_task: Optional[asyncio.Task] = None
+        self._inbound_paused = False
+        self._pause_task: Optional[asyncio.Task] = None
+        self.inbound_pauses = 0
+
+        self.started_at: Optional[float] = None
+        self.last_event_at: Optional[float] = None
+        self.disconnects = 0
+        self.restarts = 0
+        self._start_requested: Optional[float] = None
+        self._down_since: Optional[float] = None
+        self.toolchain_seconds: Optional[float] = None
+        self.startup_seconds: Optional[float] = None
+        self.last_recovery_seconds: Optional[float] = None
+
+        self.frames = 0
+        self.oversized_frames = 0
+        self.dropped_frames = 0
+        self.stderr_bytes = 0
+
+    async def start(self):
+        """Start WhatsApp client (returns once the bridge process is running)"""
+        if self._bridge_task:
             return
+        logger.info(f"Starting WhatsApp service ({self.session_name})...")
+        self._start_requested = time.monotonic()
+
+        await ensure_toolchain()
+        self.toolchain_seconds = round(time.monotonic() - self._start_requested, 3)
+
+        # Start handling incoming messages and pacing outgoing ones; sends
+        # wait in the queue until the bridge reports ready
+        if self.dispatcher:
+            self.dispatcher.start()
+            self._inbound_task = asyncio.create_task(self._forward_inbound())
+        self.send_queue.pause()
+        self.send_queue.start()
+
+        # Start the WhatsApp bridge and keep it running
+        self._stopping = False
+        await self._start_bridge()
+        self._bridge_task = asyncio.create_task(self._supervise())
 
+    async def _start_bridge(self):
+        """Start Node.js bridge process"""
+        # The same client id and auth dir, so a restart reuses the saved login
+        self.process = await asyncio.create_subprocess_exec(
+            "node", "bridge.js", self.client_id, self.auth_dir,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=str(WHATSAPP_DIR),
+            limit=self.read_buffer_limit
+        )
+        self._stderr_tail.clear()
+        self._stderr_task = asyncio.create_task(self._drain_stderr(self.process))
+        self.started_at = time.monotonic()
+        logger.info(f"WhatsApp bridge started ({self.session_name}, pid {self.process.pid})")
+
+    async def _supervise(self):
+        """Read the bridge's output, restarting it with backoff when it exits"""
+        delay = self.restart_delay
         while True:
-            try:
-                line = await self.process.stdout.readline()
-                if not line:
+            await self._read_output()
+            code = await self.process.wait()
+            # Let the last stderr lines arrive (a crash explains itself there)
+            await asyncio.wait([self._stderr_task], timeout=5)
+            self._bridge_down()
+            if self._stopping:
+                return
+            if self._stderr_tail:
+                logger.warning(
+                    f"WhatsApp bridge ({self.session_name}) stderr before exit:\n"
+                    + "\n".join(self._stderr_tail)
+                )
+
+            # A bridge that ran for a while starts the backoff over
+            if time.monotonic() - self.started_at > self.max_restart_delay:
+                delay = self.restart_delay
+            while True:
+                logger.warning(
+                    f"WhatsApp bridge ({self.session_name}) exited with code {code}, "
+                    f"restarting in {delay:g}s"
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_restart_delay)
+                if self._stopping:
+                    return
+                try:
+                    await self._start_bridge()
                     break
+                except Exception as e:
+                    logger.error(f"Failed to restart WhatsApp bridge ({self.session_name}): {e}")
+            self.restarts += 1
 
-                data = line.decode().strip()
-                if not data:
-                    continue
+    def _bridge_down(self):
+        """Hold outgoing messages and fail commands the bridge will never answer"""
+        self.is_ready = False
+        self.send_queue.pause()
+        # A new bridge starts out delivering messages
+        self._inbound_paused = False
+        if self._down_since is None:
+            self._down_since = time.monotonic()
+        self._fail_pending(ConnectionError("WhatsApp bridge exited"))
+
+    async def _drain_stderr(self, process: asyncio.subprocess.Process):
+        """
+        Keep reading the bridge's stderr
 
-                # Try to parse as JSON event
-                try:
-                    event = json.loads(data)
-                    await self._handle_event(event)
-                except json.JSONDecodeError:
-                    # Not JSON, just log it
-                    logger.info(f"WhatsApp: {data}")
+        Puppeteer can log a lot; an unread pipe fills up and blocks the
+        bridge. Lines go to the debug log and the last few are kept.
+        """
+        partial = b""
+        while True:
+            chunk = await process.stderr.read(65536)
+            if not chunk:
+                break
+            self.stderr_bytes += len(chunk)
+            lines = (partial + chunk).split(b"\n")
+            # An unterminated line is kept, but only its start
+            partial = lines.pop()[:4096]
+            for line in lines:
+                text = line.decode(errors="replace").rstrip()
+                if text:
+                    self._stderr_tail.append(text[:500])
+                    logger.debug(f"WhatsApp bridge ({self.session_name}) stderr: {text}")
+
+    async def _read_frame(self, stdout: asyncio.StreamReader) -> Optional[bytes]:
+        """
+        Read one line from the bridge, however long
 
-            except Exception as e:
-                logger.error(f"Error reading output: {e}")
+        Lines longer than the read buffer are read in chunks and joined;
+        lines longer than max_frame_size are consumed and dropped (an empty
+        frame is returned).
+
+        Returns:
+            The line, or None at end of output
+        """
+        parts = []
+        size = 0
+        while True:
+            try:
+                chunk = await stdout.readuntil(b"\n")
+                complete = True
+            except asyncio.LimitOverrunError as e:
+                # No newline within the buffer limit - take what's buffered
+                chunk = await stdout.read(e.consumed)
+                complete = False
+            except asyncio.IncompleteReadError as e:
+                if e.partial or parts:
+                    # Output ended in the middle of a line
+                    self.dropped_frames += 1
+                return None
+
+            size += len(chunk)
+            if size <= self.max_frame_size:
+                parts.append(chunk)
+            if not complete:
+                continue
+
+            if size > self.read_buffer_limit:
+                self.oversized_frames += 1
+            if size > self.max_frame_size:
+                self.dropped_frames += 1
+                logger.warning(f"Dropped a {size:,}-byte frame from the WhatsApp bridge")
+                return b""
+            return b"".join(parts)
+
+    async def _read_output(self):
+        """Read events and responses from the bridge until its output ends"""
+        if not self.process or not self.process.stdout:
+            return
+
+        while True:
+            frame = await self._read_frame(self.process.stdout)
+            if frame is None:
                 break
+            frame = frame.strip()
+            if not frame:
+                continue
+            self.frames += 1
 
-    async def _handle_event(self, event: Dict):
-        """Handle events from WhatsApp"""
+            # Try to parse as JSON event
+            try:
+                event = json.loads(frame)
+            except ValueError:
+                # Not JSON (e.g. the QR code drawing), just log it
+                logger.info(f"WhatsApp: {frame.decode(errors='replace')}")
+                continue
+
+            # A failing event must not stop the reader
+            try:
+                self._handle_event(event)
+            except Exception as e:
+                logger.error(f"Error handling WhatsApp event: {e}")
+
+    def _fail_pending(self, error: Exception):
+        """Fail every command still waiting for a response"""
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def _handle_response(self, frame: Dict):
+        """Resolve the command a response line answers"""
+        future = self._pending.pop(frame.get("id"), None)
+        if future is None or future.done():
+            # Caller already gave up (timeout or cancellation)
+            return
+        if frame.get("ok"):
+            future.set_result(frame.get("data") or {})
+        else:
+            future.set_exception(BridgeError(frame.get("error") or "Unknown bridge error"))
+
+    def _handle_event(self, event: Dict):
+        """Handle events from WhatsApp (never blocks the reader)"""
         event_type = event.get("type")
         data = event.get("data", {})
+        self.last_event_at = time.monotonic()
 
-        if event_type == "qr":
+        if event_type == "response":
+            self._handle_response(event)
+
+        elif event_type == "qr":
             self.qr_code = data.get("qr")
             logger.info("QR Code received - scan with WhatsApp app")
 
         elif event_type == "ready":
             self.is_ready = True
+            self.qr_code = None
+            now = time.monotonic()
+            if self.startup_seconds is None:
+                self.startup_seconds = round(now - self._start_requested, 3)
+            elif self._down_since is not None:
+                self.last_recovery_seconds = round(now - self._down_since, 3)
+            self._down_since = None
+            self.send_queue.resume()
             logger.info("✅ WhatsApp is ready!")
 
         elif event_type == "authenticated":
             logger.info("✅ Authenticated successfully")
 
         elif event_type == "message":
-            # Handle incoming message
-            if self.message_handler:
-                await self.message_handler(data)
+            # Tell the handler which number received it
+            data["session"] = self.session_name
+            if self.dispatcher:
+                self._inbox.append(data)
+                self._inbox_ready.set()
+                if len(self._inbox) >= self.max_inbox_size and not self._inbound_paused:
+                    # Handlers are behind - hold new messages in the bridge
+                    self._inbound_paused = True
+                    self.inbound_pauses += 1
+                    self._pause_task = asyncio.create_task(self._set_inbound_flow(paused=True))
 
         elif event_type == "error":
             logger.error(f"WhatsApp error: {data.get('error')}")
 
         elif event_type == "disconnected":
-            logger.warning(f"Disconnected: {data.get('reason')}")
-            self.is_ready = False
+            logger.warning(f"Disconnected ({self.session_name}): {data.get('reason')}")
+            self.disconnects += 1
+            # The client can't reconnect by itself - restart the bridge
+            self._bridge_down()
+            if self.process and self.process.returncode is None:
+                self.process.terminate()
+
+    async def _forward_inbound(self):
+        """Move incoming messages from the inbox to the dispatcher"""
+        while True:
+            if not self._inbox:
+                self._inbox_ready.clear()
+                await self._inbox_ready.wait()
+                continue
+            # Waits while the dispatcher backlog is full; only this path stalls
+            await self.dispatcher.submit(self._inbox[0])
+            self._inbox.popleft()
+            if self._inbound_paused and len(self._inbox) <= self.max_inbox_size // 2:
+                self._inbound_paused = False
+                await self._set_inbound_flow(paused=False)
+
+    async def _set_inbound_flow(self, paused: bool):
+        """Ask the bridge to hold or release incoming messages"""
+        try:
+            await self._request({"type": "pause_inbound" if paused else "resume_inbound"}, 10)
+        except Exception as e:
+            # A restarted bridge delivers again anyway
+            logger.warning(f"Could not {'pause' if paused else 'resume'} WhatsApp inbound ({self.session_name}): {e}")
+
+    async def stop_inbound(self, timeout: Optional[float] = 30):
+        """
+        Hand the messages already read to the dispatcher, then stop forwarding
+
+        Args:
+            timeout: Maximum seconds to wait for the inbox to empty
+        """
+        if not self._inbound_task:
+            return
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._inbox and (deadline is None or time.monotonic() < deadline):
+            await asyncio.sleep(0.05)
+        if self._inbox:
+            logger.warning(f"WhatsApp ({self.session_name}) stopped with {len(self._inbox)} messages unhandled")
+        self._inbound_task.cancel()
+        await asyncio.gather(self._inbound_task, return_exceptions=True)
+        self._inbound_task = None
+
+    async def _request(self, command: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """
+        Send a command to the bridge and wait for its response
+
+        Commands are pipelined: any number may be in flight at once, and
+        each response is matched to its command by request id.
+
+        Raises:
+            BridgeError: If the bridge reports the command failed
+            asyncio.TimeoutError: If no response arrives within timeout
+            ConnectionError: If the bridge exits before answering
+        """
+        if not self.process or not self.process.stdin or self.process.returncode is not None:
+            raise ConnectionError("WhatsApp bridge is not running")
 
-    async def send_message(self, to: str, message: str):
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            self.process.stdin.write(
+                (json.dumps({"id": request_id, **command}) + "\n").encode()
+            )
+            await self.process.stdin.drain()
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _send_now(self, to: str, message: str) -> Dict[str, Any]:
+        """Write one message to the bridge (called by the send queue)"""
+        return await self._request(
+            {"type": "send_message", "to": to, "message": message},
+            self.send_timeout
+        )
+
+    async def send_message(
+        self,
+        to: str,
+        message: str,
+        timeout: Optional[float] = None,
+        priority: int = PRIORITY_REPLY
+    ) -> Dict[str, Any]:
         """
         Send message via WhatsApp
 
+        The message goes through the outbound queue, which paces sends
+        globally and per chat. Returns once WhatsApp has accepted it.
+        Messages to different chats are sent concurrently. While the
+        bridge is starting or restarting, messages wait in the queue.
+
         Args:
             to: Phone number (format: 5511999999999@c.us)
             message: Message text
-        """
-        if not self.is_ready:
-            raise RuntimeError("WhatsApp is not ready")
+            timeout: Seconds to wait for queueing plus confirmation
+                (defaults to send_timeout)
+            priority: PRIORITY_REPLY, or PRIORITY_PROACTIVE for messages
+                nobody is waiting on (sent after queued replies)
 
-        if not self.process or not self.process.stdin:
-            raise RuntimeError("WhatsApp bridge is not running")
+        Returns:
+            Confirmation from the bridge: {"to", "messageId"}
 
-        command = {
-            "type": "send_message",
-            "to": to,
-            "message": message
-        }
+        Raises:
+            BridgeError: If WhatsApp rejected the message
+            SendQueueFull: If the queue is full and queue_overflow is "reject"
+            asyncio.TimeoutError: If the send wasn't confirmed in time
+        """
+        if not self._bridge_task:
+            raise RuntimeError("WhatsApp service is not running")
 
-        self.process.stdin.write(
-            (json.dumps(command) + "\n").encode()
+        # Timing out withdraws the message if it hasn't gone out yet
+        return await asyncio.wait_for(
+            self._enqueue(to, message, priority),
+            self.send_timeout if timeout is None else timeout
         )
-        await self.process.stdin.drain()
+
+    async def _enqueue(self, to: str, message: str, priority: int) -> Dict[str, Any]:
+        future = await self.send_queue.submit(to, message, priority)
+        return await future
 
     async def stop(self):
         """Stop WhatsApp client"""
-        if self.process:
+        # Let in-flight replies finish while the bridge can still send them
+        await self.stop_inbound()
+        if self.dispatcher and self._owns_dispatcher:
+            await self.dispatcher.stop()
+        await self.send_queue.stop()
+
+        self._stopping = True
+        self.is_ready = False
+        if self.process and self.process.returncode is None:
             self.process.terminate()
-            await self.process.wait()
-            logger.info("WhatsApp service stopped")
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout=10)
+            except asyncio.TimeoutError:
+                self.process.kill()
+                await self.process.wait()
+        if self._bridge_task:
+            # May be waiting out a restart backoff
+            self._bridge_task.cancel()
+            await asyncio.gather(self._bridge_task, self._stderr_task, return_exceptions=True)
+            self._bridge_task = None
+        logger.info(f"WhatsApp service stopped ({self.session_name})")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get bridge health, outbound queue and dispatcher metrics"""
+        now = time.monotonic()
+        running = self.process is not None and self.process.returncode is None
+        stats = {
+            "session": self.session_name,
+            "ready": self.is_ready,
+            "running": running,
+            "pid": self.process.pid if running else None,
+            "awaiting_qr": self.qr_code is not None and not self.is_ready,
+            "uptime": round(now - self.started_at, 1) if running and self.started_at else 0.0,
+            "last_event_age": round(now - self.last_event_at, 1) if self.last_event_at else None,
+            "disconnects": self.disconnects,
+            "restarts": self.restarts,
+            "toolchain_seconds": self.toolchain_seconds,
+            "startup_seconds": self.startup_seconds,
+            "last_recovery_seconds": self.last_recovery_seconds,
+            "pending_requests": len(self._pending),
+            "frames": self.frames,
+            "oversized_frames": self.oversized_frames,
+            "dropped_frames": self.dropped_frames,
+            "stderr_bytes": self.stderr_bytes,
+            "inbox": len(self._inbox),
+            "inbound_paused": self._inbound_paused,
+            "inbound_pauses": self.inbound_pauses,
+            "send_queue": self.send_queue.get_stats()
+        }
+        if self.dispatcher and self._owns_dispatcher:
+            stats["dispatcher"] = self.dispatcher.get_stats()
+        return stats
 
     def format_phone_number(self, number: str) -> str:
         """
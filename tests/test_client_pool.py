@@ -0,0 +1,22 @@
+"""
+ClientRegistry shared provider clients
+"""
+import asyncio
+
+import pytest
+
+from core.client_pool import ClientRegistry
+
+
+@pytest.mark.parametrize("provider", ["openai", "anthropic"])
+def test_pooled_client_is_accepted_by_the_sdk(provider):
+    async def run():
+        registry = ClientRegistry()
+        client = registry.get(provider, "test-key")
+        assert registry.get(provider, "test-key") is client
+        assert registry.get(provider, "other-key") is not client
+        await registry.close()
+        return client
+
+    client = asyncio.run(run())
+    assert client.max_retries == 0
@@ -0,0 +1,96 @@
+"""
+ConversationStore per-user memory, ordering and eviction
+"""
+import asyncio
+
+from core.conversation_store import ConversationStore
+
+
+def test_each_user_keeps_a_bounded_history():
+    store = ConversationStore(max_messages=3)
+    for n in range(5):
+        store.append("ana", "user", f"msg {n}")
+    store.append("bia", "user", "oi")
+
+    assert [msg["content"] for msg in store.history("ana")] == ["msg 2", "msg 3", "msg 4"]
+    assert store.context_window("ana", limit=2) == [
+        {"role": "user", "content": "msg 3"},
+        {"role": "user", "content": "msg 4"}
+    ]
+    assert store.message_count("bia") == 1
+    assert store.history("nobody") == []
+
+
+def test_turns_from_one_user_do_not_interleave():
+    store = ConversationStore()
+
+    async def turn(text, delay):
+        async with store.lock("ana"):
+            store.append("ana", "user", text)
+            await asyncio.sleep(delay)
+            store.append("ana", "assistant", f"re: {text}")
+
+    async def run():
+        # The first turn is slower, but holds the lock until it is done
+        await asyncio.gather(turn("first", 0.05), turn("second", 0))
+
+    asyncio.run(run())
+
+    assert [msg["content"] for msg in store.history("ana")] == [
+        "first", "re: first", "second", "re: second"
+    ]
+
+
+def test_different_users_do_not_wait_for_each_other():
+    store = ConversationStore()
+
+    async def run():
+        async with store.lock("ana"):
+            # Another user's turn completes while ana's is in progress
+            async with asyncio.timeout(1):
+                async with store.lock("bia"):
+                    store.append("bia", "user", "oi")
+
+    asyncio.run(run())
+
+    assert store.message_count("bia") == 1
+
+
+def test_idle_and_excess_users_are_evicted_unless_busy():
+    store = ConversationStore(max_users=2, idle_ttl=3600)
+
+    async def run():
+        store.append("ana", "user", "oi")
+        store.append("bia", "user", "oi")
+        async with store.lock("ana"):
+            # ana is the least recently active, but a turn is in progress
+            store._conversations.move_to_end("bia")
+            store.append("caio", "user", "oi")
+            return "ana" in store, "bia" in store, "caio" in store
+
+    assert asyncio.run(run()) == (True, False, True)
+    assert len(store) == 2
+
+    store.idle_ttl = 0
+    assert store.evict_idle() == 2
+    assert len(store) == 0
+
+
+def test_summary_is_rejected_if_the_conversation_changed_meanwhile():
+    store = ConversationStore()
+    for n in range(6):
+        store.append("ana", "user", f"msg {n}")
+
+    summary, messages, base, upto = store.summary_candidates("ana", keep_recent=2)
+    assert summary == ""
+    assert [msg["content"] for msg in messages] == ["msg 0", "msg 1", "msg 2", "msg 3"]
+
+    # Cleared while the summary was being written
+    store.clear("ana")
+    store.append("ana", "user", "new start")
+    assert not store.set_summary("ana", "old summary", base, upto)
+
+    summary, messages, base, upto = store.summary_candidates("ana", keep_recent=0)
+    assert store.set_summary("ana", "Ana started over", base, upto)
+    assert store.summary("ana") == "Ana started over"
+    assert store.unsummarized_count("ana") == 0
@@ -0,0 +1,80 @@
+"""
+MessageDispatcher per-sender ordering and concurrency
+"""
+import asyncio
+
+from integrations.whatsapp.dispatcher import MessageDispatcher
+
+
+def test_messages_from_one_sender_are_handled_in_order():
+    handled = []
+    running = set()
+
+    async def handler(message):
+        sender = message["from"]
+        assert sender not in running, "sender handled twice at once"
+        running.add(sender)
+        # Later messages finish faster, so only ordering keeps them in line
+        await asyncio.sleep(0.01 * (5 - message["n"]))
+        handled.append((sender, message["n"]))
+        running.discard(sender)
+
+    async def run():
+        dispatcher = MessageDispatcher(handler, max_workers=4)
+        for n in range(5):
+            for sender in ("a", "b"):
+                await dispatcher.submit({"from": sender, "n": n})
+        await dispatcher.stop()
+
+    asyncio.run(run())
+
+    for sender in ("a", "b"):
+        assert [n for who, n in handled if who == sender] == list(range(5))
+
+
+def test_different_senders_are_handled_concurrently():
+    senders = ["a", "b", "c", "d"]
+
+    async def run():
+        arrived = asyncio.Event()
+        waiting = set()
+
+        async def handler(message):
+            # Every handler waits until all senders are in progress at once
+            waiting.add(message["from"])
+            if len(waiting) == len(senders):
+                arrived.set()
+            await asyncio.wait_for(arrived.wait(), 1)
+
+        dispatcher = MessageDispatcher(handler, max_workers=len(senders))
+        for sender in senders:
+            await dispatcher.submit({"from": sender})
+        await dispatcher.stop()
+        return dispatcher.get_stats()
+
+    stats = asyncio.run(run())
+
+    assert stats["processed"] == len(senders)
+    assert stats["failed"] == 0
+
+
+def test_a_failing_message_does_not_block_the_sender():
+    handled = []
+
+    async def handler(message):
+        if message["body"] == "boom":
+            raise RuntimeError("handler failed")
+        handled.append(message["body"])
+
+    async def run():
+        dispatcher = MessageDispatcher(handler, max_workers=2)
+        for body in ("one", "boom", "two"):
+            await dispatcher.submit({"from": "a", "body": body})
+        await dispatcher.stop()
+        return dispatcher.get_stats()
+
+    stats = asyncio.run(run())
+
+    assert handled == ["one", "two"]
+    assert stats["failed"] == 1
+    assert stats["pending"] == 0
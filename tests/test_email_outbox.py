@@ -0,0 +1,100 @@
+"""
+EmailOutbox claims shared between processes
+"""
+import asyncio
+import sqlite3
+import time
+
+from integrations.email.outbox import EmailOutbox
+
+
+def test_starting_a_second_outbox_leaves_live_claims_alone(tmp_path):
+    path = str(tmp_path / "outbox.db")
+
+    async def run():
+        release = asyncio.Event()
+        first_sent, second_sent = [], []
+
+        async def slow_deliver(payload):
+            await release.wait()
+            first_sent.append(payload["to"])
+
+        async def deliver(payload):
+            second_sent.append(payload["to"])
+
+        first = EmailOutbox(slow_deliver, path=path, workers=1)
+        await first.enqueue({"to": "cliente@example.com"})
+        await asyncio.sleep(0.1)
+
+        # Another process starts on the same file while the send is in flight
+        second = EmailOutbox(deliver, path=path, workers=1)
+        second.start()
+        await asyncio.sleep(0.2)
+        assert second_sent == []
+
+        release.set()
+        await asyncio.sleep(0.1)
+        await first.close()
+        await second.close()
+        return first_sent, second_sent
+
+    assert asyncio.run(run()) == (["cliente@example.com"], [])
+
+
+def test_claims_with_an_expired_lease_are_delivered_again(tmp_path):
+    path = str(tmp_path / "outbox.db")
+    conn = sqlite3.connect(path)
+    EmailOutbox(None, path=path)._conn.close()
+    # Left behind by a process that died while sending
+    conn.execute(
+        "INSERT INTO email_outbox (payload, status, next_attempt, created_at, claimed_by, claimed_until) "
+        "VALUES (?, 'sending', ?, ?, 'dead', ?)",
+        ('{"to": "cliente@example.com"}', time.time(), time.time(), time.time() - 1)
+    )
+    conn.commit()
+    conn.close()
+
+    async def run():
+        sent = []
+
+        async def deliver(payload):
+            sent.append(payload["to"])
+
+        outbox = EmailOutbox(deliver, path=path, workers=1)
+        outbox.start()
+        await asyncio.sleep(0.2)
+        await outbox.close()
+        return sent
+
+    assert asyncio.run(run()) == ["cliente@example.com"]
+
+
+def test_a_database_error_does_not_stop_delivery(tmp_path):
+    path = str(tmp_path / "outbox.db")
+
+    async def run():
+        sent = []
+
+        async def deliver(payload):
+            sent.append(payload["to"])
+
+        outbox = EmailOutbox(deliver, path=path, workers=1)
+        claim = outbox._claim
+        errors = [sqlite3.OperationalError("database is locked")]
+
+        def flaky_claim(now):
+            if errors:
+                raise errors.pop()
+            return claim(now)
+        outbox._claim = flaky_claim
+
+        await outbox.enqueue({"to": "cliente@example.com"})
+        for _ in range(50):
+            if sent:
+                break
+            await asyncio.sleep(0.1)
+        alive = all(not task.done() for task in outbox._tasks)
+        await outbox.close()
+        return sent, alive
+
+    assert asyncio.run(run()) == (["cliente@example.com"], True)
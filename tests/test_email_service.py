@@ -0,0 +1,16 @@
+"""
+EmailService notification rendering
+"""
+from integrations.email.email_service import EmailService
+
+
+def test_notification_html_is_inserted_as_given():
+    text, html = EmailService().render_notification(
+        "Reserva confirmada",
+        "Mesa para <b>4</b> às 20h",
+        "https://example.com/r?id=1&x=2"
+    )
+
+    assert "<p>Mesa para <b>4</b> às 20h</p>" in html
+    assert 'href="https://example.com/r?id=1&x=2"' in html
+    assert text == "Reserva confirmada\n\nMesa para <b>4</b> às 20h\n\nAction URL: https://example.com/r?id=1&x=2"
@@ -0,0 +1,172 @@
+"""
+SQLHistoryBackend write-behind persistence
+"""
+import asyncio
+
+from core.conversation_store import ConversationStore, Message
+from core.persistence import SQLHistoryBackend
+
+
+def test_writes_without_a_load_are_persisted_on_close(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'history.db'}"
+
+    async def write():
+        store = ConversationStore(backend=SQLHistoryBackend("shop", database_url=url))
+        store.append("5511999999999", "user", "Tem mesa para 4?")
+        store.append("5511999999999", "assistant", "Temos, às 20h.")
+        await store.close()
+
+    async def read():
+        store = ConversationStore(backend=SQLHistoryBackend("shop", database_url=url))
+        await store.load("5511999999999")
+        history = store.history("5511999999999")
+        await store.close()
+        return history
+
+    asyncio.run(write())
+    history = asyncio.run(read())
+
+    assert [(msg["role"], msg["content"]) for msg in history] == [
+        ("user", "Tem mesa para 4?"),
+        ("assistant", "Temos, às 20h.")
+    ]
+
+
+def test_writes_without_a_load_are_flushed_in_the_background(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'history.db'}"
+
+    async def run():
+        backend = SQLHistoryBackend("shop", database_url=url, flush_interval=0.05)
+        store = ConversationStore(backend=backend)
+        store.append("5511888888888", "user", "Oi")
+        await asyncio.sleep(0.5)
+        flushed = not backend._pending
+        await store.close()
+        return flushed
+
+    assert asyncio.run(run())
+
+
+def test_turns_written_before_the_first_load_are_not_duplicated(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'history.db'}"
+
+    async def run():
+        backend = SQLHistoryBackend("shop", database_url=url, flush_interval=60)
+        store = ConversationStore(backend=backend)
+        # Still waiting in the write buffer when the user is loaded
+        store.append("pending", "user", "one")
+        await store.load("pending")
+        # Already flushed when the user is loaded
+        store.append("flushed", "user", "two")
+        await backend.flush()
+        await store.load("flushed")
+        result = {
+            user_id: ([msg["content"] for msg in store.history(user_id)], store._conversations[user_id].total)
+            for user_id in ("pending", "flushed")
+        }
+        await store.close()
+        return result
+
+    assert asyncio.run(run()) == {"pending": (["one"], 1), "flushed": (["two"], 1)}
+
+
+def test_load_recent_merges_stored_rows_with_pending_writes(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'history.db'}"
+
+    async def run():
+        backend = SQLHistoryBackend("shop", database_url=url, flush_interval=60)
+        await backend.start()
+        for n in range(3):
+            backend.enqueue_message("ana", Message("user", f"stored {n}", float(n)))
+        backend.enqueue_message("bia", Message("user", "other user", 1.5))
+        await backend.flush()
+
+        backend.enqueue_message("ana", Message("user", "pending", 10.0))
+        merged = await backend.load_recent("ana", limit=3)
+
+        backend.enqueue_clear("ana")
+        backend.enqueue_message("ana", Message("user", "after clear", 11.0))
+        cleared = await backend.load_recent("ana", limit=10)
+
+        await backend.close()
+        return [m.content for m in merged], [m.content for m in cleared]
+
+    merged, cleared = asyncio.run(run())
+
+    assert merged == ["stored 1", "stored 2", "pending"]
+    assert cleared == ["after clear"]
+
+
+def test_a_full_batch_is_flushed_before_the_interval(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'history.db'}"
+
+    async def run():
+        backend = SQLHistoryBackend("shop", database_url=url, batch_size=3, flush_interval=60)
+        await backend.start()
+        for n in range(3):
+            backend.enqueue_message("ana", Message("user", f"msg {n}", float(n)))
+        await asyncio.sleep(0.3)
+        flushed = not backend._pending
+        await backend.close()
+        return flushed
+
+    assert asyncio.run(run())
+
+
+def test_clears_and_adds_are_written_in_order_on_shutdown(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'history.db'}"
+
+    async def write():
+        store = ConversationStore(backend=SQLHistoryBackend("shop", database_url=url, flush_interval=60))
+        store.append("ana", "user", "old")
+        store.clear("ana")
+        store.append("ana", "user", "new")
+        store.append("bia", "user", "kept")
+        await store.close()
+
+    async def read():
+        backend = SQLHistoryBackend("shop", database_url=url)
+        history = {
+            user_id: [m.content for m in await backend.load_recent(user_id, 10)]
+            for user_id in ("ana", "bia")
+        }
+        cafe = SQLHistoryBackend("cafe", database_url=url)
+        other = await cafe.load_recent("ana", 10)
+        await cafe.close()
+        await backend.close()
+        return history, other
+
+    asyncio.run(write())
+    history, other = asyncio.run(read())
+
+    assert history == {"ana": ["new"], "bia": ["kept"]}
+    assert other == []
+
+
+def test_failed_flushes_are_retried(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path / 'history.db'}"
+
+    async def run():
+        backend = SQLHistoryBackend("shop", database_url=url, flush_interval=60)
+        await backend.start()
+        backend.enqueue_message("ana", Message("user", "first", 1.0))
+
+        engine = backend._engine
+        backend._engine = None
+        backend._ensure_engine = _failing
+        await backend.flush()
+        kept = len(backend._pending)
+
+        backend._engine = engine
+        del backend._ensure_engine
+        backend.enqueue_message("ana", Message("user", "second", 2.0))
+        await backend.flush()
+        stored = await backend.load_recent("ana", 10)
+        await backend.close()
+        return kept, [m.content for m in stored]
+
+    assert asyncio.run(run()) == (1, ["first", "second"])
+
+
+async def _failing():
+    raise OSError("database unavailable")
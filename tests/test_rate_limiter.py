@@ -0,0 +1,102 @@
+"""
+RateLimiter GCRA burst and refill on each backend
+"""
+import asyncio
+import threading
+
+import pytest
+
+from core.rate_limit_backends import MemoryRateLimitBackend, SQLiteRateLimitBackend
+from core.rate_limiter import RateLimiter, RateLimitExceeded
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryRateLimitBackend()
+        return
+    backend = SQLiteRateLimitBackend(path=str(tmp_path / "limits.db"), namespace="shop")
+    yield backend
+    backend.close()
+
+
+def test_burst_is_allowed_then_limited(backend):
+    clock = FakeClock()
+    limiter = RateLimiter(max_requests=10, time_window=60, burst_size=3, clock=clock, backend=backend)
+
+    for _ in range(3):
+        assert limiter.check_rate_limit("ana")
+    assert limiter.get_remaining_requests("ana") == 0
+    with pytest.raises(RateLimitExceeded, match="6 seconds"):
+        limiter.check_rate_limit("ana")
+
+    # Other users have their own bucket
+    assert limiter.check_rate_limit("bia")
+
+
+def test_tokens_refill_at_the_sustained_rate(backend):
+    clock = FakeClock()
+    limiter = RateLimiter(max_requests=10, time_window=60, burst_size=3, clock=clock, backend=backend)
+    for _ in range(3):
+        limiter.check_rate_limit("ana")
+
+    # One token every 6 seconds
+    clock.now += 5.9
+    with pytest.raises(RateLimitExceeded):
+        limiter.check_rate_limit("ana")
+    clock.now += 0.1
+    assert limiter.check_rate_limit("ana")
+    with pytest.raises(RateLimitExceeded):
+        limiter.check_rate_limit("ana")
+
+    # A long idle period refills the bucket, but never beyond the burst
+    clock.now += 600
+    assert limiter.get_remaining_requests("ana") == 3
+    assert limiter.sweep() == 1
+    for _ in range(3):
+        limiter.check_rate_limit("ana")
+    with pytest.raises(RateLimitExceeded):
+        limiter.check_rate_limit("ana")
+
+
+def test_async_check_matches_the_sync_one(backend):
+    clock = FakeClock()
+    limiter = RateLimiter(max_requests=10, time_window=60, burst_size=2, clock=clock, backend=backend)
+
+    async def run():
+        assert await limiter.check_rate_limit_async("ana")
+        assert await limiter.check_rate_limit_async("ana")
+        with pytest.raises(RateLimitExceeded):
+            await limiter.check_rate_limit_async("ana")
+
+    asyncio.run(run())
+
+
+def test_sqlite_checks_run_off_the_event_loop(tmp_path):
+    backend = SQLiteRateLimitBackend(path=str(tmp_path / "limits.db"))
+    consume = backend.consume
+    threads = []
+
+    def recording_consume(*args):
+        threads.append(threading.get_ident())
+        return consume(*args)
+
+    backend.consume = recording_consume
+    limiter = RateLimiter(backend=backend)
+
+    async def run():
+        await limiter.check_rate_limit_async("ana")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(run())
+    backend.close()
+
+    assert threads and threads[0] != loop_thread
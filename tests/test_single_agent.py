@@ -0,0 +1,55 @@
+"""
+SingleAgent knowledge base updates and streaming
+"""
+import asyncio
+
+import pytest
+
+from config.settings import settings
+from core.provider_budget import Reservation
+from core.single_agent import SingleAgent
+
+
+def test_knowledge_base_changes_go_through_the_rebuild(monkeypatch):
+    monkeypatch.setattr(settings, "openai_api_key", "test-key")
+    monkeypatch.setattr(settings, "anthropic_api_key", None)
+    agent = SingleAgent("shop", "Test shop", "You help customers.", knowledge_base={"hours": "Open 9-18"})
+    version = agent.knowledge_version
+
+    with pytest.raises(TypeError):
+        agent.knowledge_base["parking"] = "Free parking behind the store"
+
+    agent.update_knowledge_base({"parking": "Free parking behind the store"})
+    assert agent.knowledge_version == version + 1
+    assert agent.knowledge_base["parking"] == "Free parking behind the store"
+    assert "Free parking" in agent.prompt_builder.prefix
+
+
+def test_a_stream_stopped_early_settles_its_reservation(monkeypatch):
+    monkeypatch.setattr(settings, "openai_api_key", "test-key")
+    monkeypatch.setattr(settings, "anthropic_api_key", None)
+    monkeypatch.setattr(settings, "enable_memory_persistence", False)
+    agent = SingleAgent("shop", "Test shop", "You help customers.")
+    settled = []
+
+    class Budget:
+        async def acquire(self, tokens, timeout=None):
+            return Reservation(tokens)
+
+        def settle(self, reservation):
+            settled.append(reservation)
+
+    async def provider_stream(prompt, model, reservation=None):
+        for word in ("We", " open", " at", " nine."):
+            yield word
+
+    monkeypatch.setattr(agent, "_budget", lambda provider: Budget())
+    monkeypatch.setattr(agent, "_stream_openai_response", provider_stream)
+
+    async def run():
+        stream = agent.stream_message("When do you open?", user_id="ana")
+        assert await stream.__anext__() == "We"
+        await stream.aclose()
+        assert len(settled) == 1
+
+    asyncio.run(run())
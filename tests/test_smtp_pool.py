@@ -0,0 +1,53 @@
+"""
+SMTPConnectionPool connection handling
+"""
+import asyncio
+from email.message import EmailMessage
+
+from integrations.email.smtp_pool import SMTPConnectionPool
+
+
+class FakeSMTP:
+    """Connection whose sends can be made to hang"""
+
+    def __init__(self, hang: bool):
+        self.hang = hang
+        self.is_connected = True
+        self.closed = False
+
+    async def send_message(self, message, sender=None, recipients=None):
+        if self.hang:
+            await asyncio.Event().wait()
+        return {}, "OK"
+
+    def close(self):
+        self.closed = True
+        self.is_connected = False
+
+
+def test_cancelled_send_closes_its_connection_and_frees_the_slot():
+    async def run():
+        pool = SMTPConnectionPool("smtp.example.com", size=1)
+        clients = []
+
+        async def connect():
+            clients.append(FakeSMTP(hang=not clients))
+            return clients[-1]
+        pool._connect = connect
+
+        message = EmailMessage()
+        message["To"] = "cliente@example.com"
+
+        send = asyncio.create_task(pool.send(message))
+        await asyncio.sleep(0.05)
+        send.cancel()
+        await asyncio.gather(send, return_exceptions=True)
+
+        # The only slot is free again and the next send gets a new connection
+        await asyncio.wait_for(pool.send(message), 1)
+        return clients, pool.get_stats()
+
+    clients, stats = asyncio.run(run())
+    assert clients[0].closed
+    assert not clients[1].closed
+    assert stats["idle"] == 1 and stats["sent"] == 1
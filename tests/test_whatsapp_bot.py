@@ -0,0 +1,59 @@
+"""
+WhatsAppBot message handling through a WhatsAppSupervisor
+"""
+import asyncio
+
+from integrations.whatsapp.supervisor import WhatsAppSupervisor
+from whatsapp_bot import WhatsAppBot
+
+
+class FakeAgent:
+    """Streams a fixed reply, or fails"""
+
+    def __init__(self, reply: str = "", error: Exception = None):
+        self.reply = reply
+        self.error = error
+
+    async def stream_message(self, message, context=None, user_id=None):
+        if self.error:
+            raise self.error
+        for word in self.reply.split(" "):
+            yield word + " "
+
+
+def make_bot(agent):
+    bot = WhatsAppBot(sessions=["shop-a", "shop-b"])
+    bot.agent = agent
+    bot.whatsapp = WhatsAppSupervisor(["shop-a", "shop-b"], message_handler=bot.handle_message)
+
+    sent = []
+    for name, shard in bot.whatsapp.shards.items():
+        async def send_message(to, message, timeout=None, priority=0, name=name):
+            sent.append((name, to, message))
+            return {"to": to, "messageId": str(len(sent))}
+        shard.send_message = send_message
+    return bot, sent
+
+
+def test_reply_is_sent_from_the_receiving_session():
+    bot, sent = make_bot(FakeAgent("Olá! Temos mesas livres hoje à noite, a partir das 19h."))
+    message = {"from": "5511999999999@c.us", "body": "Tem mesa?", "session": "shop-b"}
+
+    asyncio.run(bot.handle_message(message))
+
+    assert sent
+    assert all(name == "shop-b" and to == message["from"] for name, to, _ in sent)
+    assert "".join(text for _, _, text in sent).startswith("Olá!")
+    assert bot.user_sessions[message["from"]]["message_count"] == 1
+
+
+def test_error_reply_is_sent_from_the_receiving_session():
+    bot, sent = make_bot(FakeAgent(error=RuntimeError("provider down")))
+    message = {"from": "5511888888888@c.us", "body": "Oi", "session": "shop-a"}
+
+    asyncio.run(bot.handle_message(message))
+
+    assert len(sent) == 1
+    name, to, text = sent[0]
+    assert (name, to) == ("shop-a", message["from"])
+    assert text.startswith("Desculpe")
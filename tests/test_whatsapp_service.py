@@ -0,0 +1,66 @@
+"""
+WhatsAppService inbound flow control and auth layout, without a bridge process
+"""
+import asyncio
+
+import pytest
+
+from integrations.whatsapp.supervisor import WhatsAppSupervisor
+from integrations.whatsapp.whatsapp_service import WhatsAppService
+
+
+def test_responses_are_read_while_the_dispatcher_is_full():
+    async def run():
+        release = asyncio.Event()
+        handled = []
+
+        async def handler(message):
+            await release.wait()
+            handled.append(message["body"])
+
+        service = WhatsAppService(
+            message_handler=handler,
+            max_concurrent_messages=1,
+            max_pending_messages=1,
+            max_inbox_size=2
+        )
+        flow = []
+
+        async def set_inbound_flow(paused):
+            flow.append(paused)
+        service._set_inbound_flow = set_inbound_flow
+
+        service.dispatcher.start()
+        service._inbound_task = asyncio.create_task(service._forward_inbound())
+        for number in range(4):
+            service._handle_event({"type": "message", "data": {"from": f"{number}@c.us", "body": str(number)}})
+        await asyncio.sleep(0.05)
+
+        # The handler holds the only dispatcher slot, yet an ack still resolves
+        ack = asyncio.get_running_loop().create_future()
+        service._pending[7] = ack
+        service._handle_event({"type": "response", "id": 7, "ok": True, "data": {"messageId": "x"}})
+        assert ack.result() == {"messageId": "x"}
+        assert service._inbound_paused and flow == [True]
+
+        release.set()
+        await service.stop_inbound(timeout=5)
+        await service.dispatcher.stop()
+        assert sorted(handled) == ["0", "1", "2", "3"]
+        assert flow == [True, False]
+
+    asyncio.run(run())
+
+
+def test_default_sessions_keep_the_login_saved_before_sessions_had_names():
+    assert WhatsAppService(session_name="chronyx-bot").client_id == "chronyx-session"
+    assert WhatsAppService().client_id == "chronyx-session"
+    assert WhatsAppService().auth_dir == ".wwebjs_auth"
+
+    supervisor = WhatsAppSupervisor(["chronyx-bot", "centro"])
+    assert {name: shard.client_id for name, shard in supervisor.shards.items()} == {
+        "chronyx-bot": "chronyx-session",
+        "centro": "centro"
+    }
+    with pytest.raises(ValueError):
+        WhatsAppSupervisor(["chronyx-bot", "chronyx-whatsapp"])
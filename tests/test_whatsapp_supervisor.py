@@ -0,0 +1,167 @@
+"""
+WhatsAppSupervisor sharding and bridge restarts, against a fake bridge
+
+A fake `node` executable on PATH stands in for bridge.js: it speaks the
+same line protocol, so the real process handling is exercised.
+"""
+import asyncio
+import logging
+import re
+import sys
+import time
+
+import pytest
+
+from integrations.whatsapp import whatsapp_service
+from integrations.whatsapp.supervisor import WhatsAppSupervisor
+
+FAKE_BRIDGE = """\
+import json
+import os
+import sys
+
+# Invoked as: node bridge.js <client id> <auth dir>
+client_id = sys.argv[2]
+
+
+def bump(name):
+    path = f"{name}-{client_id}"
+    count = int(open(path).read()) if os.path.exists(path) else 0
+    with open(path, "w") as f:
+        f.write(str(count + 1))
+    return count
+
+
+def write(frame):
+    print(json.dumps(frame), flush=True)
+
+
+start = bump("starts")
+# The first FAKE_EARLY_EXITS starts die before the client is ready
+early_exits = int(os.environ.get("FAKE_EARLY_EXITS", "0"))
+if start < early_exits:
+    sys.exit(1)
+
+write({"type": "ready", "data": {}})
+if start == early_exits:
+    write({"type": "message", "data": {"from": f"{client_id}-customer@c.us", "body": "oi"}})
+
+for line in sys.stdin:
+    command = json.loads(line)
+    if command["type"] != "send_message":
+        write({"type": "response", "id": command["id"], "ok": True, "data": {"held": 0}})
+        continue
+    # Crash once while sending, as a browser crash would
+    if command["to"] == "crash@c.us" and not os.path.exists(f"crashed-{client_id}"):
+        open(f"crashed-{client_id}", "w").close()
+        sys.exit(3)
+    with open(f"sent-{client_id}", "a") as f:
+        f.write(command["to"] + "\\n")
+    write({"type": "response", "id": command["id"], "ok": True,
+           "data": {"to": command["to"], "messageId": f"{client_id}-{start}"}})
+"""
+
+
+@pytest.fixture
+def bridge_dir(tmp_path, monkeypatch):
+    """Run bridges from tmp_path, with the fake as the only node on PATH"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    node = bin_dir / "node"
+    node.write_text(f"#!{sys.executable}\n" + FAKE_BRIDGE)
+    node.chmod(0o755)
+    # Only the fake: a real node must never be started by the tests
+    monkeypatch.setenv("PATH", str(bin_dir))
+
+    async def toolchain_ready():
+        pass
+
+    monkeypatch.setattr(whatsapp_service, "ensure_toolchain", toolchain_ready)
+    monkeypatch.setattr(whatsapp_service, "WHATSAPP_DIR", tmp_path)
+    return tmp_path
+
+
+async def wait_until(condition, timeout: float = 10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not met in time")
+        await asyncio.sleep(0.02)
+
+
+def sent(bridge_dir, client_id):
+    path = bridge_dir / f"sent-{client_id}"
+    return path.read_text().split() if path.exists() else []
+
+
+def test_each_session_runs_its_own_bridge_and_replies_from_it(bridge_dir):
+    async def run():
+        replies = []
+
+        async def handler(message):
+            # No session given: the reply follows the chat's route
+            replies.append(await supervisor.send_message(message["from"], "Olá!"))
+
+        supervisor = WhatsAppSupervisor(["centro", "shopping"], message_handler=handler)
+        await supervisor.start()
+        try:
+            await wait_until(lambda: len(replies) == 2)
+            stats = supervisor.get_stats()
+            fresh = supervisor.shard_for("new@c.us")
+            assert supervisor.shard_for("new@c.us") is fresh
+        finally:
+            await supervisor.stop()
+        return replies, stats
+
+    replies, stats = asyncio.run(run())
+
+    assert sent(bridge_dir, "centro") == ["centro-customer@c.us"]
+    assert sent(bridge_dir, "shopping") == ["shopping-customer@c.us"]
+    assert sorted(reply["messageId"] for reply in replies) == ["centro-0", "shopping-0"]
+    assert stats["ready_sessions"] == 2
+    assert stats["routes"] == 2
+    pids = {shard["pid"] for shard in stats["shards"].values()}
+    assert len(pids) == 2 and None not in pids
+
+
+def test_a_crashed_bridge_is_restarted_and_the_send_requeued(bridge_dir):
+    async def run():
+        supervisor = WhatsAppSupervisor(["centro"], restart_delay=0.05)
+        await supervisor.start()
+        try:
+            await wait_until(lambda: supervisor.is_ready)
+            # The bridge dies while sending; the message goes out after the restart
+            confirmation = await supervisor.send_message("crash@c.us", "Pedido confirmado", timeout=10)
+            stats = supervisor.get_stats()
+        finally:
+            await supervisor.stop()
+        return confirmation, stats
+
+    confirmation, stats = asyncio.run(run())
+
+    assert confirmation == {"to": "crash@c.us", "messageId": "centro-1"}
+    assert sent(bridge_dir, "centro") == ["crash@c.us"]
+    assert stats["restarts"] == 1
+    assert stats["shards"]["centro"]["last_recovery_seconds"] is not None
+
+
+def test_restarts_back_off_exponentially(bridge_dir, monkeypatch, caplog):
+    monkeypatch.setenv("FAKE_EARLY_EXITS", "4")
+
+    async def run():
+        supervisor = WhatsAppSupervisor(["centro"], restart_delay=0.1, max_restart_delay=0.4)
+        await supervisor.start()
+        try:
+            await wait_until(lambda: supervisor.is_ready)
+            return supervisor.get_stats()
+        finally:
+            await supervisor.stop()
+
+    with caplog.at_level(logging.WARNING, logger=whatsapp_service.__name__):
+        stats = asyncio.run(run())
+
+    delays = re.findall(r"restarting in ([\d.]+)s", caplog.text)
+    # Doubled per consecutive crash, capped at max_restart_delay
+    assert delays == ["0.1", "0.2", "0.4", "0.4"]
+    assert stats["restarts"] == 4
+    assert stats["ready_sessions"] == 1
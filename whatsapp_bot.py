@@ -5,11 +5,16 @@ Connects WhatsApp messages to AI agents
 """
 import asyncio
 import logging
-from typing import Dict
+from contextlib import aclosing
+from typing import Dict, List, Optional
 
-from integrations.whatsapp.whatsapp_service import WhatsAppService
-from templates.restaurant.restaurant_agent import create_restaurant_agent
-from templates.consulting.consulting_agent import create_consulting_agent
+from integrations.whatsapp.supervisor import WhatsAppSupervisor
+from core.streaming import chunk_sentences
+from core.client_pool import client_registry
+from integrations.email import EmailService
+from config.settings import settings
+from templates.restaurant import RestaurantTemplate
+from templates.consulting import ConsultingTemplate
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,16 +26,19 @@ logger = logging.getLogger(__name__)
 class WhatsAppBot:
     """WhatsApp bot that connects messages to Chronyx agents"""
 
-    def __init__(self, template_type: str = "restaurant"):
+    def __init__(self, template_type: str = "restaurant", sessions: Optional[List[str]] = None):
         """
         Initialize WhatsApp bot
 
         Args:
             template_type: Type of agent template ("restaurant" or "consulting")
+            sessions: WhatsApp sessions (numbers) to serve, one bridge each
         """
         self.template_type = template_type
+        self.sessions = sessions or ["chronyx-bot"]
         self.agent = None
         self.whatsapp = None
+        self.email = EmailService()
         self.user_sessions: Dict[str, Dict] = {}
 
     async def start(self):
@@ -39,15 +47,22 @@ class WhatsAppBot:
 
         # Create agent based on template type
         if self.template_type == "restaurant":
-            self.agent = create_restaurant_agent()
+            self.agent = RestaurantTemplate.create_agent()
         elif self.template_type == "consulting":
-            self.agent = create_consulting_agent()
+            self.agent = ConsultingTemplate.create_agent()
         else:
             raise ValueError(f"Unknown template type: {self.template_type}")
 
-        # Create WhatsApp service
-        self.whatsapp = WhatsAppService(
-            session_name="chronyx-bot",
+        # Open provider connections before the first customer writes in
+        if settings.http_prewarm:
+            await client_registry.warmup()
+
+        # Resume delivering emails queued before a restart
+        self.email.start()
+
+        # Create WhatsApp service (one bridge per session)
+        self.whatsapp = WhatsAppSupervisor(
+            self.sessions,
             message_handler=self.handle_message
         )
 
@@ -57,11 +72,11 @@ class WhatsAppBot:
         logger.info("✅ WhatsApp bot is running!")
         logger.info("Scan the QR code above with your WhatsApp app to connect")
 
-        # Keep running
+        # Keep running (Ctrl+C cancels this task)
         try:
             while True:
                 await asyncio.sleep(1)
-        except KeyboardInterrupt:
+        finally:
             logger.info("Stopping bot...")
             await self.stop()
 
@@ -75,10 +90,12 @@ class WhatsAppBot:
                     "from": "5511999999999@c.us",
                     "body": "message text",
                     "timestamp": 1234567890,
-                    "isGroup": False
+                    "isGroup": False,
+                    "session": "chronyx-bot"
                 }
         """
         sender = message_data.get("from")
+        session = message_data.get("session")
         text = message_data.get("body", "").strip()
         is_group = message_data.get("isGroup", False)
 
@@ -95,25 +112,26 @@ class WhatsAppBot:
         logger.info(f"📱 Message from {sender}: {text}")
 
         try:
-            # Get or create user session
+            # Get or create per-user state
             if sender not in self.user_sessions:
                 self.user_sessions[sender] = {
                     "message_count": 0,
                     "context": {}
                 }
 
-            session = self.user_sessions[sender]
-            session["message_count"] += 1
+            user_state = self.user_sessions[sender]
+            user_state["message_count"] += 1
 
-            # Process message with agent
-            response = await self.agent.process_message(
+            # Stream the reply, sending each sentence as soon as it's complete
+            stream = self.agent.stream_message(
                 message=text,
-                context=session.get("context"),
+                context=user_state.get("context"),
                 user_id=sender
             )
-
-            # Send response
-            await self.whatsapp.send_message(sender, response)
+            # A failed send ends the stream here, releasing the user's turn
+            async with aclosing(stream):
+                async for chunk in chunk_sentences(stream):
+                    await self.whatsapp.send_message(sender, chunk, session=session)
 
             logger.info(f"✅ Response sent to {sender}")
 
@@ -126,7 +144,7 @@ class WhatsAppBot:
                 "Por favor, tente novamente."
             )
             try:
-                await self.whatsapp.send_message(sender, error_msg)
+                await self.whatsapp.send_message(sender, error_msg, session=session)
             except Exception as send_error:
                 logger.error(f"Failed to send error message: {send_error}")
 
@@ -134,6 +152,10 @@ class WhatsAppBot:
         """Stop WhatsApp bot"""
         if self.whatsapp:
             await self.whatsapp.stop()
+        if self.agent:
+            await self.agent.close()
+        await self.email.close()
+        await client_registry.close()
         logger.info("Bot stopped")
 
 
@@ -148,11 +170,14 @@ async def main():
         template_type = sys.argv[1].lower()
         if template_type not in ["restaurant", "consulting"]:
             print(f"Error: Unknown template type '{template_type}'")
-            print("Usage: python whatsapp_bot.py [restaurant|consulting]")
+            print("Usage: python whatsapp_bot.py [restaurant|consulting] [session ...]")
             sys.exit(1)
 
+    # Optional session names, one WhatsApp number each
+    sessions = sys.argv[2:] or None
+
     # Create and start bot
-    bot = WhatsAppBot(template_type=template_type)
+    bot = WhatsAppBot(template_type=template_type, sessions=sessions)
     await bot.start()
 
 